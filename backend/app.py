@@ -1,4 +1,4 @@
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, send_from_directory, jsonify, request
 from flask_cors import CORS
 from flask_compress import Compress
 from dotenv import load_dotenv
@@ -81,20 +81,62 @@ def health():
 
 @app.route('/api/cache/stats', methods=['GET'])
 def cache_stats():
-    """Retourne les statistiques du cache"""
+    """Retourne les statistiques du cache (résultats et embeddings de requêtes)"""
     from services.cache import get_cache
-    cache = get_cache()
-    return jsonify(cache.get_stats()), 200
+    from services.embedding_cache import get_embedding_cache
+    from services.perceptual_hash import get_near_duplicate_cache
+    stats = get_cache().get_stats()
+    stats['embeddings'] = get_embedding_cache().get_stats()
+    stats['near_duplicates'] = get_near_duplicate_cache().get_stats()
+    return jsonify(stats), 200
+
+def clear_query_caches():
+    """Vide les caches d'embeddings de requêtes (appelé à chaque vidage du cache de résultats)"""
+    from services.embedding_cache import get_embedding_cache
+    from services.perceptual_hash import get_near_duplicate_cache
+    get_embedding_cache().clear()
+    get_near_duplicate_cache().clear()
+
+# Un vidage venu d'un autre worker (cache partagé) vide aussi les caches locaux
+from services.cache import get_cache
+get_cache().add_clear_listener(clear_query_caches)
 
 @app.route('/api/cache/clear', methods=['POST'])
 def cache_clear():
-    """Vide le cache (admin seulement)"""
-    from services.cache import get_cache
-    cache = get_cache()
-    cache.clear()
+    """Vide le cache de tous les workers (admin seulement)"""
+    get_cache().clear()
     logger.info("Cache cleared via API")
     return jsonify({'message': 'Cache cleared'}), 200
 
+@app.route('/api/cache/invalidate', methods=['POST'])
+def cache_invalidate():
+    """
+    Invalide les entrées d'un préfixe dans tous les workers (admin seulement)
+    
+    Body JSON: {"prefix": "search_image"} (type de cache) ou {"key": "<clé complète>"}
+    """
+    data = request.get_json(silent=True) or {}
+    key = data.get('key')
+    if key and isinstance(key, str):
+        removed = int(get_cache().delete(key))
+        logger.info(f"Cache key deleted via API: {key} ({removed} entries)")
+        return jsonify({'message': 'Cache invalidated', 'key': key, 'removed': removed}), 200
+    
+    prefix = data.get('prefix')
+    if not prefix or not isinstance(prefix, str):
+        return jsonify({'error': "Missing 'prefix' or 'key'"}), 400
+    if not prefix.endswith(':'):
+        prefix += ':'
+    removed = get_cache().invalidate(prefix)
+    logger.info(f"Cache invalidated via API: {prefix} ({removed} entries)")
+    return jsonify({'message': 'Cache invalidated', 'prefix': prefix, 'removed': removed}), 200
+
+@app.route('/api/db/stats', methods=['GET'])
+def db_stats():
+    """Retourne les statistiques du pool de connexions (attente, timeouts, reconnexions)"""
+    from models.database import get_db
+    return jsonify(get_db().get_stats()), 200
+
 # Note: L'index sera chargé automatiquement lors de la première recherche
 # ou peut être chargé manuellement en appelant load_search_index()
 
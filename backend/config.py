@@ -7,6 +7,12 @@ class Config:
     DB_NAME = os.getenv('DB_NAME', 'cbir_ecommerce')
     DB_USER = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'password')
+    # Pool de connexions (lecture seule, autocommit) utilisé par l'application
+    DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))  # attente max d'une connexion (s)
+    # Inactivité (s) au-delà de laquelle une connexion est pingée avant réutilisation
+    DB_HEALTHCHECK_INTERVAL = float(os.getenv('DB_HEALTHCHECK_INTERVAL', '30'))
     
     # Paths
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads', 'user_queries')
@@ -20,3 +26,79 @@ class Config:
     # Model Configuration
     MODEL_NAME = 'resnet50'
     MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+    
+    # Micro-batching des requêtes d'inférence concurrentes
+    INFERENCE_BATCHING = os.getenv('INFERENCE_BATCHING', 'true').lower() in ('1', 'true', 'yes')
+    INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', '16'))
+    INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', '5'))
+    
+    # Backend d'inférence: 'tensorflow' (keras), 'onnx' (ONNX Runtime) ou 'tflite'
+    # (modèles exportés par scripts/export_resnet50.py, défaut: data/models/resnet50.<backend>)
+    INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'tensorflow').lower()
+    INFERENCE_MODEL_PATH = os.getenv('INFERENCE_MODEL_PATH', '')
+    INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', '0'))
+    # Modèle INT8 (scripts/quantize_resnet50.py) pour les backends onnx/tflite
+    INFERENCE_INT8 = os.getenv('INFERENCE_INT8', 'false').lower() in ('1', 'true', 'yes')
+    
+    # Inférence compilée (tf.function, signatures fixes par taille de batch) au lieu de predict()
+    INFERENCE_COMPILED = os.getenv('INFERENCE_COMPILED', 'true').lower() in ('1', 'true', 'yes')
+    INFERENCE_XLA = os.getenv('INFERENCE_XLA', 'false').lower() in ('1', 'true', 'yes')
+    INFERENCE_WARMUP = os.getenv('INFERENCE_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Cache des résultats (MemoryCache): bornes, admission ('lru' ou 'tinylfu'),
+    # secondes entre deux nettoyages des entrées expirées (0 = désactivé)
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+    CACHE_MAX_MB = int(os.getenv('CACHE_MAX_MB', '128'))
+    CACHE_ADMISSION = os.getenv('CACHE_ADMISSION', 'lru').lower()
+    CACHE_SWEEP_INTERVAL = float(os.getenv('CACHE_SWEEP_INTERVAL', '60'))
+    # Stale-while-revalidate: secondes après expiration pendant lesquelles un résultat
+    # est encore servi pendant son recalcul en arrière-plan (0 = désactivé)
+    CACHE_STALE_TTL = float(os.getenv('CACHE_STALE_TTL', '0'))
+    # Cache partagé entre les workers (fichier SQLite, vide = cache propre à chaque worker);
+    # chaque worker relit les invalidations toutes les CACHE_SYNC_INTERVAL secondes.
+    # Valeurs désérialisées avec pickle: dossier propre à l'utilisateur du serveur (0700),
+    # jamais un dossier partagé ou accessible en écriture à tous (/tmp...)
+    CACHE_SHARED_PATH = os.getenv('CACHE_SHARED_PATH', '')
+    CACHE_SHARED_MAX_MB = int(os.getenv('CACHE_SHARED_MAX_MB', '512'))
+    CACHE_SYNC_INTERVAL = float(os.getenv('CACHE_SYNC_INTERVAL', '1'))
+    
+    # Cache des embeddings de requêtes image (MD5 -> vecteur 2048-d, ~8 Ko par entrée)
+    EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '4096'))
+    # Requêtes quasi identiques (pHash à distance de Hamming <= rayon, 0 entrée = désactivé)
+    NEAR_DUPLICATE_CACHE_SIZE = int(os.getenv('NEAR_DUPLICATE_CACHE_SIZE', '4096'))
+    NEAR_DUPLICATE_RADIUS = int(os.getenv('NEAR_DUPLICATE_RADIUS', '4'))
+    
+    # Catalogue produits en mémoire: secondes entre deux rafraîchissements (updated_at),
+    # faits par un thread de fond (0 = pas de rafraîchissement)
+    CATALOG_REFRESH_INTERVAL = float(os.getenv('CATALOG_REFRESH_INTERVAL', '60'))
+    
+    # Features chargées en memory-map (copie partagée entre workers)
+    FEATURES_MMAP = os.getenv('FEATURES_MMAP', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Search backend: 'npy' (SearchEngineNPY) ou 'faiss' (SearchEngineFAISS)
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'npy')
+    FAISS_INDEX_PATH = os.getenv(
+        'FAISS_INDEX_PATH', os.path.join(os.path.dirname(__file__), 'data', 'faiss_index_flat.bin')
+    )
+    FAISS_NPROBE = int(os.getenv('FAISS_NPROBE', '8'))
+    
+    # Search index (ANN) Configuration
+    # Méthodes utilisables via ?method=: 'cosine' (exact), 'ivf', 'hnsw', 'pq', 'fp16', 'sq8'
+    IVF_NLIST = int(os.getenv('IVF_NLIST', '0')) or None  # None = 4 * sqrt(N)
+    IVF_NPROBE = int(os.getenv('IVF_NPROBE', '8'))
+    HNSW_M = int(os.getenv('HNSW_M', '16'))
+    HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', '100'))
+    HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', '50'))
+    PQ_M = int(os.getenv('PQ_M', '64'))  # octets par vecteur
+    PQ_NBITS = int(os.getenv('PQ_NBITS', '8'))
+    # Candidats re-classés en cosinus exact pour les index compressés (0 = désactivé)
+    ANN_RERANK = int(os.getenv('ANN_RERANK', '100'))
+    # Index ANN construits au démarrage s'ils ne sont pas précalculés par
+    # scripts/build_ann_index.py (ex: "ivf,hnsw"); sans index, la méthode répond 503
+    ANN_PREBUILD = [m.strip() for m in os.getenv('ANN_PREBUILD', '').split(',') if m.strip()]
+
+    # Produits similaires précalculés (scripts/build_similar_products.py)
+    SIMILAR_PRODUCTS_PATH = os.getenv(
+        'SIMILAR_PRODUCTS_PATH',
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'similar_products.npz'),
+    )
@@ -1,7 +1,16 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import pool as pg_pool
 from psycopg2.extras import RealDictCursor
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+
 class DatabaseConnection:
     def __init__(self):
         self.conn = None
@@ -41,12 +50,218 @@ class DatabaseConnection:
             print(f"Query execution error: {e}")
             return None
 
+PRODUCT_COLUMNS = "id, name, category, price, description, brand, color, image_path"
+
+
+def fetch_products_by_ids(db, product_ids, columns=PRODUCT_COLUMNS):
+    """
+    Fetch several products in a single round trip (WHERE id = ANY(%s))
+
+    Returns a dict {id: product} (price converted to float); callers restore
+    their own ordering. Missing ids are simply absent from the dict.
+    """
+    product_ids = list(dict.fromkeys(int(pid) for pid in product_ids))
+    if not product_ids or db is None:
+        return {}
+    rows = db.execute_query(f"SELECT {columns} FROM products WHERE id = ANY(%s)", (product_ids,))
+    products = {}
+    for row in rows or []:
+        product = dict(row)
+        if product.get('price') is not None:
+            product['price'] = float(product['price'])
+        products[product['id']] = product
+    return products
+
+
+class PoolTimeoutError(Exception):
+    """No pooled connection became available within the pool timeout"""
+
+
+class DatabasePool:
+    """
+    Thread-safe pool of read-only, autocommit PostgreSQL connections
+
+    Used by the Flask app: each query checks a connection out of a bounded
+    ThreadedConnectionPool and returns it right away, so concurrent requests no
+    longer share (and corrupt) one connection. Write scripts keep using
+    DatabaseConnection.
+    """
+
+    def __init__(
+        self, minconn=1, maxconn=10, timeout=5.0, healthcheck_interval=30.0, **connect_kwargs
+    ):
+        """
+        Args:
+            minconn: Connections opened when the pool is created
+            maxconn: Maximum number of connections
+            timeout: Max seconds to wait for a free connection
+            healthcheck_interval: Idle seconds after which a connection is pinged before use
+            connect_kwargs: psycopg2.connect arguments
+        """
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.connect_kwargs = connect_kwargs
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool raises as soon as it is exhausted: the semaphore
+        # turns that into a bounded wait
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'in_use': 0,
+            'wait_total_ms': 0.0,
+            'wait_max_ms': 0.0,
+            'timeouts': 0,
+            'reconnects': 0,
+            'errors': 0
+        }
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pg_pool.ThreadedConnectionPool(
+                        self.minconn, self.maxconn, **self.connect_kwargs
+                    )
+                    logger.info(
+                        f"Database pool created ({self.minconn}-{self.maxconn} connections)"
+                    )
+        return self._pool
+
+    def _count(self, name, value=1):
+        with self._stats_lock:
+            self._stats[name] += value
+
+    def _is_healthy(self, conn):
+        """Check a connection that sat idle for a while before handing it out"""
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0.0) < self.healthcheck_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self):
+        pool = self._get_pool()
+        conn = pool.getconn()
+        if not self._is_healthy(conn):
+            # Reconnect: drop the dead connection, the pool opens a new one
+            pool.putconn(conn, close=True)
+            self._count('reconnects')
+            conn = pool.getconn()
+        if not conn.autocommit:
+            conn.set_session(readonly=True, autocommit=True)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with-block
+
+        Raises:
+            PoolTimeoutError: if no connection frees up within self.timeout
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count('timeouts')
+            raise PoolTimeoutError(f"No database connection available after {self.timeout}s")
+
+        conn = None
+        broken = False
+        try:
+            conn = self._checkout()
+            wait_ms = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                self._stats['checkouts'] += 1
+                self._stats['in_use'] += 1
+                self._stats['wait_total_ms'] += wait_ms
+                self._stats['wait_max_ms'] = max(self._stats['wait_max_ms'], wait_ms)
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            if conn is not None:
+                self._count('in_use', -1)
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn, close=broken or bool(conn.closed))
+            self._slots.release()
+
+    def execute_query(self, query, params=None):
+        """
+        Execute a read query on a pooled connection
+
+        Same contract as DatabaseConnection.execute_query: rows as dicts, or
+        None on error. A query that fails because the connection dropped is
+        retried once on a fresh connection.
+        """
+        for attempt in range(2):
+            try:
+                with self.connection() as conn:
+                    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                        cursor.execute(query, params or ())
+                        return cursor.fetchall() if cursor.description else []
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                self._count('errors')
+                if attempt == 0:
+                    logger.warning(f"Database connection lost, retrying: {e}")
+                    self._count('reconnects')
+                    continue
+                logger.error(f"Query execution error: {e}")
+            except Exception as e:
+                self._count('errors')
+                logger.error(f"Query execution error: {e}")
+                return None
+        return None
+
+    def get_stats(self):
+        """Pool usage and wait-time metrics"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        checkouts = stats['checkouts']
+        stats['wait_avg_ms'] = round(stats['wait_total_ms'] / checkouts, 3) if checkouts else 0.0
+        stats['wait_total_ms'] = round(stats['wait_total_ms'], 3)
+        stats['wait_max_ms'] = round(stats['wait_max_ms'], 3)
+        stats['min_connections'] = self.minconn
+        stats['max_connections'] = self.maxconn
+        stats['timeout_s'] = self.timeout
+        return stats
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+
 # Singleton instance
 _db = None
+_db_lock = threading.Lock()
 
 def get_db():
+    """Return the shared connection pool (created on first use)"""
     global _db
     if _db is None:
-        _db = DatabaseConnection()
-        _db.connect()
+        with _db_lock:
+            if _db is None:
+                _db = DatabasePool(
+                    minconn=Config.DB_POOL_MIN,
+                    maxconn=Config.DB_POOL_MAX,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    healthcheck_interval=Config.DB_HEALTHCHECK_INTERVAL,
+                    host=Config.DB_HOST,
+                    port=Config.DB_PORT,
+                    database=Config.DB_NAME,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD
+                )
     return _db
@@ -3,12 +3,35 @@ Routes pour les produits
 """
 from flask import Blueprint, jsonify, request
 from models.database import get_db
+from services.catalog import get_catalog
+from services.similar_products import SimilarProductsTable
+from config import Config
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
 products_bp = Blueprint('products', __name__)
 
+# Table des produits similaires (chargée à la première requête)
+similar_products = SimilarProductsTable()
+_similar_products_lock = threading.Lock()
+
+
+def load_similar_products():
+    """
+    Charge la table des produits similaires si nécessaire
+    
+    is_loaded() peut être lu sans le verrou: la table n'est publiée qu'une fois
+    complète (index par product_id compris).
+    """
+    if similar_products.is_loaded():
+        return True
+    with _similar_products_lock:
+        if similar_products.is_loaded():
+            return True
+        return similar_products.load(Config.SIMILAR_PRODUCTS_PATH)
+
 
 @products_bp.route('/categories', methods=['GET'])
 def get_categories():
@@ -127,6 +150,13 @@ def get_product(product_id):
         JSON avec les détails du produit
     """
     try:
+        # Catalogue en mémoire, SQL seulement en cas de miss
+        catalog = get_catalog()
+        if catalog.ensure_fresh():
+            product = catalog.get(product_id)
+            if product is not None:
+                return jsonify(product), 200
+        
         db = get_db()
         query = """
             SELECT 
@@ -158,3 +188,53 @@ def get_product(product_id):
     except Exception as e:
         logger.error(f"Error fetching product {product_id}: {e}")
         return jsonify({'error': 'Erreur lors de la récupération du produit'}), 500
+
+
+@products_bp.route('/<int:product_id>/similar', methods=['GET'])
+def get_similar_products(product_id):
+    """
+    Retourne les produits similaires précalculés d'un produit du catalogue
+    (pas d'extraction de features ni de scan du catalogue)
+    
+    Query params:
+        - top_k (int, default=10): Nombre de résultats
+        - min_similarity (float, default=0.0): Similarité minimale
+    
+    Returns:
+        JSON avec liste de produits similaires
+    """
+    try:
+        top_k = min(max(request.args.get('top_k', 10, type=int), 1), 50)
+        min_similarity = request.args.get('min_similarity', 0.0, type=float)
+
+        if not load_similar_products():
+            return jsonify({
+                'error': 'Table des produits similaires non disponible. '
+                         'Exécutez scripts/build_similar_products.py'
+            }), 500
+
+        # Quelques voisins de plus pour compenser les produits exclus (test_screenshots)
+        neighbors = similar_products.get(product_id, top_k=top_k + 5, min_similarity=min_similarity)
+        if neighbors is None:
+            return jsonify({'error': 'Produit non trouvé'}), 404
+
+        catalog = get_catalog()
+        catalog.ensure_fresh()
+        products_by_id = catalog.fetch([n['product_id'] for n in neighbors])
+
+        # Restaurer l'ordre de similarité
+        results = []
+        for neighbor in neighbors:
+            product = products_by_id.get(neighbor['product_id'])
+            if product is None or product['category'] == 'test_screenshots':
+                continue
+            product['similarity_score'] = neighbor['similarity_score']
+            results.append(product)
+            if len(results) >= top_k:
+                break
+
+        return jsonify({'product_id': product_id, 'results': results, 'count': len(results)}), 200
+
+    except Exception as e:
+        logger.error(f"Error fetching similar products for {product_id}: {e}")
+        return jsonify({'error': 'Erreur lors de la récupération des produits similaires'}), 500
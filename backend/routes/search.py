@@ -2,13 +2,18 @@
 Routes de recherche (texte et image) - VERSION CORRIGÉE
 """
 from flask import Blueprint, jsonify, request
-from services.feature_extractor_resnet50 import ResNet50FeatureExtractor
 from services.search_engine_npy import SearchEngineNPY
-from services.preprocessing_simple import preprocess_from_bytes_simple
-from services.cache import get_cache
+from services.search_engine_faiss import SearchEngineFAISS
+from services.preprocessing_simple import open_image, preprocess_image_simple
+from services.cache import canonicalize, get_cache, hash_key
+from services.embedding_cache import get_embedding_cache
+from services.perceptual_hash import dhash, get_near_duplicate_cache, phash
 from models.database import get_db
+from services.catalog import get_catalog
+from config import Config
 import logging
 import hashlib
+import io
 from werkzeug.utils import secure_filename
 
 logger = logging.getLogger(__name__)
@@ -16,24 +21,81 @@ logger = logging.getLogger(__name__)
 search_bp = Blueprint('search', __name__)
 
 # Initialiser les services
-feature_extractor = ResNet50FeatureExtractor()
-search_engine = SearchEngineNPY()
+if Config.INFERENCE_BACKEND in ('onnx', 'tflite'):
+    from services.feature_extractor_runtime import RuntimeFeatureExtractor
+    feature_extractor = RuntimeFeatureExtractor(backend=Config.INFERENCE_BACKEND,
+                                                model_path=Config.INFERENCE_MODEL_PATH or None,
+                                                num_threads=Config.INFERENCE_THREADS,
+                                                quantized=Config.INFERENCE_INT8)
+else:
+    from services.feature_extractor_resnet50 import ResNet50FeatureExtractor
+    feature_extractor = ResNet50FeatureExtractor()
+    if Config.INFERENCE_COMPILED:
+        feature_extractor.enable_compiled_inference(max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+                                                    jit_compile=Config.INFERENCE_XLA,
+                                                    warmup=Config.INFERENCE_WARMUP)
+if Config.INFERENCE_BATCHING:
+    feature_extractor.enable_batching(max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+                                      max_wait_ms=Config.INFERENCE_MAX_WAIT_MS)
+if Config.SEARCH_BACKEND == 'faiss':
+    search_engine = SearchEngineFAISS(nprobe=Config.FAISS_NPROBE)
+else:
+    search_engine = SearchEngineNPY(ann_params={
+        'ivf': {'nlist': Config.IVF_NLIST, 'nprobe': Config.IVF_NPROBE},
+        'hnsw': {
+            'M': Config.HNSW_M,
+            'ef_construction': Config.HNSW_EF_CONSTRUCTION,
+            'ef_search': Config.HNSW_EF_SEARCH
+        },
+        'pq': {'m': Config.PQ_M, 'nbits': Config.PQ_NBITS}
+    }, rerank=Config.ANN_RERANK)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16 MB
 
+# Catégories jamais retournées par la recherche
+EXCLUDED_CATEGORIES = ('test_screenshots',)
+
+# Version du catalogue utilisée pour les bitmaps de filtres de search_engine
+_attributes_catalog_version = None
+# Version du catalogue utilisée pour les images préchargées du cache d'embeddings
+_embeddings_catalog_version = None
+
+
+class SearchError(Exception):
+    """Erreur de recherche renvoyée au client avec son code HTTP"""
+    
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
 def load_search_index():
-    """Charge l'index de recherche depuis les fichiers .npy"""
+    """Charge l'index de recherche (fichiers .npy ou index FAISS selon SEARCH_BACKEND)"""
     if not search_engine.is_index_ready():
         logger.info("Chargement de l'index de recherche...")
         try:
-            success = search_engine.load_features_from_npy()
+            if isinstance(search_engine, SearchEngineFAISS):
+                success = search_engine.load_index(Config.FAISS_INDEX_PATH)
+            else:
+                success = search_engine.load_features_from_npy(mmap=Config.FEATURES_MMAP)
+                if success:
+                    # Index ANN précalculés (scripts/build_ann_index.py), puis ceux de
+                    # ANN_PREBUILD qui manquent: aucune construction pendant une requête
+                    loaded = search_engine.load_ann_indexes()
+                    for method in Config.ANN_PREBUILD:
+                        if method not in loaded:
+                            logger.info(f"Construction de l'index ANN '{method}'...")
+                            search_engine.build_ann_index(method)
             if success:
+                # Catalogue chargé ici plutôt que par la première requête qui le lit
+                get_catalog().start()
+                load_filter_attributes()
                 logger.info("Index chargé avec succès")
                 return True
             else:
@@ -45,6 +107,435 @@ def load_search_index():
     return True
 
 
+def parse_similarity_params():
+    """
+    Lit les paramètres communs aux recherches par similarité (image ou produit)
+    
+    Returns:
+        dict des paramètres, ou None si la méthode demandée est invalide
+    """
+    top_k = min(request.args.get('top_k', 10, type=int), 50)
+    # Par défaut: min_similarity = 0.5 (50%) pour n'afficher que les résultats vraiment similaires
+    min_similarity = request.args.get('min_similarity', 0.5, type=float)
+    search_method = request.args.get('method', 'cosine', type=str)
+    if search_method not in search_engine.search_methods:
+        return None
+    
+    # Paramètres ANN optionnels (nprobe pour 'ivf'/FAISS IVF, ef pour 'hnsw',
+    # rerank pour 'pq'/'fp16'/'sq8': nombre de candidats re-classés en cosinus exact)
+    ann_params = {}
+    nprobe = request.args.get('nprobe', None, type=int)
+    ef = request.args.get('ef', None, type=int)
+    rerank = request.args.get('rerank', None, type=int)
+    if nprobe is not None and nprobe > 0:
+        ann_params['nprobe'] = nprobe
+    if ef is not None and ef > 0:
+        ann_params['ef'] = ef
+    if rerank is not None and rerank >= 0:
+        ann_params['rerank'] = min(rerank, 1000)
+    
+    # Filtres avancés
+    filters = {
+        'category': request.args.get('category', None),
+        'min_price': request.args.get('min_price', None, type=float),
+        'max_price': request.args.get('max_price', None, type=float),
+        'brand': request.args.get('brand', None),
+        'color': request.args.get('color', None)
+    }
+    
+    return {
+        'top_k': top_k,
+        'min_similarity': min_similarity,
+        'method': search_method,
+        'ann_params': ann_params,
+        'filters': filters
+    }
+
+
+FILTER_NAMES = ('category', 'min_price', 'max_price', 'brand', 'color')
+
+
+def similarity_cache_key(prefix, identifier, params):
+    """
+    Clé de cache d'une recherche par similarité (chemin chaud: tuple des
+    paramètres dans un ordre fixe, sans passer par _generate_key)
+    
+    Args:
+        prefix: Type de recherche ('search_image', 'search_product')
+        identifier: MD5 de l'image ou id du produit
+        params: Paramètres retournés par parse_similarity_params
+    """
+    filters = params['filters']
+    return hash_key(prefix, (
+        identifier,
+        params['top_k'],
+        canonicalize(params['min_similarity']),
+        params['method'],
+        tuple(sorted(params['ann_params'].items())),
+        tuple(canonicalize(filters[name]) for name in FILTER_NAMES)
+    ))
+
+
+def require_search_method(method):
+    """
+    Vérifie que l'index ANN de la méthode a été chargé ou construit au démarrage
+    
+    Raises:
+        SearchError: 503 si l'index n'a pas été préconstruit
+    """
+    if not search_engine.is_method_available(method):
+        raise SearchError(
+            f"Method '{method}' not available: ANN index not prebuilt "
+            f"(run scripts/build_ann_index.py or set ANN_PREBUILD)",
+            503,
+        )
+
+
+def invalid_method_response():
+    return (
+        jsonify({'error': f'Invalid method. Allowed: {", ".join(search_engine.search_methods)}'}),
+        400,
+    )
+
+
+def search_with_mask(query_features, params, mask):
+    """
+    Recherche exacte vis-à-vis des filtres: le masque est appliqué avant le top-k,
+    ce qui garantit top_k résultats dès que le catalogue filtré en contient assez
+    
+    Comme la recherche historique, les résultats sont restreints à la catégorie
+    du top-1 (sauf si l'utilisateur a choisi une catégorie).
+    """
+    search_kwargs = {
+        'min_similarity': params['min_similarity'],
+        'method': params['method'],
+        **params['ann_params']
+    }
+    similar_products = search_engine.search_similar(
+        query_features, top_k=params['top_k'], mask=mask, **search_kwargs
+    )
+    if not similar_products or params['filters']['category']:
+        return similar_products
+    
+    top_category = search_engine.get_product_category(similar_products[0]['product_id'])
+    if top_category is None:
+        return similar_products
+    logger.info(f"Catégorie du top-1 résultat: {top_category}")
+    
+    # Un seul scan si tous les résultats sont déjà dans la catégorie du top-1
+    if all(
+        search_engine.get_product_category(p['product_id']) == top_category
+        for p in similar_products
+    ):
+        return similar_products
+    mask = mask & search_engine.build_filter_mask(category=top_category)
+    return search_engine.search_similar(
+        query_features, top_k=params['top_k'], mask=mask, **search_kwargs
+    )
+
+
+def find_similar_products(query_features, params, exclude_product_id=None):
+    """
+    Recherche les produits similaires puis les filtre et les complète depuis la DB
+    
+    Args:
+        query_features: Vecteur de features de la requête (non normalisé ou normalisé)
+        params: Paramètres retournés par parse_similarity_params
+        exclude_product_id: Produit à exclure des résultats (recherche par produit)
+    
+    Returns:
+        Liste des produits (détails DB + similarity_score), au plus top_k
+    """
+    top_k = params['top_k']
+    min_similarity = params['min_similarity']
+    filters = params['filters']
+    
+    # Filtres appliqués sous forme de masque avant le top-k (bitmaps d'attributs)
+    load_filter_attributes()
+    exclude_product_ids = () if exclude_product_id is None else (exclude_product_id,)
+    mask = search_engine.build_filter_mask(
+        exclude_product_ids=exclude_product_ids,
+        exclude_categories=EXCLUDED_CATEGORIES,
+        **filters
+    )
+    if mask is not None:
+        similar_products = search_with_mask(query_features, params, mask)
+        logger.info(f"Recherche filtrée: {len(similar_products)} produits trouvés "
+                    f"({int(mask.sum())} produits retenus par les filtres)")
+        return hydrate_products(similar_products, top_k, {}, use_top_category=False)
+    
+    # Pas d'attributs (backend FAISS): chercher beaucoup plus de résultats pour
+    # compenser le filtrage des screenshots et des filtres SQL
+    search_top_k = min(top_k * 5, 200)  # Chercher 5x plus (max 200)
+    if exclude_product_id is not None:
+        search_top_k += 1
+    similar_products = search_engine.search_similar(
+        query_features,
+        top_k=search_top_k,
+        min_similarity=min_similarity,
+        method=params['method'],
+        **params['ann_params']
+    )
+    if exclude_product_id is not None:
+        similar_products = [p for p in similar_products if p['product_id'] != exclude_product_id]
+    
+    logger.info(
+        f"Recherche: {len(similar_products)} produits trouvés "
+        f"(cherché {search_top_k} avec min_similarity={min_similarity})"
+    )
+    
+    if len(similar_products) == 0:
+        logger.warning("Aucun produit similaire trouvé par search_engine!")
+        logger.warning(f"  top_k demandé: {top_k}, min_similarity: {min_similarity}")
+        logger.warning(
+            "  Cela peut indiquer que min_similarity est trop élevé "
+            "ou que les features ne sont pas compatibles"
+        )
+    
+    return hydrate_products(similar_products, top_k, filters)
+
+
+def matches_filters(product, filters):
+    """Applique les filtres utilisateur à une ligne produit (mêmes règles que le SQL historique)"""
+    if filters.get('category') and product['category'] != filters['category']:
+        return False
+    price = product.get('price')
+    if filters.get('min_price') is not None and (price is None or price < filters['min_price']):
+        return False
+    if filters.get('max_price') is not None and (price is None or price > filters['max_price']):
+        return False
+    for field in ('brand', 'color'):
+        if filters.get(field) and (product.get(field) or '').lower() != filters[field].lower():
+            return False
+    return True
+
+
+def hydrate_products(similar_products, top_k, filters, use_top_category=True):
+    """
+    Complète les produits similaires avec leurs détails depuis la DB
+    
+    Les candidats sont lus dans le catalogue en mémoire (une seule requête
+    WHERE id = ANY(%s) pour les absents); l'ordre de similarité, la catégorie
+    du top-1 et les filtres sont appliqués en Python.
+    
+    Args:
+        similar_products: Résultats de search_engine.search_similar
+        top_k: Nombre maximum de résultats
+        filters: Filtres utilisateur à appliquer ({} si déjà appliqués par masque)
+        use_top_category: Restreindre à la catégorie du top-1 résultat
+    
+    Returns:
+        Liste des produits (détails DB + similarity_score), au plus top_k
+    """
+    catalog = get_catalog()
+    catalog.ensure_fresh()
+    products_by_id = catalog.fetch([item['product_id'] for item in similar_products])
+    results = []
+    skipped_count = 0
+    
+    # Déterminer la catégorie du top-1 résultat pour filtrer par catégorie
+    top_category = None
+    if use_top_category and len(similar_products) > 0:
+        first_product = products_by_id.get(int(similar_products[0]['product_id']))
+        if first_product and first_product['category'] not in EXCLUDED_CATEGORIES:
+            top_category = first_product['category']
+            logger.info(f"Catégorie du top-1 résultat: {top_category}")
+    
+    for item in similar_products:
+        if len(results) >= top_k:
+            break
+        
+        product_id = int(item['product_id'])
+        similarity_score = float(item['similarity_score'])
+        product = products_by_id.get(product_id)
+        
+        # Exclure automatiquement les screenshots de test
+        # Si on a une catégorie du top-1, filtrer par cette catégorie pour avoir des résultats
+        # cohérents
+        if (product is None
+                or product['category'] in EXCLUDED_CATEGORIES
+                or (top_category and product['category'] != top_category)
+                or not matches_filters(product, filters)):
+            skipped_count += 1
+            logger.debug(
+                f"Produit {product_id} non trouvé dans la DB ou exclu par filtres "
+                f"(similarité: {similarity_score:.4f})"
+            )
+            continue
+        
+        results.append({
+            'id': product['id'],
+            'name': product['name'],
+            'category': product['category'],
+            'price': product['price'],
+            'description': product.get('description', ''),
+            'brand': product.get('brand'),
+            'color': product.get('color'),
+            'image_path': product['image_path'],
+            'similarity_score': similarity_score
+        })
+    
+    if skipped_count > 0:
+        logger.warning(
+            f"{skipped_count} produits similaires ont été ignorés "
+            "(non trouvés dans DB ou exclus par filtres)"
+        )
+    
+    logger.info(
+        f"Recherche terminée: {len(results)} résultat(s) sur "
+        f"{len(similar_products)} produits similaires trouvés"
+    )
+    
+    if len(results) == 0 and len(similar_products) > 0:
+        logger.warning(
+            f"ATTENTION: {len(similar_products)} produits similaires trouvés "
+            "mais 0 résultats retournés!"
+        )
+        logger.warning("  Cela peut être dû à:")
+        logger.warning("  - Les product_ids ne correspondent pas aux IDs dans la base de données")
+        logger.warning("  - Tous les produits sont des screenshots (exclus)")
+        logger.warning("  - Les filtres utilisateur sont trop stricts")
+        first_id = similar_products[0]['product_id'] if similar_products else 'N/A'
+        logger.warning(f"  Premier product_id trouvé: {first_id}")
+    
+    return results
+
+
+def load_filter_attributes():
+    """
+    Construit les attributs filtrables (catégorie, marque, couleur, prix) à partir
+    du catalogue en mémoire, et les reconstruit quand le catalogue a été rafraîchi
+    """
+    global _attributes_catalog_version
+    if not isinstance(search_engine, SearchEngineNPY) or not search_engine.is_index_ready():
+        return
+    catalog = get_catalog()
+    if not catalog.ensure_fresh():
+        if _attributes_catalog_version is None:
+            logger.warning("Catalogue indisponible, filtres basés sur products.json")
+        return
+    if catalog.version != _attributes_catalog_version:
+        search_engine.load_attributes(catalog.records())
+        _attributes_catalog_version = catalog.version
+
+
+def load_catalog_embeddings():
+    """
+    Enregistre les image_hash du catalogue dans le cache d'embeddings (une image
+    du catalogue réutilise son vecteur de l'index au lieu de passer par le modèle)
+    """
+    global _embeddings_catalog_version
+    catalog = get_catalog()
+    if not catalog.ensure_fresh() or catalog.version == _embeddings_catalog_version:
+        return
+    get_embedding_cache().preload_catalog(catalog.image_hashes(), search_engine.get_feature_vector)
+    _embeddings_catalog_version = catalog.version
+
+
+def run_image_search(file_bytes, image_hash, filename, file_size, params):
+    """
+    Calcule le résultat de /api/search/image
+    
+    N'accède pas à request: peut être exécuté par le cache pour le compte de
+    plusieurs requêtes (single-flight) ou recalculé en arrière-plan.
+    
+    Raises:
+        SearchError: Erreur renvoyée au client
+    """
+    # 6. Charger l'index si nécessaire
+    if not search_engine.is_index_ready():
+        success = load_search_index()
+        if not success:
+            raise SearchError('Search index not available', 500)
+    require_search_method(params['method'])
+    
+    # 7. Embedding déjà connu (même image recherchée avec d'autres paramètres,
+    # ou image du catalogue): pas de preprocessing ni d'inférence
+    embedding_cache = get_embedding_cache()
+    load_catalog_embeddings()
+    query_features = embedding_cache.get(image_hash)
+    embedding_source = 'cache'
+    
+    if query_features is None:
+        # 8. Décoder l'image (décodage réduit des JPEG)
+        try:
+            pil_image = open_image(io.BytesIO(file_bytes))
+        except Exception as e:
+            logger.error(f"Erreur preprocessing: {e}")
+            raise SearchError(f'Preprocessing failed: {str(e)}', 400)
+        
+        # 9. Quasi-doublon d'une requête récente (photo ré-enregistrée, recompressée...)
+        near_duplicates = get_near_duplicate_cache()
+        match = None
+        if near_duplicates.max_entries:
+            phash_value, dhash_value = phash(pil_image), dhash(pil_image)
+            match = near_duplicates.find(phash_value, dhash_value)
+        
+        if match is not None:
+            embedding_source = 'near_duplicate'
+            query_features = match['embedding']
+            logger.info(
+                f"Quasi-doublon de l'image {match['image_hash'][:8]} (distance {match['distance']})"
+            )
+            # Résultats déjà calculés pour l'image d'origine avec les mêmes paramètres
+            cache = get_cache()
+            original_key = similarity_cache_key('search_image', match['image_hash'], params)
+            original_result = cache.get(original_key)
+            if original_result is not None:
+                result = dict(original_result)
+                result['query_info'] = dict(original_result['query_info'],
+                                            filename=filename,
+                                            file_size=file_size,
+                                            embedding_source=embedding_source)
+                return result
+        else:
+            embedding_source = 'model'
+            try:
+                preprocessed_image = preprocess_image_simple(pil_image)
+            except Exception as e:
+                logger.error(f"Erreur preprocessing: {e}")
+                raise SearchError(f'Preprocessing failed: {str(e)}', 400)
+            
+            # Vérifier que le modèle est chargé
+            if not feature_extractor.is_model_loaded():
+                raise SearchError('Model not available', 500)
+            
+            # Extraire les features (SANS normalisation)
+            # search_engine normalise la requête (le catalogue est normalisé au chargement)
+            try:
+                query_features = feature_extractor.extract_features(
+                    preprocessed_image,
+                    normalize=False  # Pas de normalisation - search_engine normalise la requête
+                )
+                logger.info(f"Features extraites : shape={query_features.shape}")
+            except Exception as e:
+                logger.error(f"Erreur extraction: {e}")
+                raise SearchError(f'Feature extraction failed: {str(e)}', 500)
+            if near_duplicates.max_entries:
+                near_duplicates.add(image_hash, phash_value, dhash_value, query_features)
+        embedding_cache.put(image_hash, query_features)
+    
+    # 10. Rechercher les produits similaires et récupérer les détails depuis la DB
+    results = find_similar_products(query_features, params)
+    
+    # 11. Résultat
+    return {
+        'results': results,
+        'count': len(results),
+        'query_info': {
+            'filename': filename,
+            'file_size': file_size,
+            'top_k': params['top_k'],
+            'min_similarity': params['min_similarity'],
+            'method': params['method'],
+            'ann_params': params['ann_params'],
+            'embedding_source': embedding_source,
+            'results_count': len(results)
+        },
+        'success': True
+    }
+
+
 @search_bp.route('/image', methods=['POST'])
 def search_image():
     """
@@ -75,199 +566,98 @@ def search_image():
         image_hash = hashlib.md5(file_bytes).hexdigest()
         
         # 4. Récupérer les paramètres
-        top_k = min(request.args.get('top_k', 10, type=int), 50)
-        # Par défaut: min_similarity = 0.5 (50%) pour n'afficher que les résultats vraiment similaires
-        min_similarity = request.args.get('min_similarity', 0.5, type=float)
-        search_method = request.args.get('method', 'cosine', type=str)
+        params = parse_similarity_params()
+        if params is None:
+            return invalid_method_response()
         
-        # Filtres avancés
-        filter_category = request.args.get('category', None)
-        filter_min_price = request.args.get('min_price', None, type=float)
-        filter_max_price = request.args.get('max_price', None, type=float)
-        filter_brand = request.args.get('brand', None)
-        filter_color = request.args.get('color', None)
-        
-        # 5. Vérifier le cache
+        # 5. Résultat en cache, ou calculé une seule fois pour toutes les requêtes
+        # simultanées sur la même image avec les mêmes paramètres
         cache = get_cache()
-        cache_key_data = {
-            'image_hash': image_hash,
-            'top_k': top_k,
-            'min_similarity': min_similarity,
-            'method': search_method,
-            'category': filter_category,
-            'min_price': filter_min_price,
-            'max_price': filter_max_price,
-            'brand': filter_brand,
-            'color': filter_color
-        }
-        cache_key = cache._generate_key('search_image', **cache_key_data)
-        
-        cached_result = cache.get(cache_key)
-        if cached_result is not None:
-            logger.info(f"Cache hit pour image {image_hash[:8]}")
-            return jsonify(cached_result), 200
-        
-        # 6. Préprocesser l'image
-        try:
-            preprocessed_image = preprocess_from_bytes_simple(file_bytes)
-        except Exception as e:
-            logger.error(f"Erreur preprocessing: {e}")
-            return jsonify({'error': f'Preprocessing failed: {str(e)}'}), 400
-        
-        # 7. Vérifier que le modèle est chargé
-        if not feature_extractor.is_model_loaded():
-            return jsonify({'error': 'Model not available'}), 500
-        
-        # 8. Extraire les features (SANS normalisation)
-        # cosine_similarity normalise automatiquement, donc pas besoin de normaliser avant
+        cache_key = similarity_cache_key('search_image', image_hash, params)
+        filename = secure_filename(file.filename)
         try:
-            query_features = feature_extractor.extract_features(
-                preprocessed_image,
-                normalize=False  # Pas de normalisation - cosine_similarity normalise automatiquement
+            result = cache.get_or_compute(
+                cache_key,
+                lambda: run_image_search(file_bytes, image_hash, filename, file_size, params),
+                ttl=3600,
+                stale_ttl=Config.CACHE_STALE_TTL
             )
-            logger.info(f"Features extraites : shape={query_features.shape}")
-        except Exception as e:
-            logger.error(f"Erreur extraction: {e}")
-            return jsonify({'error': f'Feature extraction failed: {str(e)}'}), 500
-        
-        # 9. Charger l'index si nécessaire
-        if not search_engine.is_index_ready():
-            success = load_search_index()
-            if not success:
-                return jsonify({'error': 'Search index not available'}), 500
-        
-        # 10. Rechercher les produits similaires
-        # Chercher beaucoup plus de résultats pour compenser le filtrage des screenshots
-        # et s'assurer d'avoir assez de résultats après filtrage
-        search_top_k = min(top_k * 5, 200)  # Chercher 5x plus (max 200)
-        similar_products = search_engine.search_similar(
-            query_features,
-            top_k=search_top_k,
-            min_similarity=min_similarity,
-            method=search_method
-        )
-        
-        logger.info(f"Recherche: {len(similar_products)} produits trouvés (cherché {search_top_k} avec min_similarity={min_similarity})")
-        
-        if len(similar_products) == 0:
-            logger.warning("Aucun produit similaire trouvé par search_engine!")
-            logger.warning(f"  top_k demandé: {top_k}, min_similarity: {min_similarity}")
-            logger.warning("  Cela peut indiquer que min_similarity est trop élevé ou que les features ne sont pas compatibles")
+        except SearchError as e:
+            return jsonify({'error': e.message}), e.status
         
-        # 11. Récupérer les détails depuis la DB
-        db = get_db()
-        results = []
-        skipped_count = 0
-        
-        # Déterminer la catégorie du top-1 résultat pour filtrer par catégorie
-        top_category = None
-        if len(similar_products) > 0:
-            first_product_id = int(similar_products[0]['product_id'])
-            first_query = "SELECT category FROM products WHERE id = %s"
-            first_result = db.execute_query(first_query, (first_product_id,))
-            if first_result and first_result[0]['category'] != 'test_screenshots':
-                top_category = first_result[0]['category']
-                logger.info(f"Catégorie du top-1 résultat: {top_category}")
-        
-        for item in similar_products:
-            if len(results) >= top_k:
-                break
-            
-            product_id = int(item['product_id'])
-            similarity_score = float(item['similarity_score'])
-            
-            # Exclure automatiquement les screenshots de test
-            # Si on a une catégorie du top-1, filtrer par cette catégorie pour avoir des résultats cohérents
-            if top_category:
-                query = """
-                    SELECT id, name, category, price, description, brand, color, image_path 
-                    FROM products 
-                    WHERE id = %s AND category = %s AND category != 'test_screenshots'
-                """
-                query_params = [product_id, top_category]
-            else:
-                query = """
-                    SELECT id, name, category, price, description, brand, color, image_path 
-                    FROM products 
-                    WHERE id = %s AND category != 'test_screenshots'
-                """
-                query_params = [product_id]
-            
-            # Ajouter les filtres SEULEMENT si demandés par l'utilisateur
-            filter_conditions = []
-            if filter_category:
-                filter_conditions.append("category = %s")
-                query_params.append(filter_category)
-            if filter_min_price is not None:
-                filter_conditions.append("price >= %s")
-                query_params.append(filter_min_price)
-            if filter_max_price is not None:
-                filter_conditions.append("price <= %s")
-                query_params.append(filter_max_price)
-            if filter_brand:
-                filter_conditions.append("LOWER(brand) = LOWER(%s)")
-                query_params.append(filter_brand)
-            if filter_color:
-                filter_conditions.append("LOWER(color) = LOWER(%s)")
-                query_params.append(filter_color)
-            
-            if filter_conditions:
-                query += " AND " + " AND ".join(filter_conditions)
-            
-            product_data = db.execute_query(query, tuple(query_params))
-            
-            if product_data and len(product_data) > 0:
-                product = product_data[0]
-                results.append({
-                    'id': product['id'],
-                    'name': product['name'],
-                    'category': product['category'],
-                    'price': float(product['price']),
-                    'description': product.get('description', ''),
-                    'brand': product.get('brand'),
-                    'color': product.get('color'),
-                    'image_path': product['image_path'],
-                    'similarity_score': similarity_score
-                })
-            else:
-                skipped_count += 1
-                logger.debug(f"Produit {product_id} non trouvé dans la DB ou exclu par filtres (similarité: {similarity_score:.4f})")
-        
-        if skipped_count > 0:
-            logger.warning(f"{skipped_count} produits similaires ont été ignorés (non trouvés dans DB ou exclus par filtres)")
-        
-        # 12. Retourner les résultats
-        result = {
-            'results': results,
-            'count': len(results),
-            'query_info': {
-                'filename': secure_filename(file.filename),
-                'file_size': file_size,
-                'top_k': top_k,
-                'min_similarity': min_similarity,
-                'method': search_method,
-                'results_count': len(results)
-            },
-            'success': True
-        }
-        
-        # Mettre en cache
-        cache.set(cache_key, result, ttl=3600)
+        return jsonify(result), 200
         
-        logger.info(f"Recherche terminée: {len(results)} résultat(s) sur {len(similar_products)} produits similaires trouvés")
+    except Exception as e:
+        logger.error(f"Erreur recherche image: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Internal error: {str(e)}', 'success': False}), 500
+
+
+def run_product_search(product_id, params):
+    """
+    Calcule le résultat de /api/search/product/<id> (sans accès à request)
+    
+    Raises:
+        SearchError: Erreur renvoyée au client
+    """
+    if not search_engine.is_index_ready():
+        success = load_search_index()
+        if not success:
+            raise SearchError('Search index not available', 500)
+    require_search_method(params['method'])
+    
+    query_features = search_engine.get_feature_vector(product_id)
+    if query_features is None:
+        raise SearchError('Product not indexed', 404)
+    
+    results = find_similar_products(query_features, params, exclude_product_id=product_id)
+    
+    return {
+        'results': results,
+        'count': len(results),
+        'query_info': {
+            'product_id': product_id,
+            'top_k': params['top_k'],
+            'min_similarity': params['min_similarity'],
+            'method': params['method'],
+            'ann_params': params['ann_params'],
+            'results_count': len(results)
+        },
+        'success': True
+    }
+
+
+@search_bp.route('/product/<int:product_id>', methods=['GET'])
+def search_by_product(product_id):
+    """
+    Recherche "plus comme celui-ci" à partir d'un produit du catalogue
+    
+    Le vecteur du produit est lu dans l'index (pas de décodage d'image ni
+    d'extraction de features); filtres et récupération DB identiques à search_image.
+    Même query params que /image; le produit lui-même est exclu des résultats.
+    """
+    try:
+        params = parse_similarity_params()
+        if params is None:
+            return invalid_method_response()
         
-        if len(results) == 0 and len(similar_products) > 0:
-            logger.warning(f"ATTENTION: {len(similar_products)} produits similaires trouvés mais 0 résultats retournés!")
-            logger.warning("  Cela peut être dû à:")
-            logger.warning("  - Les product_ids ne correspondent pas aux IDs dans la base de données")
-            logger.warning("  - Tous les produits sont des screenshots (exclus)")
-            logger.warning("  - Les filtres utilisateur sont trop stricts")
-            logger.warning(f"  Premier product_id trouvé: {similar_products[0]['product_id'] if similar_products else 'N/A'}")
+        cache = get_cache()
+        cache_key = similarity_cache_key('search_product', product_id, params)
+        try:
+            result = cache.get_or_compute(
+                cache_key,
+                lambda: run_product_search(product_id, params),
+                ttl=3600,
+                stale_ttl=Config.CACHE_STALE_TTL
+            )
+        except SearchError as e:
+            return jsonify({'error': e.message, 'success': False}), e.status
         
         return jsonify(result), 200
         
     except Exception as e:
-        logger.error(f"Erreur recherche image: {e}")
+        logger.error(f"Erreur recherche par produit {product_id}: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'Internal error: {str(e)}', 'success': False}), 500
@@ -293,6 +683,29 @@ def search_text():
         filter_brand = request.args.get('brand', None)
         filter_color = request.args.get('color', None)
         
+        # Catalogue en mémoire si disponible (pas d'aller-retour DB)
+        catalog = get_catalog()
+        if catalog.ensure_fresh():
+            results = catalog.search_text(
+                query, limit=limit, category=filter_category,
+                min_price=filter_min_price, max_price=filter_max_price,
+                brand=filter_brand, color=filter_color,
+                exclude_categories=EXCLUDED_CATEGORIES
+            )
+            results = [
+                {field: product[field] for field in (
+                    'id', 'name', 'category', 'price', 'description', 'brand', 'color', 'image_path'
+                )}
+                for product in results
+            ]
+            logger.info(f"Recherche texte '{query}' (catalogue): {len(results)} résultat(s)")
+            return jsonify({
+                'results': results,
+                'count': len(results),
+                'query': query,
+                'success': True
+            }), 200
+        
         # Construire la requête SQL
         db = get_db()
         
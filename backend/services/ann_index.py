@@ -0,0 +1,539 @@
+"""
+Index de recherche approximative des plus proches voisins (ANN)
+Implémentations NumPy utilisées par SearchEngineNPY quand le catalogue devient
+trop grand pour un scan exhaustif:
+- IVFIndex: quantificateur grossier k-means + listes inversées (paramètre nprobe)
+- HNSWIndex: graphe Hierarchical Navigable Small World (paramètre ef)
+
+Tous les index travaillent sur des vecteurs normalisés L2: le score retourné est
+le produit scalaire, c'est-à-dire la similarité cosinus.
+
+La construction est coûteuse (k-means, insertion dans le graphe): elle se fait hors
+ligne (scripts/build_ann_index.py) et l'index est sauvegardé à côté du fichier de
+features (<nom>_<index>_<partie>.npy), rechargé par load_from() au démarrage.
+"""
+import heapq
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def top_k_indices(scores: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Retourne les indices des k meilleurs scores, triés par score décroissant
+
+    np.argpartition sélectionne les k gagnants en O(N), seuls ces k
+    éléments sont ensuite triés (au lieu d'un argsort complet en O(N log N)).
+    Si mask (booléen, même taille que scores) est fourni, seuls les indices
+    retenus par le masque peuvent être sélectionnés.
+    """
+    if mask is not None:
+        rows = np.flatnonzero(mask)
+        return rows[top_k_indices(scores[rows], k)]
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def batch_top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Version 2D de top_k_indices: top-k de chaque ligne d'une matrice de scores
+
+    Returns:
+        np.ndarray: Indices (n_rows, min(k, n_cols)) triés par score décroissant
+    """
+    n_cols = scores.shape[1]
+    k = min(k, n_cols)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < n_cols:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_cols), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def kmeans(vectors: np.ndarray, n_clusters: int, n_iter: int = 20,
+           sample_size: Optional[int] = None, seed: int = 0,
+           spherical: bool = True) -> np.ndarray:
+    """
+    K-means (Lloyd) sur un échantillon des vecteurs
+
+    Args:
+        vectors: Matrice (N, d)
+        n_clusters: Nombre de centroïdes
+        n_iter: Nombre d'itérations
+        sample_size: Taille de l'échantillon d'entraînement (None = tous les vecteurs)
+        seed: Graine aléatoire
+        spherical: Si True, centroïdes normalisés L2 et affectation par produit
+                   scalaire (adapté à la similarité cosinus)
+
+    Returns:
+        np.ndarray: Centroïdes (n_clusters, d) en float32
+    """
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    if sample_size is not None and n > sample_size:
+        sample = np.asarray(
+            vectors[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32
+        )
+    else:
+        sample = np.asarray(vectors, dtype=np.float32)
+    n_clusters = max(1, min(n_clusters, sample.shape[0]))
+
+    centroids = sample[rng.choice(sample.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = assign_to_centroids(sample, centroids, spherical=spherical)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+
+        # Cluster vide: réinitialiser sur un point aléatoire
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()))]
+            counts[empty] = 1
+        centroids = sums / counts[:, None]
+        if spherical:
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = centroids / norms
+
+    return np.ascontiguousarray(centroids, dtype=np.float32)
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray,
+                        spherical: bool = True, block_size: int = 65536) -> np.ndarray:
+    """Affecte chaque vecteur à son centroïde le plus proche (par blocs)"""
+    assignments = np.empty(vectors.shape[0], dtype=np.int64)
+    if not spherical:
+        centroid_norms = (centroids ** 2).sum(axis=1)
+    for start in range(0, vectors.shape[0], block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        scores = block @ centroids.T
+        if not spherical:
+            # argmin ||x - c||² = argmax (2 x.c - ||c||²)
+            scores = 2 * scores - centroid_norms
+        assignments[start:start + block_size] = np.argmax(scores, axis=1)
+    return assignments
+
+
+def save_array_atomic(path: Path, array: np.ndarray) -> None:
+    """np.save dans un fichier temporaire puis os.replace"""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp_path, path)
+
+
+class ANNIndex:
+    """
+    Interface commune des index ANN
+
+    Les vecteurs passés à build() doivent être normalisés L2; search() retourne
+    les indices de lignes (dans la matrice d'origine) et les scores cosinus.
+    Si exact_scores est False (index compressés), les scores sont approximatifs
+    et doivent être re-calculés sur les vecteurs float32 (re-ranking).
+    """
+
+    name = 'base'
+    exact_scores = True
+    # Parties du format précalculé (<features>_<name><partie>.npy), vide = non persistant
+    file_parts: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self.ntotal = 0
+
+    def is_built(self) -> bool:
+        """Vérifie si l'index est construit"""
+        return self.ntotal > 0
+
+    def build(self, vectors: np.ndarray) -> 'ANNIndex':
+        """Construit l'index à partir d'une matrice (N, d) normalisée"""
+        raise NotImplementedError
+
+    def search(self, query: np.ndarray, top_k: int, mask: Optional[np.ndarray] = None,
+               **params) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche les top_k plus proches voisins d'une requête normalisée (d,)
+
+        Args:
+            mask: Masque booléen (N,) des lignes autorisées (filtres), None = toutes
+
+        Returns:
+            Tuple (indices, scores) triés par score décroissant
+        """
+        raise NotImplementedError
+
+    def memory_usage(self) -> int:
+        """Mémoire (octets) des structures propres à l'index, hors vecteurs partagés"""
+        return 0
+
+    def code_size(self) -> Optional[int]:
+        """Octets stockés par vecteur pour les index compressés (None = vecteurs float32)"""
+        return None
+
+    def file_paths(self, features_path) -> Tuple[Path, ...]:
+        """Fichiers du format précalculé, à côté du fichier de features"""
+        features_path = Path(features_path)
+        return tuple(
+            features_path.with_name(f"{features_path.stem}_{self.name}{part}.npy")
+            for part in self.file_parts
+        )
+
+    def _arrays(self) -> Tuple[np.ndarray, ...]:
+        """Tableaux écrits par save(), dans l'ordre de file_parts"""
+        raise NotImplementedError
+
+    def _load(self, arrays: Tuple[np.ndarray, ...], vectors: Optional[np.ndarray]) -> bool:
+        """Restaure l'index à partir des tableaux de save(); False s'ils sont incompatibles"""
+        raise NotImplementedError
+
+    def save(self, features_path) -> Tuple[Path, ...]:
+        """Écrit l'index construit (écriture atomique, chargeable en memory-map)"""
+        paths = self.file_paths(features_path)
+        if not paths:
+            raise NotImplementedError(f"L'index {self.name} n'a pas de format précalculé")
+        for path, array in zip(paths, self._arrays()):
+            save_array_atomic(path, array)
+        return paths
+
+    def load_from(self, features_path, vectors: Optional[np.ndarray] = None) -> bool:
+        """
+        Charge le format précalculé s'il existe et n'est pas plus ancien que les features
+
+        Args:
+            features_path: Fichier de features à côté duquel l'index a été sauvegardé
+            vectors: Matrice normalisée (N, d) lue par les index non compressés (IVF, HNSW)
+
+        Returns:
+            bool: True si l'index a été chargé (sinon il doit être construit)
+        """
+        features_path = Path(features_path)
+        paths = self.file_paths(features_path)
+        if not paths or not all(
+            p.exists() and p.stat().st_mtime >= features_path.stat().st_mtime for p in paths
+        ):
+            return False
+        if not self._load(tuple(np.load(p, mmap_mode='r') for p in paths), vectors):
+            logger.warning(f"Index {self.name} précalculé incompatible avec le catalogue "
+                           f"ou les paramètres, ignoré: {paths[0]}")
+            return False
+        logger.info(f"Index {self.name} chargé depuis {paths[0]}")
+        return True
+
+
+class IVFIndex(ANNIndex):
+    """
+    Index IVF (inverted file)
+
+    Un k-means partitionne le catalogue en nlist cellules; une requête ne scanne
+    que les nprobe cellules dont le centroïde est le plus proche.
+    """
+
+    name = 'ivf'
+    file_parts = ('_centroids', '_lists', '_offsets')
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8,
+                 n_iter: int = 20, seed: int = 0):
+        """
+        Args:
+            nlist: Nombre de cellules (None = 4 * sqrt(N))
+            nprobe: Nombre de cellules scannées par défaut à la recherche
+            n_iter: Itérations du k-means
+            seed: Graine aléatoire
+        """
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids = None
+        self._vectors = None
+        self._list_ids = None
+        self._list_offsets = None
+
+    def build(self, vectors: np.ndarray) -> 'IVFIndex':
+        n = vectors.shape[0]
+        nlist = self.nlist or int(4 * math.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        # 256 points par centroïde suffisent pour entraîner le quantificateur grossier
+        self.centroids = kmeans(vectors, nlist, n_iter=self.n_iter,
+                                sample_size=256 * nlist, seed=self.seed)
+        self.nlist = self.centroids.shape[0]
+
+        # Listes inversées stockées à plat: ids triés par cellule + offsets
+        assignments = assign_to_centroids(vectors, self.centroids)
+        self._list_ids = np.argsort(assignments, kind='stable')
+        self._list_offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=self.nlist), out=self._list_offsets[1:])
+
+        self._vectors = vectors
+        self.ntotal = n
+        logger.info(f"Index IVF construit: {n} vecteurs, {self.nlist} cellules")
+        return self
+
+    def _probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Retourne les ids des vecteurs des nprobe cellules les plus proches"""
+        cells = top_k_indices(self.centroids @ query, min(nprobe, self.nlist))
+        return np.concatenate([
+            self._list_ids[self._list_offsets[c]:self._list_offsets[c + 1]] for c in cells
+        ])
+
+    def search(self, query: np.ndarray, top_k: int, mask: Optional[np.ndarray] = None,
+               nprobe: Optional[int] = None, **params) -> Tuple[np.ndarray, np.ndarray]:
+        candidates = self._probe(query, nprobe or self.nprobe)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        scores = self._vectors[candidates] @ query
+        best = top_k_indices(scores, top_k)
+        return candidates[best], scores[best]
+
+    def memory_usage(self) -> int:
+        return self.centroids.nbytes + self._list_ids.nbytes + self._list_offsets.nbytes
+
+    def _arrays(self) -> Tuple[np.ndarray, ...]:
+        return self.centroids, self._list_ids, self._list_offsets
+
+    def _load(self, arrays: Tuple[np.ndarray, ...], vectors: Optional[np.ndarray]) -> bool:
+        centroids, list_ids, list_offsets = arrays
+        if vectors is None or len(list_ids) != vectors.shape[0]:
+            return False
+        if self.nlist is not None and self.nlist != centroids.shape[0]:
+            return False
+        self.centroids = np.asarray(centroids)
+        self.nlist = self.centroids.shape[0]
+        self._list_ids = list_ids
+        self._list_offsets = np.asarray(list_offsets)
+        self._vectors = vectors
+        self.ntotal = vectors.shape[0]
+        return True
+
+
+class HNSWIndex(ANNIndex):
+    """
+    Index HNSW (Hierarchical Navigable Small World)
+
+    Graphe de proximité multi-niveaux: la recherche descend gloutonnement les
+    niveaux supérieurs puis explore le niveau 0 avec une liste de taille ef.
+    """
+
+    name = 'hnsw'
+    # meta = [M, ef_construction, point d'entrée, nombre de noeuds par niveau...];
+    # chaque niveau est stocké à plat: noeuds triés, offsets et voisins concaténés
+    file_parts = ('_meta', '_nodes', '_offsets', '_links')
+
+    def __init__(self, M: int = 16, ef_construction: int = 100, ef_search: int = 50,
+                 seed: int = 0):
+        """
+        Args:
+            M: Nombre de voisins par noeud (2*M au niveau 0)
+            ef_construction: Taille de la liste de candidats à la construction
+            ef_search: Taille de la liste de candidats par défaut à la recherche
+            seed: Graine aléatoire (tirage des niveaux)
+        """
+        super().__init__()
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.seed = seed
+        self._level_mult = 1 / math.log(max(M, 2))
+        self._vectors = None
+        self._graph: List[Dict[int, np.ndarray]] = []
+        self._entry_point = None
+        self._max_level = -1
+
+    def _max_neighbors(self, level: int) -> int:
+        return 2 * self.M if level == 0 else self.M
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[int], ef: int,
+                      level: int, mask: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+        """
+        Recherche gloutonne sur un niveau du graphe
+
+        Avec un masque, le parcours traverse tous les noeuds (le graphe reste
+        connexe) mais seuls les noeuds autorisés entrent dans les résultats.
+
+        Returns:
+            Liste de (score, noeud) des ef meilleurs noeuds trouvés
+        """
+        graph = self._graph[level]
+        visited = set(entry_points)
+        entry_scores = self._vectors[entry_points] @ query
+
+        candidates = [(-float(s), p) for s, p in zip(entry_scores, entry_points)]  # max-heap
+        results = [(float(s), p) for s, p in zip(entry_scores, entry_points)       # min-heap
+                   if mask is None or mask[p]]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_score, node = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_score < results[0][0]:
+                break
+
+            neighbors = [n for n in graph.get(node, ()) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+
+            # Scores des voisins non visités calculés en un seul produit matriciel
+            neighbor_scores = self._vectors[neighbors] @ query
+            for score, neighbor in zip(neighbor_scores.tolist(), neighbors):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    if mask is None or mask[neighbor]:
+                        heapq.heappush(results, (score, neighbor))
+                        if len(results) > ef:
+                            heapq.heappop(results)
+
+        return results
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """
+        Heuristique de sélection des voisins HNSW
+
+        Un candidat n'est gardé que s'il est plus proche de la requête que de tous
+        les voisins déjà retenus, ce qui préserve la connectivité entre clusters.
+        """
+        ordered = sorted(candidates, reverse=True)
+        if len(ordered) <= m:
+            return [node for _, node in ordered]
+
+        nodes = [node for _, node in ordered]
+        pairwise = self._vectors[nodes] @ self._vectors[nodes].T
+        selected, pruned = [], []
+        for i, (score, node) in enumerate(ordered):
+            if len(selected) >= m:
+                break
+            if all(pairwise[i, j] < score for j in selected):
+                selected.append(i)
+            else:
+                pruned.append(i)
+        # Compléter avec les meilleurs candidats écartés
+        selected.extend(pruned[:m - len(selected)])
+        return [nodes[i] for i in selected]
+
+    def _connect(self, node: int, neighbors: List[int], level: int) -> None:
+        graph = self._graph[level]
+        graph[node] = np.array(neighbors, dtype=np.int64)
+        max_neighbors = self._max_neighbors(level)
+        for neighbor in neighbors:
+            links = np.append(graph.get(neighbor, np.empty(0, dtype=np.int64)), node)
+            if len(links) > max_neighbors:
+                # Élaguer: garder les voisins les plus proches
+                scores = self._vectors[links] @ self._vectors[neighbor]
+                links = links[top_k_indices(scores, max_neighbors)]
+            graph[neighbor] = links
+
+    def build(self, vectors: np.ndarray) -> 'HNSWIndex':
+        rng = np.random.default_rng(self.seed)
+        self._vectors = vectors
+        self._graph = []
+        self._entry_point = None
+        self._max_level = -1
+
+        n = vectors.shape[0]
+        levels = np.floor(-np.log(1.0 - rng.random(n)) * self._level_mult).astype(int)
+        for node in range(n):
+            self._insert(node, int(levels[node]))
+
+        self.ntotal = n
+        logger.info(f"Index HNSW construit: {n} vecteurs, {self._max_level + 1} niveaux")
+        return self
+
+    def _insert(self, node: int, level: int) -> None:
+        while len(self._graph) <= level:
+            self._graph.append({})
+
+        if self._entry_point is None:
+            for lvl in range(level + 1):
+                self._graph[lvl][node] = np.empty(0, dtype=np.int64)
+            self._entry_point = node
+            self._max_level = level
+            return
+
+        query = self._vectors[node]
+        entry_points = [self._entry_point]
+        for lvl in range(self._max_level, level, -1):
+            best = max(self._search_layer(query, entry_points, 1, lvl))
+            entry_points = [best[1]]
+
+        for lvl in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, entry_points, self.ef_construction, lvl)
+            self._connect(node, self._select_neighbors(candidates, self.M), lvl)
+            entry_points = [n for _, n in candidates]
+
+        for lvl in range(self._max_level + 1, level + 1):
+            self._graph[lvl][node] = np.empty(0, dtype=np.int64)
+        if level > self._max_level:
+            self._max_level = level
+            self._entry_point = node
+
+    def search(self, query: np.ndarray, top_k: int, mask: Optional[np.ndarray] = None,
+               ef: Optional[int] = None, **params) -> Tuple[np.ndarray, np.ndarray]:
+        ef = max(ef or self.ef_search, top_k)
+        entry_points = [self._entry_point]
+        for lvl in range(self._max_level, 0, -1):
+            best = max(self._search_layer(query, entry_points, 1, lvl))
+            entry_points = [best[1]]
+
+        candidates = self._search_layer(query, entry_points, ef, 0, mask=mask)
+        results = sorted(candidates, reverse=True)[:top_k]
+        indices = np.array([node for _, node in results], dtype=np.int64)
+        scores = np.array([score for score, _ in results], dtype=np.float32)
+        return indices, scores
+
+    def memory_usage(self) -> int:
+        return sum(links.nbytes for level in self._graph for links in level.values())
+
+    def _arrays(self) -> Tuple[np.ndarray, ...]:
+        nodes = [sorted(level) for level in self._graph]
+        links = [self._graph[lvl][node] for lvl, level in enumerate(nodes) for node in level]
+        offsets = np.zeros(len(links) + 1, dtype=np.int64)
+        np.cumsum([len(node_links) for node_links in links], out=offsets[1:])
+        meta = [self.M, self.ef_construction, self._entry_point] + [len(level) for level in nodes]
+        return (
+            np.array(meta, dtype=np.int64),
+            np.array([node for level in nodes for node in level], dtype=np.int64),
+            offsets,
+            np.concatenate(links).astype(np.int64),
+        )
+
+    def _load(self, arrays: Tuple[np.ndarray, ...], vectors: Optional[np.ndarray]) -> bool:
+        meta, nodes, offsets, links = (np.asarray(array) for array in arrays)
+        M, ef_construction, entry_point = (int(value) for value in meta[:3])
+        level_sizes = meta[3:].tolist()
+        if vectors is None or not level_sizes or level_sizes[0] != vectors.shape[0]:
+            return False
+        if (M, ef_construction) != (self.M, self.ef_construction):
+            return False
+
+        nodes, offsets = nodes.tolist(), offsets.tolist()
+        self._graph = []
+        start = 0
+        for size in level_sizes:
+            self._graph.append({
+                nodes[i]: links[offsets[i]:offsets[i + 1]] for i in range(start, start + size)
+            })
+            start += size
+        self._vectors = vectors
+        self._entry_point = entry_point
+        self._max_level = len(level_sizes) - 1
+        self.ntotal = vectors.shape[0]
+        return True
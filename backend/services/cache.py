@@ -1,32 +1,177 @@
 """
 Service de cache en mémoire pour optimiser les performances
+Avec CACHE_SHARED_PATH, le cache de chaque worker (L1) est complété par un
+fichier SQLite commun aux workers de la machine (L2, voir services/shared_cache.py).
 """
 import hashlib
-import json
+import os
+import sys
 import time
 import logging
-from typing import Optional, Dict, Any
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, List
 from functools import wraps
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Taille mémoire approximative (octets) d'une valeur en cache
+    
+    Parcourt récursivement dicts, listes et tuples (résultats de recherche JSON);
+    les tableaux NumPy comptent pour leur buffer.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+    if isinstance(value, dict):
+        size += sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v, _depth + 1) for v in value)
+    return size
+
+
+# Décimales conservées pour les floats des clés (0.1 + 0.2 et 0.3 partagent une entrée)
+KEY_FLOAT_DIGITS = 6
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    Forme canonique (hashable, repr stable) d'un paramètre de clé de cache
+    
+    Floats arrondis à KEY_FLOAT_DIGITS décimales (entiers si ronds: 1.0 -> 1),
+    scalaires NumPy convertis, dicts triés sans les valeurs None (un filtre
+    absent et un filtre à None donnent la même clé), listes -> tuples.
+    """
+    cls = type(value)
+    if cls is str or cls is int or cls is bool or value is None:
+        return value
+    if cls is float or isinstance(value, np.floating):
+        value = round(float(value), KEY_FLOAT_DIGITS)
+        return int(value) if value.is_integer() else value
+    if cls is dict:
+        return tuple(sorted([(str(k), canonicalize(v)) for k, v in value.items() if v is not None]))
+    if cls is tuple or cls is list:
+        return tuple([canonicalize(v) for v in value])
+    if isinstance(value, (str, bool)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, dict):
+        return canonicalize(dict(value))
+    if isinstance(value, (list, tuple)):
+        return canonicalize(list(value))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((canonicalize(v) for v in value), key=repr))
+    return str(value)
+
+
+def hash_key(prefix: str, parts: tuple) -> str:
+    """
+    Clé "prefix:digest" d'un tuple de paramètres déjà canoniques
+    (BLAKE2b 64 bits du repr: pas de json.dumps ni de dict intermédiaire)
+    """
+    return f"{prefix}:{hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()}"
+
+
+class FrequencySketch:
+    """
+    Count-Min Sketch à compteurs 8 bits (fréquence approximative des clés)
+    
+    Les compteurs sont divisés par 2 tous les sample_size accès: la fréquence
+    reflète la popularité récente (vieillissement de TinyLFU).
+    """
+    
+    DEPTH = 4
+    
+    def __init__(self, width: int, sample_size: int):
+        self.width = max(64, width)
+        self.sample_size = max(1, sample_size)
+        self._table = np.zeros((self.DEPTH, self.width), dtype=np.uint8)
+        self._seeds = [0x9E3779B1 * (i + 1) for i in range(self.DEPTH)]
+        self._additions = 0
+    
+    def _indexes(self, key: str):
+        # Bits de poids fort du produit (hachage multiplicatif): les bits de
+        # poids faible ne dépendent que des bits faibles de la clé et
+        # donneraient la même colonne sur toutes les lignes
+        h = hash(key)
+        return [((((h ^ seed) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % self.width
+                for seed in self._seeds]
+    
+    def increment(self, key: str) -> None:
+        for row, col in enumerate(self._indexes(key)):
+            if self._table[row, col] < 255:
+                self._table[row, col] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._table >>= 1
+            self._additions //= 2
+    
+    def frequency(self, key: str) -> int:
+        return int(min(self._table[row, col] for row, col in enumerate(self._indexes(key))))
+
+
 class MemoryCache:
     """
-    Cache en mémoire simple avec expiration automatique
+    Cache en mémoire avec expiration automatique, borné en entrées et en octets
+    
+    Éviction LRU; avec admission='tinylfu', une nouvelle clé n'entre que si elle
+    a été demandée plus souvent que l'entrée qu'elle évincerait (les clés vues
+    une seule fois ne chassent pas les résultats populaires). Un thread de fond
+    supprime périodiquement les entrées expirées.
+    
+    Toutes les opérations (et les compteurs) sont protégées par un verrou;
+    get_or_compute ajoute le single-flight par clé et le stale-while-revalidate.
     """
     
-    def __init__(self, default_ttl: int = 3600):
+    def __init__(self, default_ttl: int = 3600, max_entries: int = 10000,
+                 max_bytes: int = 128 * 1024 * 1024, admission: str = 'lru'):
         """
         Initialise le cache
         
         Args:
             default_ttl: Time to live par défaut en secondes (1 heure par défaut)
+            max_entries: Nombre maximum d'entrées
+            max_bytes: Taille maximale estimée (octets)
+            admission: 'lru' (toute nouvelle entrée est admise) ou 'tinylfu'
         """
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        if admission not in ('lru', 'tinylfu'):
+            raise ValueError(f"Politique d'admission inconnue: {admission}")
+        self.cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
         self.default_ttl = default_ttl
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.admission = admission
+        self._sketch = (
+            FrequencySketch(width=4 * self.max_entries, sample_size=10 * self.max_entries)
+            if admission == 'tinylfu'
+            else None
+        )
+        self._lock = threading.RLock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_pid = None
+        self.bytes_used = 0
         self.hits = 0
         self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejections = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+        self.refresh_errors = 0
+        # Calculs en cours par clé (single-flight): Future partagé par les requêtes en attente
+        self._inflight: Dict[str, Future] = {}
+        self._clear_listeners: List[Callable[[], None]] = []
     
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """
@@ -38,17 +183,13 @@ class MemoryCache:
             **kwargs: Arguments nommés
         
         Returns:
-            Clé de cache (hash)
+            Clé de cache "prefix:hash" (invalidable par préfixe)
         """
-        # Créer une représentation string des arguments
-        key_data = {
-            'prefix': prefix,
-            'args': args,
-            'kwargs': sorted(kwargs.items()) if kwargs else {}
-        }
-        key_string = json.dumps(key_data, sort_keys=True, default=str)
-        # Générer un hash MD5
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return hash_key(prefix, (canonicalize(args), canonicalize(kwargs)))
+    
+    def _remove(self, key: str) -> None:
+        entry = self.cache.pop(key)
+        self.bytes_used -= entry['size']
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -60,23 +201,29 @@ class MemoryCache:
         Returns:
             Valeur en cache ou None si expirée/inexistante
         """
-        if key not in self.cache:
-            self.misses += 1
-            return None
-        
-        entry = self.cache[key]
-        
-        # Vérifier l'expiration
-        if time.time() > entry['expires_at']:
-            del self.cache[key]
-            self.misses += 1
-            return None
-        
-        self.hits += 1
+        with self._lock:
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            entry = self.cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            # Vérifier l'expiration (une entrée encore "stale" est gardée pour get_or_compute)
+            now = time.time()
+            if now > entry['expires_at']:
+                if now > entry['stale_until']:
+                    self._remove(key)
+                    self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self.cache.move_to_end(key)
+            self.hits += 1
         logger.debug(f"Cache hit: {key}")
         return entry['value']
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: float = 0) -> None:
         """
         Stocke une valeur dans le cache
         
@@ -84,28 +231,208 @@ class MemoryCache:
             key: Clé de cache
             value: Valeur à stocker
             ttl: Time to live en secondes (None = utiliser default_ttl)
+            stale_ttl: Secondes après expiration pendant lesquelles get_or_compute
+                peut encore servir la valeur en la recalculant en arrière-plan
         """
         if ttl is None:
             ttl = self.default_ttl
         
-        self.cache[key] = {
-            'value': value,
-            'expires_at': time.time() + ttl,
-            'created_at': time.time()
-        }
-        logger.debug(f"Cache set: {key} (TTL: {ttl}s)")
+        size = estimate_size(value) + sys.getsizeof(key)
+        if size > self.max_bytes:
+            logger.debug(f"Cache set ignoré: {key} ({size} octets > max_bytes)")
+            with self._lock:
+                # L'ancienne valeur ne doit plus être servie
+                if key in self.cache:
+                    self._remove(key)
+                self.rejections += 1
+            return
+        
+        now = time.time()
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+            elif not self._admit(key, size):
+                self.rejections += 1
+                return
+            
+            self.cache[key] = {
+                'value': value,
+                'expires_at': now + ttl,
+                'stale_until': now + ttl + stale_ttl,
+                'created_at': now,
+                'size': size
+            }
+            self.bytes_used += size
+            self._evict()
+        logger.debug(f"Cache set: {key} (TTL: {ttl}s, {size} octets)")
+    
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[int] = None,
+                       stale_ttl: float = 0) -> Any:
+        """
+        Retourne la valeur en cache, ou la calcule une seule fois par clé
+        
+        Si N requêtes manquent la même clé en même temps, la première exécute
+        compute() et les autres attendent son résultat (ou son exception). Avec
+        stale_ttl > 0, une valeur expirée depuis moins de stale_ttl secondes est
+        servie immédiatement pendant qu'un thread de fond la recalcule.
+        
+        Args:
+            key: Clé de cache
+            compute: Fonction sans argument qui calcule la valeur (None = non mise en cache)
+            ttl: Time to live en secondes (None = utiliser default_ttl)
+            stale_ttl: Fenêtre stale-while-revalidate en secondes (0 = désactivée)
+        
+        Returns:
+            Valeur en cache ou calculée
+        """
+        with self._lock:
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            entry = self.cache.get(key)
+            now = time.time()
+            if entry is not None and now <= entry['expires_at']:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return entry['value']
+            
+            flight = self._inflight.get(key)
+            if entry is not None and now <= entry['stale_until']:
+                self.hits += 1
+                self.stale_hits += 1
+                if flight is None:
+                    flight = self._inflight[key] = Future()
+                    threading.Thread(
+                        target=self._refresh,
+                        args=(key, flight, compute, ttl, stale_ttl),
+                        name='cache-revalidate',
+                        daemon=True,
+                    ).start()
+                return entry['value']
+            
+            self.misses += 1
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            return flight.result()
+        return self._compute_flight(key, flight, compute, ttl, stale_ttl)
+    
+    def _compute_flight(self, key: str, flight: Future, compute: Callable[[], Any],
+                        ttl: Optional[int], stale_ttl: float) -> Any:
+        """Exécute compute() pour les requêtes en attente sur la clé"""
+        try:
+            value = self._load(key, compute, ttl, stale_ttl)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        flight.set_result(value)
+        return value
     
-    def delete(self, key: str) -> None:
-        """Supprime une entrée du cache"""
-        if key in self.cache:
-            del self.cache[key]
-            logger.debug(f"Cache delete: {key}")
+    def _load(
+        self, key: str, compute: Callable[[], Any], ttl: Optional[int], stale_ttl: float
+    ) -> Any:
+        """Calcule la valeur manquante et la met en cache"""
+        value = compute()
+        if value is not None:
+            self.set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+        return value
+    
+    def _refresh(self, key: str, flight: Future, compute: Callable[[], Any],
+                 ttl: Optional[int], stale_ttl: float) -> None:
+        """Recalcul en arrière-plan d'une valeur servie périmée"""
+        try:
+            self._compute_flight(key, flight, compute, ttl, stale_ttl)
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+            logger.warning(f"Échec du recalcul en arrière-plan de {key}: {e}")
+    
+    def _admit(self, key: str, size: int) -> bool:
+        """TinyLFU: admet la clé si elle est plus fréquente que les victimes qu'elle évincerait"""
+        if self._sketch is None:
+            return True
+        if len(self.cache) < self.max_entries and self.bytes_used + size <= self.max_bytes:
+            return True
+        candidate_frequency = self._sketch.frequency(key)
+        freed_entries, freed_bytes = 0, 0
+        for victim, entry in self.cache.items():
+            if (
+                len(self.cache) - freed_entries < self.max_entries
+                and self.bytes_used - freed_bytes + size <= self.max_bytes
+            ):
+                break
+            if self._sketch.frequency(victim) >= candidate_frequency:
+                return False
+            freed_entries += 1
+            freed_bytes += entry['size']
+        return True
+    
+    def _evict(self) -> None:
+        """Évince les entrées les moins récemment utilisées jusqu'à respecter les bornes"""
+        while self.cache and (
+            len(self.cache) > self.max_entries or self.bytes_used > self.max_bytes
+        ):
+            key, entry = self.cache.popitem(last=False)
+            self.bytes_used -= entry['size']
+            self.evictions += 1
+    
+    def delete(self, key: str) -> bool:
+        """
+        Supprime une entrée du cache
+        
+        Returns:
+            True si la clé était en cache
+        """
+        with self._lock:
+            if key not in self.cache:
+                return False
+            self._remove(key)
+        logger.debug(f"Cache delete: {key}")
+        return True
+    
+    def invalidate(self, prefix: str) -> int:
+        """
+        Supprime les entrées dont la clé commence par prefix (ex: 'search_image:')
+        
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        with self._lock:
+            keys = [key for key in self.cache if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+        logger.info(f"Cache invalidé: {len(keys)} entrées '{prefix}*'")
+        return len(keys)
+    
+    def add_clear_listener(self, callback: Callable[[], None]) -> None:
+        """Enregistre une fonction appelée à chaque vidage du cache (caches dérivés)"""
+        self._clear_listeners.append(callback)
     
     def clear(self) -> None:
         """Vide tout le cache"""
-        self.cache.clear()
-        self.hits = 0
-        self.misses = 0
+        with self._lock:
+            self.cache.clear()
+            self.bytes_used = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+            self.rejections = 0
+            self.coalesced = 0
+            self.stale_hits = 0
+            self.refresh_errors = 0
+        for callback in self._clear_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Erreur lors du vidage d'un cache dérivé: {e}")
         logger.info("Cache cleared")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -113,18 +440,30 @@ class MemoryCache:
         Retourne les statistiques du cache
         
         Returns:
-            Dictionnaire avec hits, misses, hit_rate, size
+            Dictionnaire avec hits, misses, hit_rate, size, évictions et octets utilisés
         """
-        total = self.hits + self.misses
-        hit_rate = (self.hits / total * 100) if total > 0 else 0
-        
-        return {
-            'hits': self.hits,
-            'misses': self.misses,
-            'hit_rate': round(hit_rate, 2),
-            'size': len(self.cache),
-            'total_requests': total
-        }
+        with self._lock:
+            total = self.hits + self.misses
+            hit_rate = (self.hits / total * 100) if total > 0 else 0
+            
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(hit_rate, 2),
+                'size': len(self.cache),
+                'total_requests': total,
+                'max_entries': self.max_entries,
+                'bytes_used': self.bytes_used,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'rejections': self.rejections,
+                'coalesced': self.coalesced,
+                'stale_hits': self.stale_hits,
+                'refresh_errors': self.refresh_errors,
+                'in_flight': len(self._inflight),
+                'admission': self.admission
+            }
     
     def cleanup_expired(self) -> int:
         """
@@ -134,18 +473,177 @@ class MemoryCache:
             Nombre d'entrées supprimées
         """
         now = time.time()
-        expired_keys = [
-            key for key, entry in self.cache.items()
-            if now > entry['expires_at']
-        ]
-        
-        for key in expired_keys:
-            del self.cache[key]
+        with self._lock:
+            expired_keys = [
+                key for key, entry in self.cache.items()
+                if now > entry['stale_until']
+            ]
+            
+            for key in expired_keys:
+                self._remove(key)
+            self.expirations += len(expired_keys)
         
         if expired_keys:
             logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
         
         return len(expired_keys)
+    
+    def start_sweeper(self, interval: float = 60.0) -> None:
+        """
+        Démarre le thread de fond qui appelle cleanup_expired toutes les
+        interval secondes (redémarré après un fork de worker gunicorn)
+        """
+        if interval <= 0:
+            return
+        if (
+            self._sweeper is not None
+            and self._sweeper.is_alive()
+            and self._sweeper_pid == os.getpid()
+        ):
+            return
+        
+        def sweep():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.cleanup_expired()
+                except Exception as e:
+                    logger.error(f"Erreur lors du nettoyage du cache: {e}")
+        
+        self._sweeper = threading.Thread(target=sweep, name='cache-sweeper', daemon=True)
+        self._sweeper_pid = os.getpid()
+        self._sweeper.start()
+
+
+class TieredCache(MemoryCache):
+    """
+    MemoryCache du worker (L1) devant un SharedCache commun aux workers (L2)
+    
+    Un miss L1 est cherché dans le L2 avant d'être calculé; une valeur calculée
+    est écrite dans les deux niveaux. clear, delete et invalidate sont
+    journalisés dans le L2: chaque worker les rejoue sur son L1 au plus
+    sync_interval secondes plus tard, et y publie ses statistiques.
+    """
+    
+    def __init__(self, shared, sync_interval: float = 1.0, **kwargs):
+        """
+        Args:
+            shared: Instance SharedCache (L2)
+            sync_interval: Secondes entre deux lectures du journal d'invalidations
+            **kwargs: Paramètres du MemoryCache L1
+        """
+        super().__init__(**kwargs)
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self._last_invalidation = shared.last_invalidation_id()
+        self._last_sync = time.monotonic()
+        self._sync_lock = threading.Lock()
+    
+    def _sync(self, force: bool = False) -> None:
+        """Rejoue les invalidations des autres workers et publie les stats du L1"""
+        if not force and time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=force):
+            return
+        try:
+            self._last_sync = time.monotonic()
+            invalidations = self.shared.invalidations_since(self._last_invalidation)
+            for invalidation_id, prefix, exact, origin in invalidations:
+                self._last_invalidation = invalidation_id
+                if origin == self.shared.origin:
+                    continue
+                if exact:
+                    super().delete(prefix)
+                elif prefix:
+                    super().invalidate(prefix)
+                else:
+                    super().clear()
+            stats = super().get_stats()
+            self.shared.publish(
+                {name: stats[name] for name in ('hits', 'misses', 'size', 'bytes_used')}
+            )
+        finally:
+            self._sync_lock.release()
+    
+    def _load_shared(self, key: str) -> Optional[Any]:
+        """Copie dans le L1 une entrée valide du L2 (avec son expiration restante)"""
+        entry = self.shared.get_entry(key)
+        if entry is None:
+            return None
+        value, expires_at, stale_until = entry
+        super().set(
+            key, value, ttl=max(0.0, expires_at - time.time()), stale_ttl=stale_until - expires_at
+        )
+        return value
+    
+    def get(self, key: str) -> Optional[Any]:
+        self._sync()
+        value = super().get(key)
+        if value is None:
+            value = self._load_shared(key)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: float = 0) -> None:
+        super().set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+        self.shared.set(
+            key, value, ttl=self.default_ttl if ttl is None else ttl, stale_ttl=stale_ttl
+        )
+    
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[int] = None,
+                       stale_ttl: float = 0) -> Any:
+        self._sync()
+        return super().get_or_compute(key, compute, ttl=ttl, stale_ttl=stale_ttl)
+    
+    def _load(
+        self, key: str, compute: Callable[[], Any], ttl: Optional[int], stale_ttl: float
+    ) -> Any:
+        """Miss L1: valeur calculée par un autre worker si elle est dans le L2"""
+        value = self._load_shared(key)
+        if value is not None:
+            return value
+        return super()._load(key, compute, ttl, stale_ttl)
+    
+    def delete(self, key: str) -> bool:
+        """Supprime la clé exacte du L2 et du L1 de tous les workers"""
+        removed = super().delete(key)
+        return self.shared.delete(key) or removed
+    
+    def invalidate(self, prefix: str) -> int:
+        """Invalide le préfixe dans le L2 et dans le L1 de tous les workers"""
+        removed = super().invalidate(prefix)
+        return max(removed, self.shared.invalidate(prefix))
+    
+    def clear(self) -> None:
+        """Vide le L2 et le L1 de tous les workers"""
+        super().clear()
+        self.shared.invalidate('')
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du L1 de ce worker, plus 'shared' (L2), 'workers' (L1 de
+        chaque worker actif) et 'cluster' (hit rate tous niveaux, tous workers)
+        """
+        self._sync(force=True)
+        stats = super().get_stats()
+        shared = self.shared.get_stats()
+        workers = self.shared.worker_stats()
+        requests = sum(w['hits'] + w['misses'] for w in workers)
+        hits = sum(w['hits'] for w in workers) + shared.get('hits', 0)
+        stats['shared'] = shared
+        stats['workers'] = workers
+        stats['cluster'] = {
+            'workers': len(workers),
+            'requests': requests,
+            'hits': hits,
+            'hit_rate': round(min(hits, requests) / requests * 100, 2) if requests else 0
+        }
+        return stats
+    
+    def cleanup_expired(self) -> int:
+        removed = super().cleanup_expired()
+        self.shared.cleanup_expired()
+        self._sync(force=True)
+        return removed
 
 
 # Instance globale du cache
@@ -157,21 +655,45 @@ def get_cache() -> MemoryCache:
     Retourne l'instance globale du cache (Singleton)
     
     Returns:
-        Instance MemoryCache
+        Instance MemoryCache (TieredCache si CACHE_SHARED_PATH est défini)
     """
     global _cache_instance
+    from config import Config
     if _cache_instance is None:
-        _cache_instance = MemoryCache(default_ttl=3600)  # 1 heure par défaut
+        options = dict(
+            default_ttl=3600,  # 1 heure par défaut
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            max_bytes=Config.CACHE_MAX_MB * 1024 * 1024,
+            admission=Config.CACHE_ADMISSION
+        )
+        shared = None
+        if Config.CACHE_SHARED_PATH:
+            from services.shared_cache import SharedCache
+            try:
+                shared = SharedCache(Config.CACHE_SHARED_PATH,
+                                     max_bytes=Config.CACHE_SHARED_MAX_MB * 1024 * 1024)
+            except PermissionError as e:
+                logger.error(f"Cache partagé désactivé: {e}")
+        if shared is not None:
+            _cache_instance = TieredCache(
+                shared, sync_interval=Config.CACHE_SYNC_INTERVAL, **options
+            )
+            logger.info(f"Cache partagé entre workers: {Config.CACHE_SHARED_PATH}")
+        else:
+            _cache_instance = MemoryCache(**options)
+    _cache_instance.start_sweeper(Config.CACHE_SWEEP_INTERVAL)
     return _cache_instance
 
 
-def cached(prefix: str = "default", ttl: int = 3600):
+def cached(prefix: str = "default", ttl: int = 3600, stale_ttl: float = 0):
     """
     Décorateur pour mettre en cache le résultat d'une fonction
+    (calculé une seule fois par clé, voir MemoryCache.get_or_compute)
     
     Args:
         prefix: Préfixe pour le type de cache
         ttl: Time to live en secondes
+        stale_ttl: Fenêtre stale-while-revalidate en secondes (0 = désactivée)
     
     Exemple:
         @cached(prefix="search", ttl=1800)
@@ -183,19 +705,9 @@ def cached(prefix: str = "default", ttl: int = 3600):
         def wrapper(*args, **kwargs):
             cache = get_cache()
             key = cache._generate_key(prefix, *args, **kwargs)
-            
-            # Essayer de récupérer depuis le cache
-            cached_value = cache.get(key)
-            if cached_value is not None:
-                return cached_value
-            
-            # Exécuter la fonction
-            result = func(*args, **kwargs)
-            
-            # Mettre en cache le résultat
-            cache.set(key, result, ttl=ttl)
-            
-            return result
+            return cache.get_or_compute(
+                key, lambda: func(*args, **kwargs), ttl=ttl, stale_ttl=stale_ttl
+            )
         
         return wrapper
     return decorator
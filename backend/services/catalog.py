@@ -0,0 +1,375 @@
+"""
+Catalogue produits en mémoire (snapshot colonnaire de la table products)
+Chargé au démarrage à côté de SearchEngineNPY et rafraîchi de façon incrémentale
+via la colonne updated_at par un thread de fond: l'hydratation des résultats de
+recherche, la recherche texte et /api/products/<id> ne passent plus par PostgreSQL
+(sauf en cas de miss) et une requête ne construit jamais de snapshot
+"""
+import numpy as np
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.database import fetch_products_by_ids, get_db
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLUMNS = ('id', 'name', 'category', 'price', 'description', 'brand', 'color',
+                   'image_path', 'image_hash', 'created_at', 'updated_at')
+# Colonnes conservées dans le snapshot mais absentes des produits retournés par l'API
+INTERNAL_COLUMNS = ('image_hash',)
+
+# Colonnes de la recherche texte, dans l'ordre de priorité du tri (comme le CASE SQL)
+TEXT_SEARCH_COLUMNS = ('name', 'description', 'category', 'brand')
+TEXT_RANK_COLUMNS = ('name', 'category', 'brand')
+
+
+class CatalogSnapshot:
+    """
+    Version immuable du catalogue: une colonne NumPy par champ, alignées par ligne
+
+    Un rafraîchissement construit un nouveau snapshot puis le publie en une seule
+    affectation: les lecteurs concurrents voient toujours un état cohérent.
+    """
+
+    def __init__(self, rows: List[Dict]):
+        rows = sorted(rows, key=lambda r: r['id'])
+        self.ids = np.array([r['id'] for r in rows], dtype=np.int64)
+        self.prices = np.array(
+            [np.nan if r.get('price') is None else float(r['price']) for r in rows],
+            dtype=np.float64,
+        )
+        self.columns = {
+            name: np.array([r.get(name) for r in rows], dtype=object)
+            for name in CATALOG_COLUMNS if name not in ('id', 'price')
+        }
+        # Versions minuscules pour le tri et les filtres insensibles à la casse (dtype=object:
+        # un tableau '<U' réserverait la longueur de la plus longue description à chaque ligne)
+        self.lowered = {
+            name: np.array([(r.get(name) or '').lower() for r in rows], dtype=object)
+            for name in ('name', 'description', 'category', 'brand', 'color')
+        }
+        # Une chaîne par ligne pour la recherche de sous-chaîne (champs séparés par \0
+        # pour qu'une requête ne corresponde pas à cheval sur deux champs)
+        self.search_texts = [
+            '\0'.join(self.lowered[name][row] for name in TEXT_SEARCH_COLUMNS)
+            for row in range(len(rows))
+        ]
+        self.row_by_id = {int(pid): row for row, pid in enumerate(self.ids)}
+        self.product_id_by_image_hash = {
+            r['image_hash']: r['id'] for r in rows if r.get('image_hash')
+        }
+        updated = [r['updated_at'] for r in rows if r.get('updated_at') is not None]
+        self.watermark = max(updated) if updated else None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def record(self, row: int) -> Dict:
+        """Reconstruit la ligne complète (toutes les colonnes de CATALOG_COLUMNS)"""
+        record = {name: column[row] for name, column in self.columns.items()}
+        record['id'] = int(self.ids[row])
+        price = self.prices[row]
+        record['price'] = None if np.isnan(price) else float(price)
+        return record
+
+    def product(self, row: int) -> Dict:
+        """Dictionnaire produit d'une ligne (même format que la DB, sans colonnes internes)"""
+        product = self.record(row)
+        for name in INTERNAL_COLUMNS:
+            product.pop(name, None)
+        return product
+
+    def rows(self) -> List[Dict]:
+        return [self.record(row) for row in range(len(self))]
+
+
+class ProductCatalog:
+    """
+    Catalogue produits en mémoire, rafraîchi périodiquement depuis PostgreSQL
+    """
+
+    def __init__(self, refresh_interval: float = 60.0):
+        """
+        Args:
+            refresh_interval: Secondes entre deux rafraîchissements incrémentaux
+        """
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._refresher: Optional[threading.Thread] = None
+        self._refresher_pid = None
+        self._stop_refresher = threading.Event()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def is_loaded(self) -> bool:
+        """Vérifie si le catalogue est chargé"""
+        return self._snapshot is not None
+
+    def _query(self, query: str, params=()) -> Optional[List[Dict]]:
+        db = get_db()
+        if not db:
+            return None
+        return db.execute_query(query, params)
+
+    def load(self) -> bool:
+        """
+        Charge (ou recharge) tout le catalogue
+
+        Returns:
+            bool: True si le chargement a réussi
+        """
+        rows = self._query(f"SELECT {', '.join(CATALOG_COLUMNS)} FROM products", ())
+        self._last_refresh = time.time()
+        if rows is None:
+            logger.error("Impossible de charger le catalogue produits depuis la DB")
+            return False
+        self._publish(CatalogSnapshot([dict(r) for r in rows]))
+        logger.info(f"Catalogue produits chargé: {len(self._snapshot)} produits")
+        return True
+
+    def refresh(self) -> int:
+        """
+        Rafraîchissement incrémental: relit les lignes dont updated_at a avancé
+
+        Les suppressions ne modifient pas updated_at: si le nombre de produits en
+        base ne correspond plus au snapshot, le catalogue est rechargé entièrement.
+
+        Returns:
+            Nombre de produits ajoutés ou modifiés (-1 en cas d'erreur)
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.watermark is None:
+            return len(self._snapshot) if self.load() else -1
+
+        self._last_refresh = time.time()
+        # >= : les lignes modifiées dans la même seconde que le watermark ne sont pas perdues
+        changed_rows = self._query(
+            f"SELECT {', '.join(CATALOG_COLUMNS)} FROM products WHERE updated_at >= %s",
+            (snapshot.watermark,)
+        )
+        count_rows = self._query("SELECT COUNT(*) AS count FROM products", ())
+        if changed_rows is None or not count_rows:
+            logger.warning("Rafraîchissement du catalogue impossible, snapshot conservé")
+            return -1
+
+        rows_by_id = None
+        changed = 0
+        for row in changed_rows:
+            row = dict(row)
+            if row.get('price') is not None:
+                row['price'] = float(row['price'])
+            existing = snapshot.row_by_id.get(row['id'])
+            if existing is not None and snapshot.record(existing) == row:
+                continue
+            if rows_by_id is None:
+                rows_by_id = {r['id']: r for r in snapshot.rows()}
+            rows_by_id[row['id']] = row
+            changed += 1
+
+        expected_count = count_rows[0]['count']
+        if len(rows_by_id or snapshot.row_by_id) != expected_count:
+            logger.info("Produits supprimés détectés, rechargement complet du catalogue")
+            return changed if self.load() else -1
+        if changed:
+            self._publish(CatalogSnapshot(list(rows_by_id.values())))
+            logger.info(f"Catalogue rafraîchi: {changed} produit(s) ajouté(s) ou modifié(s)")
+        return changed
+
+    def _publish(self, snapshot: CatalogSnapshot) -> None:
+        self._snapshot = snapshot
+        self.version += 1
+
+    def _refresh_if_due(self) -> None:
+        """Chargement complet si aucun snapshot, sinon rafraîchissement incrémental dû"""
+        with self._lock:
+            try:
+                if self._snapshot is None:
+                    self.load()
+                elif time.time() - self._last_refresh >= self.refresh_interval:
+                    self.refresh()
+            except Exception as e:
+                logger.error(f"Erreur lors du rafraîchissement du catalogue: {e}")
+
+    def start(self) -> bool:
+        """
+        Chargement initial (au démarrage, à côté de load_search_index) puis
+        rafraîchissements périodiques dans un thread de fond
+
+        Returns:
+            bool: True si un snapshot est disponible
+        """
+        if self._snapshot is None:
+            self._refresh_if_due()
+        self.start_refresher()
+        return self.is_loaded()
+
+    def start_refresher(self) -> None:
+        """
+        Démarre le thread de fond qui rafraîchit le catalogue toutes les
+        refresh_interval secondes (redémarré après un fork de worker gunicorn)
+        """
+        if self.refresh_interval <= 0:
+            return
+        if (
+            self._refresher is not None
+            and self._refresher.is_alive()
+            and self._refresher_pid == os.getpid()
+        ):
+            return
+
+        stop = self._stop_refresher = threading.Event()
+
+        def run():
+            while not stop.is_set():
+                self._refresh_if_due()
+                stop.wait(self.refresh_interval)
+
+        self._refresher = threading.Thread(target=run, name='catalog-refresher', daemon=True)
+        self._refresher_pid = os.getpid()
+        self._refresher.start()
+
+    def stop_refresher(self) -> None:
+        """Arrête le thread de rafraîchissement (après le rafraîchissement en cours)"""
+        self._stop_refresher.set()
+        if self._refresher is not None and self._refresher_pid == os.getpid():
+            self._refresher.join()
+        self._refresher = None
+
+    def ensure_fresh(self) -> bool:
+        """
+        Vérifie qu'un snapshot est publié, sans jamais interroger la DB: le
+        chargement initial est fait par start() et les rafraîchissements par le
+        thread de fond (démarré ici s'il ne tourne pas dans ce processus)
+
+        Returns:
+            bool: True si un snapshot est disponible
+        """
+        self.start_refresher()
+        return self.is_loaded()
+
+    def get(self, product_id: int) -> Optional[Dict]:
+        """Retourne un produit du snapshot (None si absent ou catalogue non chargé)"""
+        snapshot = self._snapshot
+        row = snapshot.row_by_id.get(int(product_id)) if snapshot else None
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return snapshot.product(row) if row is not None else None
+
+    def get_many(self, product_ids: Iterable[int]) -> Tuple[Dict[int, Dict], List[int]]:
+        """
+        Returns:
+            Tuple (produits trouvés {id: produit}, ids absents du snapshot)
+        """
+        snapshot = self._snapshot
+        found, missing = {}, []
+        for product_id in product_ids:
+            product_id = int(product_id)
+            row = snapshot.row_by_id.get(product_id) if snapshot else None
+            if row is None:
+                missing.append(product_id)
+            else:
+                found[product_id] = snapshot.product(row)
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def fetch(self, product_ids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        Produits par id depuis le snapshot, complétés par une requête SQL groupée
+        pour les ids absents (produits ajoutés depuis le dernier rafraîchissement)
+        """
+        found, missing = self.get_many(product_ids)
+        if missing:
+            found.update(fetch_products_by_ids(get_db(), missing))
+        return found
+
+    def records(self) -> List[Dict]:
+        """Toutes les lignes du snapshot (ex: pour les bitmaps de filtres)"""
+        snapshot = self._snapshot
+        return snapshot.rows() if snapshot else []
+
+    def image_hashes(self) -> Dict[str, int]:
+        """Table {image_hash: product_id} des images du catalogue"""
+        snapshot = self._snapshot
+        return snapshot.product_id_by_image_hash if snapshot else {}
+
+    def search_text(self, query: str, limit: int = 20, category: Optional[str] = None,
+                    min_price: Optional[float] = None, max_price: Optional[float] = None,
+                    brand: Optional[str] = None, color: Optional[str] = None,
+                    exclude_categories: Iterable[str] = ()) -> List[Dict]:
+        """
+        Recherche texte en mémoire, même sémantique que la requête SQL de /api/search/text
+        (sous-chaîne insensible à la casse dans name, description, category ou brand;
+        tri par correspondance exacte du nom, puis catégorie, puis marque, puis nom)
+        """
+        snapshot = self._snapshot
+        if snapshot is None or len(snapshot) == 0:
+            return []
+        query = query.lower().replace('\0', '')
+
+        mask = np.fromiter((query in text for text in snapshot.search_texts), dtype=bool,
+                           count=len(snapshot))
+        for excluded in exclude_categories:
+            mask &= snapshot.columns['category'] != excluded
+        if category:
+            mask &= snapshot.columns['category'] == category
+        if min_price is not None:
+            mask &= snapshot.prices >= min_price
+        if max_price is not None:
+            mask &= snapshot.prices <= max_price
+        if brand:
+            mask &= snapshot.lowered['brand'] == brand.lower()
+        if color:
+            mask &= snapshot.lowered['color'] == color.lower()
+
+        rows = np.flatnonzero(mask)
+        ranks = np.full(len(rows), len(TEXT_RANK_COLUMNS) + 1)
+        for rank, name in reversed(list(enumerate(TEXT_RANK_COLUMNS, start=1))):
+            ranks[snapshot.lowered[name][rows] == query] = rank
+        order = sorted(
+            range(len(rows)), key=lambda i: (ranks[i], snapshot.columns['name'][rows[i]])
+        )
+        return [snapshot.product(rows[i]) for i in order[:limit]]
+
+    def get_stats(self) -> Dict:
+        """Statistiques du catalogue (taille, version, hits/misses)"""
+        snapshot = self._snapshot
+        return {
+            'loaded': snapshot is not None,
+            'size': len(snapshot) if snapshot else 0,
+            'version': self.version,
+            'watermark': (
+                snapshot.watermark.isoformat() if snapshot and snapshot.watermark else None
+            ),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Instance globale du catalogue
+_catalog_instance: Optional[ProductCatalog] = None
+
+
+def get_catalog() -> ProductCatalog:
+    """
+    Retourne l'instance globale du catalogue (Singleton)
+
+    Returns:
+        Instance ProductCatalog
+    """
+    global _catalog_instance
+    if _catalog_instance is None:
+        from config import Config
+        _catalog_instance = ProductCatalog(refresh_interval=Config.CATALOG_REFRESH_INTERVAL)
+    return _catalog_instance
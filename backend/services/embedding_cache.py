@@ -0,0 +1,125 @@
+"""
+Cache des embeddings de requêtes image, indexé par le MD5 du fichier
+Séparé du cache des résultats JSON: la même photo recherchée avec d'autres
+filtres, top_k ou min_similarity réutilise son vecteur (ni preprocessing ni
+ResNet50), les filtres et le classement sont appliqués ensuite. Les images du
+catalogue (colonne products.image_hash) pointent directement sur leur ligne de
+l'index de features: elles ne passent jamais par le modèle.
+"""
+import numpy as np
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    LRU borné image_hash -> embedding float32 (d,), plus une table
+    image_hash -> product_id pour les images du catalogue
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Args:
+            max_entries: Nombre maximum d'embeddings de requêtes conservés
+        """
+        self.max_entries = max(0, max_entries)
+        self._entries: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._catalog_hashes: Dict[str, int] = {}
+        self._resolver: Optional[Callable[[int], Optional[np.ndarray]]] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.catalog_hits = 0
+        self.misses = 0
+
+    def preload_catalog(self, product_id_by_hash: Dict[str, int],
+                        resolver: Callable[[int], Optional[np.ndarray]]) -> None:
+        """
+        Enregistre les images du catalogue
+
+        Args:
+            product_id_by_hash: {image_hash: product_id} (table products)
+            resolver: product_id -> vecteur de l'index (ex: search_engine.get_feature_vector)
+        """
+        self._catalog_hashes = dict(product_id_by_hash)
+        self._resolver = resolver
+        logger.info(
+            f"Cache d'embeddings: {len(self._catalog_hashes)} images du catalogue préchargées"
+        )
+
+    def get(self, image_hash: str) -> Optional[np.ndarray]:
+        """
+        Returns:
+            Embedding (d,) ou None si l'image doit passer par le modèle
+        """
+        with self._lock:
+            embedding = self._entries.get(image_hash)
+            if embedding is not None:
+                self._entries.move_to_end(image_hash)
+                self.hits += 1
+                return embedding
+
+        product_id = self._catalog_hashes.get(image_hash)
+        if product_id is not None and self._resolver is not None:
+            embedding = self._resolver(product_id)
+            if embedding is not None:
+                with self._lock:
+                    self.catalog_hits += 1
+                return embedding
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, image_hash: str, embedding: np.ndarray) -> None:
+        """Stocke l'embedding d'une requête (évince l'entrée la moins récemment utilisée)"""
+        if self.max_entries == 0:
+            return
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._entries[image_hash] = embedding
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vide les embeddings de requêtes (la table du catalogue est conservée)"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.catalog_hits = self.misses = 0
+
+    def get_stats(self) -> Dict:
+        """Statistiques du cache (hits LRU et catalogue, taille, mémoire)"""
+        with self._lock:
+            total = self.hits + self.catalog_hits + self.misses
+            return {
+                'hits': self.hits,
+                'catalog_hits': self.catalog_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.catalog_hits) / total * 100, 2) if total else 0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': sum(e.nbytes for e in self._entries.values()),
+                'catalog_images': len(self._catalog_hashes)
+            }
+
+
+# Instance globale du cache d'embeddings
+_embedding_cache_instance: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Retourne l'instance globale du cache d'embeddings (Singleton)
+
+    Returns:
+        Instance EmbeddingCache
+    """
+    global _embedding_cache_instance
+    if _embedding_cache_instance is None:
+        from config import Config
+        _embedding_cache_instance = EmbeddingCache(max_entries=Config.EMBEDDING_CACHE_SIZE)
+    return _embedding_cache_instance
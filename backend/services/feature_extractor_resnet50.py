@@ -7,6 +7,9 @@ import time
 import logging
 from typing import Optional
 
+from services.compiled_inference import CompiledModelRunner
+from services.inference_batcher import InferenceBatcher
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,8 @@ class ResNet50FeatureExtractor:
     _instance = None
     _model = None
     _model_loaded = False
+    _batcher = None
+    _runner = None
     
     def __new__(cls):
         """Pattern Singleton"""
@@ -77,6 +82,52 @@ class ResNet50FeatureExtractor:
             self._model_loaded = False
             return False
     
+    def enable_compiled_inference(self, max_batch_size: int = 16, jit_compile: bool = False,
+                                  warmup: bool = True) -> bool:
+        """
+        Remplace Model.predict par des fonctions tf.function tracées pour les
+        tailles de batch 1, 2, 4, ... max_batch_size (voir CompiledModelRunner)
+        
+        Args:
+            max_batch_size: Plus grande taille de batch tracée
+            jit_compile: Compile avec XLA
+            warmup: Exécute chaque fonction au chargement (pas de traçage à la première requête)
+        
+        Returns:
+            bool: True si l'inférence compilée est active
+        """
+        if not self.is_model_loaded():
+            return False
+        try:
+            runner = CompiledModelRunner(self._model, input_shape=(224, 224, 3),
+                                         max_batch_size=max_batch_size, jit_compile=jit_compile)
+            if warmup:
+                runner.warmup()
+            self._runner = runner
+            return True
+        except Exception as e:
+            logger.warning(f"Inférence compilée indisponible, utilisation de predict(): {e}")
+            self._runner = None
+            return False
+    
+    def enable_batching(self, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        """
+        Active le micro-batching: les appels concurrents à extract_features sont
+        regroupés en un seul forward pass (voir InferenceBatcher)
+        
+        Args:
+            max_batch_size: Nombre maximum d'images par forward pass
+            max_wait_ms: Attente maximale pour compléter un batch (millisecondes)
+        """
+        self._batcher = InferenceBatcher(self._predict_batch, max_batch_size=max_batch_size,
+                                         max_wait_ms=max_wait_ms, name='resnet50')
+    
+    def _predict_batch(self, image_batch: np.ndarray) -> np.ndarray:
+        """Forward pass sur un batch (n, 224, 224, 3) -> (n, 2048)"""
+        if self._runner is not None:
+            return self._runner(image_batch)
+        return self._model.predict(image_batch, verbose=0)
+    
     def is_model_loaded(self) -> bool:
         """Vérifie si le modèle est chargé"""
         return self._model is not None and self._model_loaded
@@ -105,8 +156,11 @@ class ResNet50FeatureExtractor:
             raise ValueError(f"Invalid image dimensions: {image_array.shape[1:]}. Expected (224, 224, 3)")
         
         try:
-            # Extraire les features
-            features = self._model.predict(image_array, verbose=0)
+            # Extraire les features (regroupées avec les requêtes concurrentes si activé)
+            if self._batcher is not None:
+                features = self._batcher.infer(image_array)
+            else:
+                features = self._predict_batch(image_array)
             
             # IMPORTANT: Pas de normalisation L2 par défaut
             # cosine_similarity de sklearn normalise automatiquement
@@ -128,7 +182,9 @@ class ResNet50FeatureExtractor:
             'model_loaded': self.is_model_loaded(),
             'tensorflow_available': TENSORFLOW_AVAILABLE,
             'output_shape': None,
-            'num_parameters': None
+            'num_parameters': None,
+            'batching': self._batcher.get_stats() if self._batcher is not None else None,
+            'compiled_inference': self._runner.get_stats() if self._runner is not None else None
         }
         
         if self.is_model_loaded():
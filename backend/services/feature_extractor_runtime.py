@@ -0,0 +1,234 @@
+"""
+Extracteur de features ResNet50 sans TensorFlow
+Exécute le modèle exporté par scripts/export_resnet50.py (même ResNet50
+include_top=False, pooling='avg') avec ONNX Runtime ou l'interpréteur TFLite sur
+CPU. Les embeddings restent compatibles avec l'index .npy existant (voir
+embedding_parity et tests/test_feature_extractor_runtime.py).
+"""
+import numpy as np
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict
+
+from services.inference_batcher import InferenceBatcher
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    from tflite_runtime.interpreter import Interpreter as TFLiteInterpreter
+    TFLITE_AVAILABLE = True
+except ImportError:
+    try:
+        from tensorflow.lite import Interpreter as TFLiteInterpreter
+        TFLITE_AVAILABLE = True
+    except ImportError:
+        TFLITE_AVAILABLE = False
+
+MODELS_DIR = Path(__file__).parent.parent.parent / 'data' / 'models'
+DEFAULT_MODEL_PATHS = {
+    'onnx': MODELS_DIR / 'resnet50.onnx',
+    'tflite': MODELS_DIR / 'resnet50.tflite'
+}
+# Versions INT8 (quantification post-entraînement, scripts/quantize_resnet50.py)
+INT8_MODEL_PATHS = {
+    'onnx': MODELS_DIR / 'resnet50_int8.onnx',
+    'tflite': MODELS_DIR / 'resnet50_int8.tflite'
+}
+INPUT_SHAPE = (224, 224, 3)
+FEATURE_DIM = 2048
+
+
+def embedding_parity(reference: np.ndarray, candidate: np.ndarray) -> Dict:
+    """
+    Compare deux lots d'embeddings (n, d) ligne à ligne
+
+    Returns:
+        Dictionnaire avec 'max_abs_diff' et 'min_cosine' (1.0 = identiques)
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosine = np.sum(reference * candidate, axis=1) / np.where(norms > 0, norms, 1)
+    return {
+        'max_abs_diff': float(np.max(np.abs(reference - candidate))),
+        'min_cosine': float(np.min(cosine))
+    }
+
+
+class ONNXRuntimeRunner:
+    """Session ONNX Runtime CPU (batch dynamique, session.run thread-safe)"""
+
+    def __init__(self, model_path, num_threads: int = 0):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime n'est pas installé")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_path), sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class TFLiteRunner:
+    """
+    Interpréteur TFLite: l'entrée est redimensionnée quand la taille de batch
+    change; l'interpréteur n'étant pas thread-safe, les appels sont sérialisés
+    """
+
+    def __init__(self, model_path, num_threads: int = 0):
+        if not TFLITE_AVAILABLE:
+            raise RuntimeError("Ni tflite_runtime ni tensorflow ne sont installés")
+        self.interpreter = TFLiteInterpreter(
+            model_path=str(model_path), num_threads=num_threads or None
+        )
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = int(self.input_detail['shape'][0])
+        self._lock = threading.Lock()
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.asarray(batch, dtype=self.input_detail['dtype'])
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input_detail['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self.input_detail['index'], batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
+
+
+RUNNERS = {
+    'onnx': ONNXRuntimeRunner,
+    'tflite': TFLiteRunner
+}
+
+
+class RuntimeFeatureExtractor:
+    """
+    Même interface que ResNet50FeatureExtractor (is_model_loaded, extract_features,
+    enable_batching, get_model_info), sans importer TensorFlow pour l'inférence
+    """
+
+    def __init__(
+        self, backend: str = 'onnx', model_path=None, num_threads: int = 0, quantized: bool = False
+    ):
+        """
+        Args:
+            backend: 'onnx' (ONNX Runtime) ou 'tflite' (interpréteur TFLite)
+            model_path: Modèle exporté (défaut: data/models/resnet50[_int8].<backend>)
+            num_threads: Threads intra-op (0 = choix du runtime)
+            quantized: Utilise le modèle INT8 par défaut au lieu du modèle float32
+        """
+        if backend not in RUNNERS:
+            raise ValueError(
+                f"Backend d'inférence inconnu: {backend} (attendu: {', '.join(RUNNERS)})"
+            )
+        self.backend = backend
+        self.quantized = quantized
+        default_paths = INT8_MODEL_PATHS if quantized else DEFAULT_MODEL_PATHS
+        self.model_path = Path(model_path) if model_path else default_paths[backend]
+        self.num_threads = num_threads
+        self._runner = None
+        self._batcher = None
+        self._load_model()
+
+    def _load_model(self) -> bool:
+        """Charge le modèle exporté"""
+        if not self.model_path.exists():
+            logger.error(
+                f"Modèle {self.backend} non trouvé: {self.model_path} "
+                f"(exécutez scripts/{'quantize' if self.quantized else 'export'}_resnet50.py)"
+            )
+            return False
+        try:
+            start_time = time.time()
+            self._runner = RUNNERS[self.backend](self.model_path, num_threads=self.num_threads)
+            logger.info(f"ResNet50 ({self.backend}) chargé en {time.time() - start_time:.2f}s "
+                        f"depuis {self.model_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement du modèle {self.backend}: {e}")
+            self._runner = None
+            return False
+
+    def enable_batching(self, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        """Active le micro-batching des appels concurrents (voir InferenceBatcher)"""
+        self._batcher = InferenceBatcher(self._predict_batch, max_batch_size=max_batch_size,
+                                         max_wait_ms=max_wait_ms, name=f"resnet50-{self.backend}")
+
+    def _predict_batch(self, image_batch: np.ndarray) -> np.ndarray:
+        """Forward pass sur un batch (n, 224, 224, 3) -> (n, 2048)"""
+        return self._runner(image_batch)
+
+    def is_model_loaded(self) -> bool:
+        """Vérifie si le modèle est chargé"""
+        return self._runner is not None
+
+    def extract_features(self, image_array: np.ndarray, normalize: bool = False) -> np.ndarray:
+        """
+        Extrait les features d'une image préprocessée
+
+        Args:
+            image_array: Image préprocessée (shape: (224, 224, 3) ou (n, 224, 224, 3))
+            normalize: Si True, normalise L2
+
+        Returns:
+            np.ndarray: Vecteurs de features (shape: (n, 2048))
+        """
+        if not self.is_model_loaded():
+            raise ValueError(
+                f"ResNet50 ({self.backend}) model is not loaded. Cannot extract features."
+            )
+
+        if len(image_array.shape) == 3:
+            image_array = np.expand_dims(image_array, axis=0)
+        elif len(image_array.shape) != 4:
+            raise ValueError(
+                f"Invalid image shape: {image_array.shape}. "
+                f"Expected (224, 224, 3) or (1, 224, 224, 3)"
+            )
+        if image_array.shape[1:] != INPUT_SHAPE:
+            raise ValueError(
+                f"Invalid image dimensions: {image_array.shape[1:]}. Expected (224, 224, 3)"
+            )
+
+        try:
+            if self._batcher is not None:
+                features = self._batcher.infer(image_array)
+            else:
+                features = self._predict_batch(image_array)
+
+            if normalize:
+                norm = np.linalg.norm(features, axis=1, keepdims=True)
+                features = features / np.where(norm > 0, norm, 1)
+            return features
+        except Exception as e:
+            logger.error(f"Error extracting features: {e}")
+            raise ValueError(f"Failed to extract features: {e}")
+
+    def get_model_info(self) -> dict:
+        """Retourne des informations sur le modèle"""
+        return {
+            'model_loaded': self.is_model_loaded(),
+            'backend': self.backend,
+            'quantized': self.quantized,
+            'model_path': str(self.model_path),
+            'num_threads': self.num_threads,
+            'output_shape': (None, FEATURE_DIM) if self.is_model_loaded() else None,
+            'batching': self._batcher.get_stats() if self._batcher is not None else None
+        }
@@ -0,0 +1,159 @@
+"""
+Micro-batching des inférences concurrentes
+Les requêtes qui arrivent en même temps sont regroupées (jusqu'à max_batch_size
+images ou max_wait_ms millisecondes) et passent dans un seul forward pass du
+modèle; chaque appelant récupère ses lignes via un Future
+"""
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBatcher:
+    """
+    File d'attente d'inférence avec regroupement dynamique
+
+    Un thread de fond attend une première requête, collecte les suivantes pendant
+    au plus max_wait_ms (ou jusqu'à max_batch_size images), appelle infer_fn une
+    seule fois sur le batch concaténé, puis résout le Future de chaque requête.
+    """
+
+    def __init__(self, infer_fn: Callable[[np.ndarray], np.ndarray], max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, name: str = 'inference'):
+        """
+        Args:
+            infer_fn: Fonction (n, ...) -> (n, d) exécutée sur chaque batch
+            max_batch_size: Nombre maximum d'images par forward pass
+            max_wait_ms: Attente maximale pour compléter un batch (millisecondes)
+            name: Nom du thread (logs)
+        """
+        self.infer_fn = infer_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'images': 0, 'batches': 0, 'errors': 0, 'max_batch': 0}
+
+    def _ensure_worker(self) -> None:
+        """Démarre le thread au premier appel (et après un fork de worker gunicorn)"""
+        if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+            return
+        with self._start_lock:
+            if (
+                self._worker is not None
+                and self._worker.is_alive()
+                and self._worker_pid == os.getpid()
+            ):
+                return
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(
+                target=self._run, name=f"{self.name}-batcher", daemon=True
+            )
+            self._worker_pid = os.getpid()
+            self._worker.start()
+            logger.info(
+                f"Micro-batching démarré ({self.name}): max_batch_size={self.max_batch_size}, "
+                f"max_wait={self.max_wait * 1000:.1f} ms"
+            )
+
+    def submit(self, batch: np.ndarray) -> Future:
+        """
+        Ajoute une requête (n images) à la file
+
+        Returns:
+            Future résolu avec les n lignes de sortie correspondantes
+        """
+        batch = np.asarray(batch)
+        if batch.shape[0] == 0:
+            raise ValueError("Batch vide")
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((batch, future))
+        return future
+
+    def infer(self, batch: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """Version bloquante de submit()"""
+        return self.submit(batch).result(timeout=timeout)
+
+    def _collect(self, carry=None):
+        """
+        Attend une requête puis regroupe celles qui arrivent avant l'échéance
+
+        Returns:
+            Tuple (requêtes du batch, requête reportée au batch suivant ou None)
+        """
+        items = [carry if carry is not None else self._queue.get()]
+        n_images = items[0][0].shape[0]
+        deadline = time.monotonic() + self.max_wait
+        while n_images < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if n_images + item[0].shape[0] > self.max_batch_size:
+                return items, item
+            items.append(item)
+            n_images += item[0].shape[0]
+        return items, None
+
+    def _run(self) -> None:
+        carry = None
+        while True:
+            items, carry = self._collect(carry)
+            # Une requête plus grande que max_batch_size est exécutée seule;
+            # les Futures annulés entre-temps sont ignorés
+            pending = [
+                (batch, future) for batch, future in items if future.set_running_or_notify_cancel()
+            ]
+            if not pending:
+                continue
+            n_images = sum(batch.shape[0] for batch, _ in pending)
+            try:
+                inputs = (
+                    pending[0][0] if len(pending) == 1 else np.concatenate([b for b, _ in pending])
+                )
+                outputs = np.asarray(self.infer_fn(inputs))
+                offset = 0
+                for batch, future in pending:
+                    future.set_result(outputs[offset:offset + batch.shape[0]])
+                    offset += batch.shape[0]
+            except Exception as e:
+                logger.error(f"Erreur d'inférence sur un batch de {n_images} image(s): {e}")
+                with self._stats_lock:
+                    self._stats['errors'] += 1
+                for _, future in pending:
+                    future.set_exception(e)
+            with self._stats_lock:
+                self._stats['requests'] += len(pending)
+                self._stats['images'] += n_images
+                self._stats['batches'] += 1
+                self._stats['max_batch'] = max(self._stats['max_batch'], n_images)
+
+    def get_stats(self) -> Dict:
+        """Statistiques de regroupement (taille moyenne des batches, etc.)"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_batch'] = (
+            round(stats['images'] / stats['batches'], 2) if stats['batches'] else 0.0
+        )
+        stats['queue_size'] = self._queue.qsize()
+        stats['max_batch_size'] = self.max_batch_size
+        stats['max_wait_ms'] = self.max_wait * 1000
+        return stats
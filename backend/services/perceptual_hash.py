@@ -0,0 +1,209 @@
+"""
+Hashs perceptuels (pHash, dHash) et cache des requêtes quasi identiques
+Une photo ré-enregistrée, recompressée ou redimensionnée n'a plus le même MD5,
+mais ses hashs perceptuels 64 bits restent à quelques bits près: une requête
+dans un petit rayon de Hamming d'une requête récente réutilise son embedding
+(et ses résultats) sans passer par ResNet50.
+"""
+import numpy as np
+import cv2
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+
+def _grayscale(image) -> np.ndarray:
+    """Image PIL ou tableau RGB -> niveaux de gris float32"""
+    array = np.asarray(image.convert('L') if hasattr(image, 'convert') else image)
+    if array.ndim == 3:
+        array = cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+    return array.astype(np.float32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.reshape(-1)).tobytes(), 'big')
+
+
+def phash(image) -> int:
+    """
+    pHash 64 bits: DCT 2D d'une vignette 32x32, signe des 8x8 basses fréquences
+    par rapport à leur médiane (hors composante continue)
+    """
+    thumbnail = cv2.resize(_grayscale(image), (32, 32), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(thumbnail)[:8, :8]
+    return _bits_to_int(low > np.median(low.reshape(-1)[1:]))
+
+
+def dhash(image) -> int:
+    """dHash 64 bits: gradient horizontal d'une vignette 9x8"""
+    thumbnail = cv2.resize(_grayscale(image), (9, 8), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(thumbnail[:, 1:] > thumbnail[:, :-1])
+
+
+def hamming(a: int, b: int) -> int:
+    """Distance de Hamming entre deux hashs"""
+    return bin(a ^ b).count('1')
+
+
+class MultiIndexHashTable:
+    """
+    Recherche des hashs à distance de Hamming <= radius (multi-index hashing)
+
+    Le hash est découpé en radius + 1 blocs: deux hashs à distance <= radius ont
+    au moins un bloc identique (principe des tiroirs). Chaque bloc est indexé
+    par une table exacte; les candidats sont ensuite vérifiés bit à bit.
+    """
+
+    def __init__(self, radius: int = 4, bits: int = HASH_BITS):
+        self.radius = radius
+        self.bits = bits
+        n_blocks = radius + 1
+        bounds = np.linspace(0, bits, n_blocks + 1).astype(int)
+        self._blocks = [
+            (int(start), int(end - start)) for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        self._tables: List[Dict[int, set]] = [{} for _ in self._blocks]
+        self._hashes: Dict[str, int] = {}
+
+    def _substrings(self, value: int):
+        for start, width in self._blocks:
+            yield (value >> start) & ((1 << width) - 1)
+
+    def add(self, key: str, value: int) -> None:
+        self.remove(key)
+        self._hashes[key] = value
+        for table, block in zip(self._tables, self._substrings(value)):
+            table.setdefault(block, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        value = self._hashes.pop(key, None)
+        if value is None:
+            return
+        for table, block in zip(self._tables, self._substrings(value)):
+            keys = table.get(block)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del table[block]
+
+    def search(self, value: int) -> List[Tuple[str, int]]:
+        """
+        Returns:
+            Liste (clé, distance) des hashs à distance <= radius, par distance croissante
+        """
+        candidates = set()
+        for table, block in zip(self._tables, self._substrings(value)):
+            candidates |= table.get(block, set())
+        matches = [(key, hamming(value, self._hashes[key])) for key in candidates]
+        return sorted((m for m in matches if m[1] <= self.radius), key=lambda m: m[1])
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class NearDuplicateCache:
+    """
+    LRU des requêtes récentes indexées par pHash (multi-index hashing)
+
+    Une entrée est réutilisée si le pHash est dans le rayon et que le dHash le
+    confirme. Le dHash bouge davantage sur une simple recompression (gradients
+    des fonds unis), d'où un rayon de confirmation plus large: il écarte les
+    collisions de pHash entre photos réellement différentes.
+    """
+
+    def __init__(self, max_entries: int = 4096, radius: int = 4, dhash_radius: int = 16):
+        """
+        Args:
+            max_entries: Nombre maximum de requêtes conservées
+            radius: Distance de Hamming maximale du pHash (bits sur 64, 0 = doublons exacts)
+            dhash_radius: Distance de Hamming maximale du dHash (confirmation)
+        """
+        self.max_entries = max(0, max_entries)
+        self.radius = radius
+        self.dhash_radius = dhash_radius
+        self._index = MultiIndexHashTable(radius=radius)
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def find(self, phash_value: int, dhash_value: int) -> Optional[Dict]:
+        """
+        Returns:
+            Entrée la plus proche ({'image_hash', 'embedding', 'distance'}) ou None
+        """
+        with self._lock:
+            for key, distance in self._index.search(phash_value):
+                entry = self._entries[key]
+                if hamming(dhash_value, entry['dhash']) <= self.dhash_radius:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return {
+                        'image_hash': key,
+                        'embedding': entry['embedding'],
+                        'distance': distance,
+                    }
+            self.misses += 1
+            return None
+
+    def add(
+        self, image_hash: str, phash_value: int, dhash_value: int, embedding: np.ndarray
+    ) -> None:
+        """Enregistre une requête (image_hash = MD5 du fichier, clé du cache de résultats)"""
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[image_hash] = {
+                'dhash': dhash_value,
+                'embedding': np.asarray(embedding, dtype=np.float32).reshape(-1)
+            }
+            self._entries.move_to_end(image_hash)
+            self._index.add(image_hash, phash_value)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._index.remove(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index = MultiIndexHashTable(radius=self.radius)
+            self.hits = self.misses = 0
+
+    def get_stats(self) -> Dict:
+        """Statistiques (hit rate des hashs perceptuels, taille)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total * 100, 2) if total else 0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'radius': self.radius,
+                'dhash_radius': self.dhash_radius
+            }
+
+
+# Instance globale du cache de quasi-doublons
+_near_duplicate_cache_instance: Optional[NearDuplicateCache] = None
+
+
+def get_near_duplicate_cache() -> NearDuplicateCache:
+    """
+    Retourne l'instance globale du cache de quasi-doublons (Singleton)
+
+    Returns:
+        Instance NearDuplicateCache
+    """
+    global _near_duplicate_cache_instance
+    if _near_duplicate_cache_instance is None:
+        from config import Config
+        _near_duplicate_cache_instance = NearDuplicateCache(
+            max_entries=Config.NEAR_DUPLICATE_CACHE_SIZE, radius=Config.NEAR_DUPLICATE_RADIUS
+        )
+    return _near_duplicate_cache_instance
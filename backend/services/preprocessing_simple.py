@@ -1,33 +1,87 @@
 """
 Preprocessing simplifié
-- Utilise tf.image.resize
-- Preprocess_input de ResNet50
+- Resize bilinéaire identique à tf.image.resize (OpenCV, centres de pixels décalés de 0.5)
+- Preprocess_input de ResNet50 (mode caffe: RGB -> BGR, soustraction de la moyenne ImageNet)
 - Pas d'amélioration de qualité complexe
+- Sans TensorFlow: ni import au démarrage, ni aller-retour par un tenseur eager
+- JPEG volumineux décodés directement à 1/2, 1/4 ou 1/8 (Image.draft, mise à l'échelle DCT)
 """
 import numpy as np
-import tensorflow as tf
+import cv2
 import io
 from PIL import Image, ImageOps
-from tensorflow.keras.applications.resnet50 import preprocess_input
+
+# Moyenne ImageNet (ordre BGR) soustraite par keras preprocess_input en mode 'caffe'
+IMAGENET_MEAN_BGR = np.array([103.939, 116.779, 123.68], dtype=np.float32)
+
+# Le décodage réduit garde au moins DRAFT_OVERSAMPLING fois la taille cible sur chaque
+# côté: le resize bilinéaire final travaille toujours sur une image plus grande que 224x224
+DRAFT_OVERSAMPLING = 2
+
+
+def open_image(source, target_size=(224, 224)):
+    """
+    Ouvre une image, corrige l'orientation EXIF et la convertit en RGB
+    
+    Pour un JPEG bien plus grand que la cible, le décodeur est configuré (draft)
+    pour décoder directement à l'échelle 1/2, 1/4 ou 1/8: une photo de 12
+    mégapixels est décodée en ~0.2 mégapixel, en temps et en mémoire.
+    
+    Args:
+        source: Chemin ou objet fichier
+        target_size: (hauteur, largeur) du resize final
+    
+    Returns:
+        Image PIL RGB
+    """
+    pil_image = Image.open(source)
+    if pil_image.format == 'JPEG':
+        # Taille carrée: indépendante d'une rotation EXIF appliquée ensuite
+        min_side = max(target_size) * DRAFT_OVERSAMPLING
+        pil_image.draft('RGB', (min_side, min_side))
+    pil_image = ImageOps.exif_transpose(pil_image)
+    return pil_image.convert('RGB')
+
+
+def resize_bilinear(image, target_size=(224, 224)):
+    """
+    Équivalent de tf.image.resize(image, target_size) (bilinéaire, sans antialias)
+    
+    cv2.INTER_LINEAR sur des float32 utilise les mêmes coordonnées source
+    ((x + 0.5) * échelle - 0.5, bornées aux bords) que TensorFlow.
+    
+    Args:
+        image: Image (H, W, C)
+        target_size: (hauteur, largeur)
+    
+    Returns:
+        Image (hauteur, largeur, C) en float32
+    """
+    height, width = target_size
+    return cv2.resize(
+        np.asarray(image, dtype=np.float32), (width, height), interpolation=cv2.INTER_LINEAR
+    )
+
+
+def preprocess_input(image):
+    """Équivalent de keras resnet50.preprocess_input (mode caffe) sur un tableau float32"""
+    return image[..., ::-1] - IMAGENET_MEAN_BGR
 
 def load_and_preprocess_image_simple(image_path, target_size=(224, 224)):
     """
     Preprocessing simplifié
-    - Utilise tf.image.resize
+    - Resize bilinéaire (comme tf.image.resize)
     - Preprocess_input de ResNet50
     - Pas d'amélioration de qualité
     """
-    # 1. Ouvrir l'image
-    pil_image = Image.open(image_path)
-    
-    # 2. Corriger l'orientation EXIF
-    pil_image = ImageOps.exif_transpose(pil_image)
+    # 1-2. Ouvrir l'image (décodage réduit des JPEG), corriger l'orientation EXIF
+    pil_image = open_image(image_path, target_size)
     
     # 3. Convertir en numpy array
-    image = np.array(pil_image.convert('RGB'))
+    image = np.array(pil_image)
     
-    # 4. Resize avec tf.image.resize
-    image_resized = tf.image.resize(image, target_size).numpy()
+    # 4. Resize bilinéaire (comme tf.image.resize)
+    image_resized = resize_bilinear(image, target_size)
     
     # 5. Appliquer preprocess_input de ResNet50
     # Cela fait la normalisation ImageNet automatiquement
@@ -42,15 +96,19 @@ def preprocess_from_bytes_simple(file_bytes, target_size=(224, 224)):
     """
     Preprocessing simplifié depuis bytes
     """
-    # Ouvrir l'image depuis les bytes
-    pil_image = Image.open(io.BytesIO(file_bytes))
-    pil_image = ImageOps.exif_transpose(pil_image)
-    
+    # Ouvrir l'image depuis les bytes (décodage réduit des JPEG)
+    pil_image = open_image(io.BytesIO(file_bytes), target_size)
+    return preprocess_image_simple(pil_image, target_size)
+
+def preprocess_image_simple(pil_image, target_size=(224, 224)):
+    """
+    Preprocessing simplifié d'une image déjà décodée (voir open_image)
+    """
     # Convertir en numpy array
-    image = np.array(pil_image.convert('RGB'))
+    image = np.array(pil_image)
     
-    # Resize avec tf.image.resize
-    image_resized = tf.image.resize(image, target_size).numpy()
+    # Resize bilinéaire (comme tf.image.resize)
+    image_resized = resize_bilinear(image, target_size)
     
     # Preprocess_input de ResNet50
     image_preprocessed = preprocess_input(image_resized)
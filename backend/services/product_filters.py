@@ -0,0 +1,138 @@
+"""
+Attributs produits alignés sur les lignes de la matrice de features
+Un bitmap (np.packbits, 1 bit par produit) par catégorie, marque et couleur, plus
+un tableau de prix: les filtres de recherche deviennent un masque booléen appliqué
+avant la sélection top-k, au lieu d'un filtrage SQL résultat par résultat
+"""
+import numpy as np
+import logging
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _pack_groups(values: List[Optional[str]], n_rows: int) -> Dict[str, np.ndarray]:
+    """Construit un bitmap compressé par valeur distincte (valeurs None ignorées)"""
+    rows_by_value: Dict[str, List[int]] = {}
+    for row, value in enumerate(values):
+        if value is not None:
+            rows_by_value.setdefault(value, []).append(row)
+
+    bitmaps = {}
+    for value, rows in rows_by_value.items():
+        bits = np.zeros(n_rows, dtype=bool)
+        bits[rows] = True
+        bitmaps[value] = np.packbits(bits)
+    return bitmaps
+
+
+def _normalize_text(value) -> Optional[str]:
+    """Clé de comparaison insensible à la casse (comme LOWER() en SQL)"""
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    return value or None
+
+
+class ProductAttributes:
+    """
+    Attributs filtrables du catalogue, indexés par ligne de feature_database
+
+    Les catégories sont comparées telles quelles, marques et couleurs sans tenir
+    compte de la casse; un prix manquant (NaN) ne satisfait aucun filtre de prix,
+    comme NULL en SQL. Les lignes absentes de la source (produit supprimé de la
+    base) sont exclues de tous les masques.
+    """
+
+    def __init__(self, n_rows: int):
+        self.n_rows = n_rows
+        self.present = np.packbits(np.zeros(n_rows, dtype=bool))
+        self.categories: Dict[str, np.ndarray] = {}
+        self.brands: Dict[str, np.ndarray] = {}
+        self.colors: Dict[str, np.ndarray] = {}
+        self.prices = np.full(n_rows, np.nan, dtype=np.float32)
+        self._category_by_row: List[Optional[str]] = [None] * n_rows
+
+    @classmethod
+    def from_records(cls, product_ids: np.ndarray, records: Iterable[Dict]) -> 'ProductAttributes':
+        """
+        Construit les bitmaps à partir de lignes produits (DB ou products.json)
+
+        Args:
+            product_ids: Ids produits dans l'ordre des lignes de features
+            records: Dictionnaires avec 'id', 'category', 'brand', 'color', 'price'
+        """
+        row_by_product_id = {int(pid): row for row, pid in enumerate(product_ids)}
+        attributes = cls(len(product_ids))
+
+        present = np.zeros(attributes.n_rows, dtype=bool)
+        brands: List[Optional[str]] = [None] * attributes.n_rows
+        colors: List[Optional[str]] = [None] * attributes.n_rows
+        for record in records:
+            row = row_by_product_id.get(int(record['id']))
+            if row is None:
+                continue
+            present[row] = True
+            attributes._category_by_row[row] = record.get('category') or None
+            brands[row] = _normalize_text(record.get('brand'))
+            colors[row] = _normalize_text(record.get('color'))
+            if record.get('price') is not None:
+                attributes.prices[row] = float(record['price'])
+
+        attributes.present = np.packbits(present)
+        attributes.categories = _pack_groups(attributes._category_by_row, attributes.n_rows)
+        attributes.brands = _pack_groups(brands, attributes.n_rows)
+        attributes.colors = _pack_groups(colors, attributes.n_rows)
+
+        logger.info(f"Attributs produits indexés: {int(present.sum())}/{attributes.n_rows} lignes, "
+                    f"{len(attributes.categories)} catégories, {len(attributes.brands)} marques, "
+                    f"{len(attributes.colors)} couleurs")
+        return attributes
+
+    def category_of(self, row: int) -> Optional[str]:
+        """Catégorie d'une ligne (None si inconnue)"""
+        return self._category_by_row[row]
+
+    def _bitmap(self, bitmaps: Dict[str, np.ndarray], value: Optional[str]) -> np.ndarray:
+        bitmap = bitmaps.get(value)
+        if bitmap is None:
+            return np.zeros_like(self.present)
+        return bitmap
+
+    def build_mask(self, category: Optional[str] = None, brand: Optional[str] = None,
+                   color: Optional[str] = None, min_price: Optional[float] = None,
+                   max_price: Optional[float] = None,
+                   exclude_categories: Iterable[str] = ()) -> np.ndarray:
+        """
+        Combine les filtres en un masque booléen (N,) des lignes autorisées
+
+        Les bitmaps sont combinés en forme compressée (8 produits par octet),
+        puis décompressés une seule fois.
+        """
+        packed = self.present
+        if category:
+            packed = packed & self._bitmap(self.categories, category)
+        if brand:
+            packed = packed & self._bitmap(self.brands, _normalize_text(brand))
+        if color:
+            packed = packed & self._bitmap(self.colors, _normalize_text(color))
+        for excluded in exclude_categories:
+            if excluded in self.categories:
+                packed = packed & ~self.categories[excluded]
+
+        mask = np.unpackbits(packed, count=self.n_rows).astype(bool)
+        if min_price is not None:
+            mask &= self.prices >= min_price
+        if max_price is not None:
+            mask &= self.prices <= max_price
+        return mask
+
+    def memory_usage(self) -> int:
+        """Mémoire (octets) des bitmaps et du tableau de prix"""
+        bitmaps = [
+            self.present,
+            *self.categories.values(),
+            *self.brands.values(),
+            *self.colors.values(),
+        ]
+        return sum(b.nbytes for b in bitmaps) + self.prices.nbytes
@@ -0,0 +1,300 @@
+"""
+Compression des embeddings pour la recherche par similarité
+- ProductQuantizer: découpe les vecteurs en m sous-espaces, chacun encodé sur 1 octet
+  (index d'un centroïde parmi 2^nbits); 2048 float32 (8 Ko) -> m octets
+- PQIndex: index ANN qui scanne les codes avec des tables de distance asymétriques (ADC)
+- FP16Index / SQ8Index: matrice en float16 (2 octets/dim) ou int8 par dimension avec
+  scale/offset (1 octet/dim), scannée par blocs convertis en float32
+
+Les scores compressés sont approximatifs: SearchEngineNPY re-classe les meilleurs
+candidats avec la similarité cosinus exacte (paramètre rerank).
+"""
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+from services.ann_index import ANNIndex, kmeans, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+
+class ProductQuantizer:
+    """
+    Product quantization (Jégou et al.)
+
+    Chaque vecteur de dimension d est découpé en m sous-vecteurs de dimension d/m;
+    chaque sous-vecteur est remplacé par l'index de son centroïde le plus proche
+    dans un codebook de 2^nbits entrées appris par k-means.
+    """
+
+    def __init__(self, m: int = 64, nbits: int = 8, n_iter: int = 20,
+                 sample_size: Optional[int] = 65536, seed: int = 0):
+        """
+        Args:
+            m: Nombre de sous-espaces (doit diviser la dimension)
+            nbits: Bits par code (8 maximum: codes stockés sur 1 octet)
+            n_iter: Itérations du k-means de chaque sous-espace
+            sample_size: Taille de l'échantillon d'entraînement
+            seed: Graine aléatoire
+        """
+        if not 1 <= nbits <= 8:
+            raise ValueError(f"nbits doit être entre 1 et 8 (codes sur 1 octet): {nbits}")
+        self.m = m
+        self.nbits = nbits
+        self.ksub = 2 ** nbits
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.seed = seed
+        self.dsub = None
+        self.codebooks = None  # (m, ksub, dsub)
+
+    def train(self, vectors: np.ndarray) -> 'ProductQuantizer':
+        """Apprend un codebook par sous-espace"""
+        n, d = vectors.shape
+        if d % self.m != 0:
+            raise ValueError(f"La dimension {d} doit être divisible par m={self.m}")
+        self.dsub = d // self.m
+
+        rng = np.random.default_rng(self.seed)
+        if self.sample_size is not None and n > self.sample_size:
+            sample = np.asarray(vectors[np.sort(rng.choice(n, self.sample_size, replace=False))],
+                                dtype=np.float32)
+        else:
+            sample = np.asarray(vectors, dtype=np.float32)
+
+        ksub = min(self.ksub, sample.shape[0])
+        self.codebooks = np.zeros((self.m, self.ksub, self.dsub), dtype=np.float32)
+        for j in range(self.m):
+            sub = np.ascontiguousarray(sample[:, j * self.dsub:(j + 1) * self.dsub])
+            self.codebooks[j, :ksub] = kmeans(sub, ksub, n_iter=self.n_iter,
+                                              seed=self.seed + j, spherical=False)
+        return self
+
+    def encode(self, vectors: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """
+        Encode des vecteurs en codes PQ
+
+        Returns:
+            np.ndarray: Codes uint8 (N, m)
+        """
+        n = vectors.shape[0]
+        codes = np.empty((n, self.m), dtype=np.uint8)
+        codebook_norms = (self.codebooks ** 2).sum(axis=2)  # (m, ksub)
+        for start in range(0, n, block_size):
+            block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+            for j in range(self.m):
+                sub = block[:, j * self.dsub:(j + 1) * self.dsub]
+                # argmin ||x - c||² = argmax (2 x.c - ||c||²)
+                scores = 2 * (sub @ self.codebooks[j].T) - codebook_norms[j]
+                codes[start:start + block_size, j] = np.argmax(scores, axis=1)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruit des vecteurs approximatifs à partir des codes (N, m)"""
+        return np.concatenate([self.codebooks[j][codes[:, j]] for j in range(self.m)], axis=1)
+
+    def inner_product_tables(self, query: np.ndarray) -> np.ndarray:
+        """
+        Tables de distance asymétriques pour une requête (non quantifiée)
+
+        Returns:
+            np.ndarray: (m, ksub) avec table[j, c] = <query_j, codebook_j[c]>
+        """
+        query_subs = np.asarray(query, dtype=np.float32).reshape(self.m, self.dsub)
+        return np.einsum('jkd,jd->jk', self.codebooks, query_subs)
+
+
+class PQIndex(ANNIndex):
+    """
+    Index ANN par product quantization avec scan ADC
+
+    Les codes sont stockés par sous-espace (m, N): chaque passe de l'accumulation
+    lit une ligne contiguë de N octets.
+    """
+
+    name = 'pq'
+    exact_scores = False
+    file_parts = ('', '_codebooks')
+
+    def __init__(self, m: int = 64, nbits: int = 8, n_iter: int = 20,
+                 sample_size: Optional[int] = 65536, seed: int = 0):
+        super().__init__()
+        self.quantizer = ProductQuantizer(m=m, nbits=nbits, n_iter=n_iter,
+                                          sample_size=sample_size, seed=seed)
+        self.codes = None  # (m, N) uint8
+
+    def build(self, vectors: np.ndarray) -> 'PQIndex':
+        self.quantizer.train(vectors)
+        self.codes = np.ascontiguousarray(self.quantizer.encode(vectors).T)
+        self.ntotal = vectors.shape[0]
+        logger.info(f"Index PQ construit: {self.ntotal} vecteurs, "
+                    f"{self.quantizer.m} octets/vecteur au lieu de {vectors.shape[1] * 4}")
+        return self
+
+    def adc_scores(self, query: np.ndarray) -> np.ndarray:
+        """Scores approximatifs <query, decode(code)> pour tout le catalogue"""
+        tables = self.quantizer.inner_product_tables(query)
+        scores = np.zeros(self.ntotal, dtype=np.float32)
+        for j in range(self.quantizer.m):
+            scores += tables[j][self.codes[j]]
+        return scores
+
+    def search(self, query: np.ndarray, top_k: int, mask: Optional[np.ndarray] = None,
+               **params) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.adc_scores(query)
+        best = top_k_indices(scores, top_k, mask=mask)
+        return best, scores[best]
+
+    def memory_usage(self) -> int:
+        return self.codes.nbytes + self.quantizer.codebooks.nbytes
+
+    def code_size(self) -> int:
+        return self.quantizer.m
+
+    def _arrays(self) -> Tuple[np.ndarray, ...]:
+        return self.codes, self.quantizer.codebooks
+
+    def _load(self, arrays: Tuple[np.ndarray, ...], vectors: Optional[np.ndarray]) -> bool:
+        codes, codebooks = arrays
+        if codebooks.shape[:2] != (self.quantizer.m, self.quantizer.ksub):
+            return False
+        if vectors is not None and codes.shape[1] != vectors.shape[0]:
+            return False
+        self.quantizer.codebooks = np.asarray(codebooks)
+        self.quantizer.dsub = codebooks.shape[2]
+        self.codes = codes
+        self.ntotal = codes.shape[1]
+        return True
+
+
+class ScalarQuantizedIndex(ANNIndex):
+    """
+    Index par quantification scalaire: la matrice est stockée dans un type compact
+    et scannée par blocs (le bloc converti en float32 reste dans le cache CPU, seule
+    la version compacte transite depuis la RAM)
+
+    Le format peut être précalculé par scripts/save_features_to_npy.py à côté du
+    fichier de features (<nom>_<name>.npy, chargé en memory-map).
+    """
+
+    exact_scores = False
+    dtype = None
+    file_parts = ('',)
+
+    def __init__(self, block_size: int = 1024):
+        """
+        Args:
+            block_size: Lignes converties en float32 à la fois pendant le scan
+        """
+        super().__init__()
+        self.block_size = block_size
+        self.codes = None
+
+    def _train(self, vectors: np.ndarray) -> None:
+        """Apprend les paramètres de quantification (aucun par défaut)"""
+
+    def _encode_block(self, block: np.ndarray) -> np.ndarray:
+        return block.astype(self.dtype)
+
+    def _prepare_query(self, query: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Retourne (vecteur appliqué aux codes, constante ajoutée aux scores)"""
+        return query, 0.0
+
+    def build(self, vectors: np.ndarray) -> 'ScalarQuantizedIndex':
+        self._train(vectors)
+        self.codes = np.empty(vectors.shape, dtype=self.dtype)
+        for start in range(0, vectors.shape[0], 65536):
+            block = np.asarray(vectors[start:start + 65536], dtype=np.float32)
+            self.codes[start:start + 65536] = self._encode_block(block)
+        self.ntotal = vectors.shape[0]
+        logger.info(f"Index {self.name} construit: {self.ntotal} vecteurs, "
+                    f"{self.code_size()} octets/vecteur au lieu de {vectors.shape[1] * 4}")
+        return self
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Scores approximatifs pour tout le catalogue"""
+        query_vector, constant = self._prepare_query(np.asarray(query, dtype=np.float32))
+        scores = np.empty(self.ntotal, dtype=np.float32)
+        for start in range(0, self.ntotal, self.block_size):
+            block = self.codes[start:start + self.block_size].astype(np.float32)
+            np.matmul(block, query_vector, out=scores[start:start + self.block_size])
+        scores += constant
+        return scores
+
+    def search(self, query: np.ndarray, top_k: int, mask: Optional[np.ndarray] = None,
+               **params) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.scores(query)
+        best = top_k_indices(scores, top_k, mask=mask)
+        return best, scores[best]
+
+    def memory_usage(self) -> int:
+        return self.codes.nbytes
+
+    def code_size(self) -> int:
+        return self.codes.shape[1] * self.codes.itemsize
+
+    def _arrays(self) -> Tuple[np.ndarray, ...]:
+        return (self.codes,)
+
+    def _load(self, arrays: Tuple[np.ndarray, ...], vectors: Optional[np.ndarray]) -> bool:
+        codes = arrays[0]
+        if vectors is not None and codes.shape != vectors.shape:
+            return False
+        self.codes = codes
+        self.ntotal = codes.shape[0]
+        return True
+
+
+class FP16Index(ScalarQuantizedIndex):
+    """Matrice stockée en float16 (2 octets par dimension)"""
+
+    name = 'fp16'
+    dtype = np.float16
+
+
+class SQ8Index(ScalarQuantizedIndex):
+    """
+    Quantification int8 par dimension: x ≈ offset + scale * (code + 128)
+
+    Le produit scalaire se calcule directement sur les codes:
+    <q, x> ≈ <q * scale, code> + 128 * sum(q * scale) + <q, offset>
+    """
+
+    name = 'sq8'
+    dtype = np.int8
+    file_parts = ('', '_params')
+
+    def __init__(self, block_size: int = 1024):
+        super().__init__(block_size=block_size)
+        self.scale = None
+        self.offset = None
+
+    def _train(self, vectors: np.ndarray) -> None:
+        minimum = np.full(vectors.shape[1], np.inf, dtype=np.float32)
+        maximum = np.full(vectors.shape[1], -np.inf, dtype=np.float32)
+        for start in range(0, vectors.shape[0], 65536):
+            block = np.asarray(vectors[start:start + 65536], dtype=np.float32)
+            np.minimum(minimum, block.min(axis=0), out=minimum)
+            np.maximum(maximum, block.max(axis=0), out=maximum)
+        self.offset = minimum
+        self.scale = np.where(maximum > minimum, (maximum - minimum) / 255.0, 1.0).astype(
+            np.float32
+        )
+
+    def _encode_block(self, block: np.ndarray) -> np.ndarray:
+        codes = np.rint((block - self.offset) / self.scale) - 128
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def _prepare_query(self, query: np.ndarray) -> Tuple[np.ndarray, float]:
+        scaled = query * self.scale
+        return scaled, float(128.0 * scaled.sum() + query @ self.offset)
+
+    def _arrays(self) -> Tuple[np.ndarray, ...]:
+        return self.codes, np.stack([self.scale, self.offset])
+
+    def _load(self, arrays: Tuple[np.ndarray, ...], vectors: Optional[np.ndarray]) -> bool:
+        if not super()._load(arrays[:1], vectors):
+            return False
+        self.scale, self.offset = np.array(arrays[1])
+        return True
@@ -0,0 +1,246 @@
+"""
+Search Engine qui charge un index FAISS (backend/data/faiss_index_flat.bin)
+Même contrat search_similar que SearchEngineNPY; si faiss n'est pas installé,
+un lecteur NumPy du format IndexFlat prend le relais (index plats uniquement)
+"""
+import numpy as np
+import logging
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from services.ann_index import top_k_indices
+from services.search_engine_npy import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+    logger.info("faiss not available. SearchEngineFAISS will use the NumPy flat index reader.")
+
+DEFAULT_INDEX_PATH = Path(__file__).parent.parent / 'data' / 'faiss_index_flat.bin'
+
+# Codes du format FAISS (faiss/impl/index_write.cpp)
+FLAT_INDEX_FOURCC = {b'IxF2': 'l2', b'IxFI': 'inner_product'}
+METRIC_INNER_PRODUCT = 0
+METRIC_L2 = 1
+
+
+def ids_path_for(index_path) -> Path:
+    """Chemin du fichier d'ids associé à un index (<nom>_ids.npy)"""
+    index_path = Path(index_path)
+    return index_path.with_name(f"{index_path.stem}_ids.npy")
+
+
+def read_flat_index_numpy(index_path) -> Tuple[np.ndarray, int]:
+    """
+    Lit un IndexFlatL2 / IndexFlatIP FAISS sans la librairie faiss
+
+    Format: fourcc, d (int32), ntotal (int64), 2 x dummy (int64), is_trained (uint8),
+    metric_type (int32), [metric_arg (float32) si metric_type > 1],
+    puis le vecteur des codes: taille (uint64) + ntotal * d float32
+
+    Returns:
+        Tuple (vecteurs (ntotal, d) float32, metric_type)
+    """
+    with open(index_path, 'rb') as f:
+        data = f.read()
+
+    fourcc = data[:4]
+    if fourcc not in FLAT_INDEX_FOURCC:
+        raise ValueError(f"Index FAISS non plat ({fourcc!r}): installez faiss pour le lire")
+
+    d, ntotal = struct.unpack_from('<iq', data, 4)
+    offset = 4 + 4 + 8 + 8 + 8
+    is_trained, metric_type = struct.unpack_from('<Bi', data, offset)
+    offset += 1 + 4
+    if metric_type > 1:
+        offset += 4  # metric_arg
+
+    (size,) = struct.unpack_from('<Q', data, offset)
+    offset += 8
+    # Anciennes versions: taille en floats; récentes: taille en octets
+    if size == ntotal * d * 4 and len(data) - offset == size:
+        size //= 4
+    if size != ntotal * d:
+        raise ValueError(f"Index FAISS corrompu: {size} valeurs pour {ntotal} x {d}")
+
+    vectors = np.frombuffer(data, dtype='<f4', count=size, offset=offset).reshape(ntotal, d)
+    return vectors, metric_type
+
+
+class SearchEngineFAISS:
+    """
+    Moteur de recherche par similarité basé sur un index FAISS
+    Les index sont construits sur des vecteurs normalisés L2 (scripts/build_faiss_index.py):
+    le score retourné est donc la similarité cosinus, comme SearchEngineNPY
+    """
+
+    search_methods = ('cosine',)
+
+    def __init__(self, nprobe: Optional[int] = None, use_faiss: bool = True):
+        """
+        Args:
+            nprobe: Nombre de cellules scannées par défaut pour les index IVF
+            use_faiss: Si False, force le lecteur NumPy (index plats uniquement)
+        """
+        self.nprobe = nprobe
+        self.use_faiss = use_faiss and FAISS_AVAILABLE
+        self.index = None
+        self.feature_database = None  # Utilisé seulement par le lecteur NumPy
+        self.product_ids = None
+        self.metric_type = METRIC_L2
+        self._row_by_product_id: Dict[int, int] = {}
+        self._index_built = False
+        self._is_ivf = False  # nprobe passé par requête (SearchParametersIVF)
+
+    def load_index(self, index_path=None, ids_path=None) -> bool:
+        """
+        Charge un index FAISS et le fichier d'ids associé
+
+        Args:
+            index_path: Chemin vers l'index (défaut: data/faiss_index_flat.bin)
+            ids_path: Chemin vers les ids produits (défaut: <index>_ids.npy)
+
+        Returns:
+            bool: True si le chargement a réussi
+        """
+        try:
+            index_path = Path(index_path) if index_path else DEFAULT_INDEX_PATH
+            ids_path = Path(ids_path) if ids_path else ids_path_for(index_path)
+
+            if not index_path.exists():
+                logger.error(f"Index FAISS non trouvé: {index_path}")
+                return False
+            if not ids_path.exists():
+                logger.error(f"Fichier ids non trouvé: {ids_path}")
+                return False
+
+            self.product_ids = np.load(ids_path)
+
+            if self.use_faiss:
+                self.index = faiss.read_index(str(index_path))
+                self.metric_type = self.index.metric_type
+                self._is_ivf = isinstance(faiss.downcast_index(self.index), faiss.IndexIVF)
+                ntotal = self.index.ntotal
+            else:
+                vectors, self.metric_type = read_flat_index_numpy(index_path)
+                self._is_ivf = False
+                self.feature_database = normalize_rows(vectors)
+                ntotal = vectors.shape[0]
+
+            if ntotal != len(self.product_ids):
+                logger.error(f"Index ({ntotal}) et ids ({len(self.product_ids)}) incohérents")
+                return False
+
+            self._row_by_product_id = {int(pid): row for row, pid in enumerate(self.product_ids)}
+            self._index_built = True
+            logger.info(f"Index FAISS chargé depuis {index_path} "
+                        f"({ntotal} vecteurs, {'faiss' if self.use_faiss else 'lecteur NumPy'})")
+            return True
+
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de l'index FAISS: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return False
+
+    def is_index_ready(self) -> bool:
+        """Vérifie si l'index est prêt"""
+        return self._index_built and (self.index is not None or self.feature_database is not None)
+
+    def get_feature_vector(self, product_id: int) -> Optional[np.ndarray]:
+        """
+        Retourne le vecteur d'un produit indexé (None si absent ou non reconstructible)
+        """
+        row = self._row_by_product_id.get(int(product_id))
+        if row is None or not self.is_index_ready():
+            return None
+        if not self.use_faiss:
+            return self.feature_database[row]
+        try:
+            return self.index.reconstruct(row)
+        except RuntimeError:
+            # Index IVF sans direct map
+            logger.warning("Index FAISS non reconstructible, recherche par id indisponible")
+            return None
+
+    def is_method_available(self, method: str) -> bool:
+        """Vérifie qu'une méthode est utilisable (le type d'index est fixé par le fichier)"""
+        return method in self.search_methods
+
+    def build_filter_mask(self, exclude_product_ids=(), **filters) -> Optional[np.ndarray]:
+        """Pas de bitmaps d'attributs: les filtres sont appliqués en SQL après la recherche"""
+        return None
+
+    def _to_cosine(self, distances: np.ndarray) -> np.ndarray:
+        """Convertit les distances FAISS en similarité cosinus (vecteurs normalisés)"""
+        if self.metric_type == METRIC_L2:
+            # ||a - b||² = 2 - 2 cos(a, b)
+            return 1.0 - distances / 2.0
+        return distances
+
+    def search_similar(self, query_features: np.ndarray, top_k: int = 10,
+                       min_similarity: float = 0.0,
+                       method: str = 'cosine', nprobe: Optional[int] = None,
+                       **search_params) -> List[Dict]:
+        """
+        Trouve les produits similaires (même contrat que SearchEngineNPY.search_similar)
+
+        Args:
+            query_features: Vecteur de features de l'image query (shape: (1, 2048) ou (2048,))
+            top_k: Nombre de résultats à retourner
+            min_similarity: Score de similarité minimum (0.0 à 1.0)
+            method: 'cosine' uniquement (le type d'index est fixé par le fichier chargé)
+            nprobe: Cellules scannées pour un index IVF (défaut: self.nprobe)
+
+        Returns:
+            Liste de dictionnaires avec 'product_id' et 'similarity_score'
+        """
+        if not self.is_index_ready():
+            logger.warning("Index non construit, impossible de rechercher")
+            return []
+
+        if method not in self.search_methods:
+            raise ValueError(f"Méthode invalide: {method}. Utilisez 'cosine'")
+
+        try:
+            if len(query_features.shape) == 1:
+                query_features = query_features.reshape(1, -1)
+            elif len(query_features.shape) == 2 and query_features.shape[0] != 1:
+                raise ValueError(f"Shape invalide pour query_features: {query_features.shape}")
+
+            query = normalize_rows(query_features)
+
+            if self.use_faiss:
+                # Paramètres propres à l'appel: l'index partagé entre threads n'est pas modifié
+                nprobe = nprobe or self.nprobe
+                params = None
+                if nprobe and self._is_ivf:
+                    params = faiss.SearchParametersIVF(nprobe=nprobe)
+                distances, indices = self.index.search(query, top_k, params=params)
+                top_scores = self._to_cosine(distances[0])
+                top_indices = indices[0]
+            else:
+                similarities = self.feature_database @ query[0]
+                top_indices = top_k_indices(similarities, top_k)
+                top_scores = similarities[top_indices]
+
+            results = []
+            for idx, score in zip(top_indices, top_scores):
+                score = float(score)
+                if idx < 0 or score < min_similarity:
+                    break
+                results.append({
+                    'product_id': int(self.product_ids[idx]),
+                    'similarity_score': score
+                })
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la recherche FAISS: {e}")
+            return []
@@ -5,24 +5,130 @@ Au lieu de la base de données, utilise des fichiers .npy pour plus de simplicit
 import numpy as np
 import json
 import logging
+import os
+import threading
 from pathlib import Path
 from typing import List, Dict, Optional
-from sklearn.metrics.pairwise import cosine_similarity
+
+from services.ann_index import ANNIndex, HNSWIndex, IVFIndex, batch_top_k_indices, top_k_indices
+from services.product_filters import ProductAttributes
+from services.quantization import FP16Index, PQIndex, SQ8Index
 
 logger = logging.getLogger(__name__)
 
+# Types d'index ANN, sélectionnables via le paramètre 'method'
+ANN_INDEX_TYPES = {
+    index_type.name: index_type
+    for index_type in (IVFIndex, HNSWIndex, PQIndex, FP16Index, SQ8Index)
+}
+
+# 'cosine' = recherche exacte (vérité terrain), les autres méthodes sont des index ANN
+SEARCH_METHODS = ('cosine',) + tuple(ANN_INDEX_TYPES)
+
+# Taille max (en float32) de la matrice de scores d'un bloc de requêtes (256 Mo)
+BATCH_SCORES_BUDGET = 64 * 1024 * 1024
+
+# En dessous de ce nombre de lignes retenues par les filtres, les méthodes ANN
+# basculent sur un scan exact des seules lignes filtrées (plus rapide et exact)
+FILTER_EXACT_SCAN_ROWS = 2048
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Normalise L2 chaque ligne d'une matrice (float32, C-contiguë)
+    
+    Les lignes de norme nulle sont laissées à zéro (similarité 0 avec tout).
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def normalized_features_path(features_path) -> Path:
+    """Chemin de la version pré-normalisée d'un fichier de features (<nom>_normalized.npy)"""
+    features_path = Path(features_path)
+    return features_path.with_name(f"{features_path.stem}_normalized.npy")
+
+
+def write_normalized_features(features_path, output_path=None, block_size: int = 65536) -> Path:
+    """
+    Écrit la version normalisée L2, float32 C-contiguë d'un fichier de features
+    
+    Ce format est chargé avec mmap_mode='r': tous les workers partagent la même
+    copie en page cache et le démarrage ne dépend plus de la taille du catalogue.
+    L'écriture se fait par blocs dans un fichier temporaire puis os.replace
+    (atomique), pour qu'un worker ne lise jamais un fichier à moitié écrit.
+    
+    Returns:
+        Path: Chemin du fichier normalisé
+    """
+    features_path = Path(features_path)
+    output_path = Path(output_path) if output_path else normalized_features_path(features_path)
+    raw = np.load(features_path, mmap_mode='r')
+    
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    normalized = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=raw.shape)
+    for start in range(0, raw.shape[0], block_size):
+        normalized[start:start + block_size] = normalize_rows(raw[start:start + block_size])
+    normalized.flush()
+    del normalized
+    os.replace(tmp_path, output_path)
+    
+    logger.info(f"Features normalisées écrites: {output_path}")
+    return output_path
+
+
+def load_normalized_features(features_path) -> np.ndarray:
+    """
+    Charge les features normalisées en mémoire partagée (np.load mmap_mode='r')
+    
+    Le fichier <nom>_normalized.npy est (re)généré s'il manque ou s'il est plus
+    ancien que le fichier de features brut.
+    """
+    features_path = Path(features_path)
+    normalized_path = normalized_features_path(features_path)
+    if (not normalized_path.exists()
+            or normalized_path.stat().st_mtime < features_path.stat().st_mtime):
+        try:
+            write_normalized_features(features_path, normalized_path)
+        except OSError as e:
+            # Dossier data en lecture seule: normaliser en mémoire privée
+            logger.warning(f"Impossible d'écrire {normalized_path} ({e}), chargement sans mmap")
+            return normalize_rows(np.load(features_path))
+    return np.load(normalized_path, mmap_mode='r')
+
+
 class SearchEngineNPY:
     """
     Moteur de recherche par similarité d'images
     Charge les features depuis des fichiers .npy au lieu de la base de données
     """
     
-    def __init__(self):
+    search_methods = SEARCH_METHODS
+    
+    def __init__(self, ann_params: Optional[Dict[str, Dict]] = None, rerank: int = 100):
+        """
+        Args:
+            ann_params: Paramètres de construction par type d'index ANN
+                        (ex: {'ivf': {'nlist': 1024, 'nprobe': 16}, 'hnsw': {'M': 16}})
+            rerank: Nombre de candidats re-classés en cosinus exact pour les index
+                    compressés (0 = scores approximatifs seulement)
+        """
         self.feature_database = None
+        self.features_path = None
         self.product_ids = None
+        self._row_by_product_id: Optional[Dict[int, int]] = None
+        self.attributes: Optional[ProductAttributes] = None
         self._index_built = False
+        self.ann_params = ann_params or {}
+        self.rerank = rerank
+        self._ann_indexes: Dict[str, ANNIndex] = {}
+        self._ann_lock = threading.RLock()
     
-    def load_features_from_npy(self, features_path=None, product_ids_path=None, products_json_path=None):
+    def load_features_from_npy(
+        self, features_path=None, product_ids_path=None, products_json_path=None, mmap: bool = True
+    ):
         """
         Charge les features depuis des fichiers .npy
         
@@ -30,6 +136,8 @@ class SearchEngineNPY:
             features_path: Chemin vers product_features_resnet50.npy
             product_ids_path: Chemin vers product_ids.npy (ou product_labels.npy)
             products_json_path: Chemin vers products.json (pour mapper les indices aux vrais IDs)
+            mmap: Si True, charge la version pré-normalisée en memory-map (partagée
+                  entre workers); sinon charge et normalise en mémoire privée
         
         Returns:
             bool: True si le chargement a réussi
@@ -62,7 +170,13 @@ class SearchEngineNPY:
                 return False
             
             # Charger les features
-            self.feature_database = np.load(features_path)
+            # Normalisation L2 faite UNE SEULE FOIS (au chargement, ou sur disque en
+            # mode mmap): la similarité cosinus devient un simple produit scalaire
+            if mmap:
+                self.feature_database = load_normalized_features(features_path)
+            else:
+                self.feature_database = normalize_rows(np.load(features_path))
+            self.features_path = features_path
             
             # Charger les product_ids
             # Si products.json existe, utiliser les vrais IDs depuis products.json (champ db_id)
@@ -74,29 +188,47 @@ class SearchEngineNPY:
                 
                 # Extraire les vrais IDs de la base de données (champ db_id)
                 # Si db_id n'existe pas, chercher dans la base de données par nom
+                # (une seule requête pour tous les produits concernés)
+                missing_names = [p['name'] for p in products_info if 'db_id' not in p]
+                ids_by_name = {}
+                if missing_names:
+                    from models.database import get_db
+                    db = get_db()
+                    query = """
+                        SELECT DISTINCT ON (name) name, id FROM products
+                        WHERE name = ANY(%s) ORDER BY name, id
+                    """
+                    result = db.execute_query(query, (list(set(missing_names)),))
+                    ids_by_name = {row['name']: row['id'] for row in result or []}
+                
                 real_product_ids = []
                 for i, product_info in enumerate(products_info):
                     if 'db_id' in product_info:
                         # Utiliser le vrai ID de la base de données
                         real_product_ids.append(product_info['db_id'])
                     else:
-                        # Fallback: chercher dans la base de données
-                        from models.database import get_db
-                        db = get_db()
-                        query = "SELECT id FROM products WHERE name = %s ORDER BY id LIMIT 1"
-                        result = db.execute_query(query, (product_info['name'],))
-                        if result:
-                            real_product_ids.append(result[0]['id'])
-                        else:
-                            # Dernier fallback: utiliser l'index
-                            real_product_ids.append(i)
+                        # Fallback: id trouvé par nom, sinon l'index
+                        real_product_ids.append(ids_by_name.get(product_info['name'], i))
                 
                 self.product_ids = np.array(real_product_ids)
                 logger.info(f"Product IDs mappés depuis products.json: {len(real_product_ids)} produits")
+                
+                # Attributs filtrables (catégorie, prix); remplacés par ceux de la base
+                # de données via load_attributes() quand elle est disponible
+                self.attributes = ProductAttributes.from_records(
+                    self.product_ids,
+                    [
+                        {**product_info, 'id': pid}
+                        for product_info, pid in zip(products_info, real_product_ids)
+                    ],
+                )
             else:
                 # Pas de products.json, utiliser les indices directement
                 self.product_ids = np.load(product_ids_path)
+                self.attributes = None
             
+            self._row_by_product_id = {int(pid): row for row, pid in enumerate(self.product_ids)}
+            self._ann_indexes = {}
             self._index_built = True
             
             logger.info(f"Features chargées depuis {features_path}")
@@ -115,9 +247,201 @@ class SearchEngineNPY:
         """Vérifie si l'index est prêt"""
         return self._index_built and self.feature_database is not None
     
+    def load_attributes(self, records) -> None:
+        """
+        (Re)construit les bitmaps de filtres à partir de lignes produits
+        
+        Args:
+            records: Dictionnaires avec 'id', 'category', 'brand', 'color', 'price'
+                     (ex: SELECT id, category, brand, color, price FROM products)
+        """
+        self.attributes = ProductAttributes.from_records(self.product_ids, records)
+    
+    def build_filter_mask(self, exclude_product_ids=(), **filters) -> Optional[np.ndarray]:
+        """
+        Masque booléen des lignes satisfaisant les filtres (voir ProductAttributes.build_mask)
+        
+        Args:
+            exclude_product_ids: Produits à exclure en plus des filtres
+        
+        Returns:
+            Masque (N,), ou None si les attributs ne sont pas chargés
+        """
+        if self.attributes is None:
+            return None
+        mask = self.attributes.build_mask(**filters)
+        for product_id in exclude_product_ids:
+            row = self._row_of(product_id)
+            if row is not None:
+                mask[row] = False
+        return mask
+    
+    def get_product_category(self, product_id: int) -> Optional[str]:
+        """Catégorie d'un produit indexé, d'après les attributs chargés"""
+        row = self._row_of(product_id)
+        if row is None or self.attributes is None:
+            return None
+        return self.attributes.category_of(row)
+    
+    def _row_of(self, product_id: int) -> Optional[int]:
+        """Ligne de feature_database d'un produit (None s'il n'est pas indexé)"""
+        if self._row_by_product_id is None:
+            self._row_by_product_id = {int(pid): row for row, pid in enumerate(self.product_ids)}
+        return self._row_by_product_id.get(int(product_id))
+    
+    def get_feature_vector(self, product_id: int) -> Optional[np.ndarray]:
+        """
+        Retourne le vecteur (normalisé) d'un produit du catalogue, sans réextraction
+        
+        Returns:
+            Vecteur (2048,) float32, ou None si le produit n'est pas indexé
+        """
+        if not self.is_index_ready():
+            return None
+        row = self._row_of(product_id)
+        if row is None:
+            return None
+        return np.asarray(self.feature_database[row], dtype=np.float32)
+    
+    def build_ann_index(self, method: str, save: bool = False, **params) -> ANNIndex:
+        """
+        Construit (ou reconstruit) un index ANN sur le catalogue chargé
+        
+        Jamais appelé sur le chemin d'une requête: par scripts/build_ann_index.py
+        (avec save=True) ou au démarrage pour les méthodes de ANN_PREBUILD.
+        
+        Args:
+            method: Type d'index ('ivf', 'hnsw', 'pq', 'fp16' ou 'sq8')
+            save: Si True, écrit l'index construit à côté du fichier de features
+            **params: Paramètres de construction (surchargent ann_params)
+        
+        Returns:
+            ANNIndex construit
+        """
+        if method not in ANN_INDEX_TYPES:
+            raise ValueError(
+                f"Index ANN inconnu: {method}. Disponibles: {', '.join(ANN_INDEX_TYPES)}"
+            )
+        if not self.is_index_ready():
+            raise ValueError("Features non chargées, impossible de construire l'index ANN")
+        
+        build_params = {**self.ann_params.get(method, {}), **params}
+        with self._ann_lock:
+            index = ANN_INDEX_TYPES[method](**build_params)
+            # Format précalculé à jour si disponible
+            loaded = self.features_path and index.load_from(
+                self.features_path, self.feature_database
+            )
+            if not loaded:
+                index.build(self.feature_database)
+                if save and self.features_path:
+                    index.save(self.features_path)
+            self._ann_indexes[method] = index
+        return index
+    
+    def load_ann_indexes(self) -> List[str]:
+        """
+        Charge les index ANN précalculés à côté du fichier de features (sans construction)
+        
+        Returns:
+            Liste des méthodes chargées
+        """
+        loaded = []
+        if not self.is_index_ready() or not self.features_path:
+            return loaded
+        for method, index_type in ANN_INDEX_TYPES.items():
+            index = index_type(**self.ann_params.get(method, {}))
+            if index.load_from(self.features_path, self.feature_database):
+                with self._ann_lock:
+                    self._ann_indexes[method] = index
+                loaded.append(method)
+        return loaded
+    
+    def is_method_available(self, method: str) -> bool:
+        """Vérifie qu'une méthode est utilisable sans construire d'index"""
+        return method == 'cosine' or method in self._ann_indexes
+    
+    def get_ann_index(self, method: str) -> ANNIndex:
+        """
+        Retourne l'index ANN demandé, chargé ou construit au démarrage
+        
+        Raises:
+            ValueError: Index non préconstruit (jamais construit pendant une requête)
+        """
+        index = self._ann_indexes.get(method)
+        if index is None:
+            raise ValueError(
+                f"Index ANN '{method}' non disponible: exécutez scripts/build_ann_index.py "
+                f"ou ajoutez-le à ANN_PREBUILD"
+            )
+        return index
+    
+    def _search_exact(self, query_vector: np.ndarray, top_k: int,
+                      mask: Optional[np.ndarray] = None):
+        """
+        Scan exact (cosinus) du catalogue, restreint aux lignes du masque
+        
+        Returns:
+            Tuple (indices de lignes, scores) triés par score décroissant
+        """
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            if len(rows) < self.feature_database.shape[0] // 2:
+                # Filtre sélectif: seules les lignes retenues sont lues et scorées
+                similarities = self.feature_database[rows] @ query_vector
+                best = top_k_indices(similarities, top_k)
+                return rows[best], similarities[best]
+        
+        # Similarité cosinus = produit scalaire entre vecteurs normalisés
+        similarities = self.feature_database @ query_vector
+        
+        # Sélection top-k (argpartition) puis tri des k gagnants uniquement
+        top_indices = top_k_indices(similarities, top_k, mask=mask)
+        return top_indices, similarities[top_indices]
+    
+    def _search_ann(self, method: str, query_vector: np.ndarray, top_k: int,
+                    rerank: Optional[int] = None, mask: Optional[np.ndarray] = None,
+                    **search_params):
+        """
+        Recherche via un index ANN, avec re-ranking exact pour les index compressés
+        
+        Returns:
+            Tuple (indices de lignes, scores) triés par score décroissant
+        """
+        if mask is not None and np.count_nonzero(mask) <= FILTER_EXACT_SCAN_ROWS:
+            return self._search_exact(query_vector, top_k, mask)
+        
+        index = self.get_ann_index(method)
+        rerank = self.rerank if rerank is None else rerank
+        if index.exact_scores or rerank <= 0:
+            return index.search(query_vector, top_k, mask=mask, **search_params)
+        
+        # Candidats issus des codes compressés, puis cosinus exact sur les vecteurs
+        # float32 (seules ces lignes sont lues, même en memory-map)
+        candidates, _ = index.search(query_vector, max(top_k, rerank), mask=mask, **search_params)
+        candidates = np.sort(candidates)
+        scores = self.feature_database[candidates] @ query_vector
+        best = top_k_indices(scores, top_k)
+        return candidates[best], scores[best]
+    
+    def _format_results(self, top_indices: np.ndarray, top_scores: np.ndarray,
+                        min_similarity: float) -> List[Dict]:
+        """Convertit des (indices de lignes, scores) triés en résultats (>= min_similarity)"""
+        results = []
+        for idx, score in zip(top_indices, top_scores):
+            score = float(score)
+            if score < min_similarity:
+                break
+            results.append({
+                'product_id': int(self.product_ids[idx]),
+                'similarity_score': score
+            })
+        return results
+    
     def search_similar(self, query_features: np.ndarray, top_k: int = 10, 
                       min_similarity: float = 0.0,
-                      method: str = 'cosine') -> List[Dict]:
+                      method: str = 'cosine', mask: Optional[np.ndarray] = None,
+                      **search_params) -> List[Dict]:
         """
         Trouve les produits similaires en utilisant cosine similarity
         
@@ -125,7 +449,11 @@ class SearchEngineNPY:
             query_features: Vecteur de features de l'image query (shape: (1, 2048) ou (2048,))
             top_k: Nombre de résultats à retourner
             min_similarity: Score de similarité minimum (0.0 à 1.0)
-            method: Méthode de comparaison ('cosine' uniquement pour l'instant)
+            method: 'cosine' (scan exact) ou un index ANN ('ivf', 'hnsw', 'pq', 'fp16', 'sq8')
+            mask: Masque booléen des lignes autorisées (voir build_filter_mask),
+                  appliqué avant la sélection top-k
+            **search_params: Paramètres de recherche ANN (nprobe pour 'ivf', ef pour 'hnsw',
+                             rerank pour les index compressés)
         
         Returns:
             Liste de dictionnaires avec 'product_id' et 'similarity_score'
@@ -134,8 +462,8 @@ class SearchEngineNPY:
             logger.warning("Index non construit, impossible de rechercher")
             return []
         
-        if method != 'cosine':
-            raise ValueError(f"Méthode invalide: {method}. Utilisez 'cosine'")
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Méthode invalide: {method}. Utilisez {', '.join(SEARCH_METHODS)}")
         
         try:
             # S'assurer que query_features est de la bonne forme
@@ -144,30 +472,82 @@ class SearchEngineNPY:
             elif len(query_features.shape) == 2 and query_features.shape[0] != 1:
                 raise ValueError(f"Shape invalide pour query_features: {query_features.shape}")
             
-            query_vector = query_features[0]  # Shape: (2048,)
-            
-            # Calculer la similarité cosinus
-            # IMPORTANT: cosine_similarity de sklearn normalise AUTOMATIQUEMENT les vecteurs
-            # Donc les features n'ont pas besoin d'être normalisées L2 avant
-            # Cela fonctionne même si query_features et feature_database ne sont pas normalisés
-            similarities = cosine_similarity(query_features, self.feature_database)[0]
-            
-            # Trier par similarité décroissante (plus élevé = plus similaire)
-            top_indices = np.argsort(similarities)[::-1]
+            # Normaliser la requête (le catalogue est déjà normalisé au chargement)
+            query_vector = np.ascontiguousarray(query_features[0], dtype=np.float32)
+            query_norm = np.linalg.norm(query_vector)
+            if query_norm > 0:
+                query_vector = query_vector / query_norm
             
-            # Filtrer par min_similarity et prendre top_k
-            results = []
-            for idx in top_indices:
-                score = float(similarities[idx])
-                if score >= min_similarity and len(results) < top_k:
-                    results.append({
-                        'product_id': int(self.product_ids[idx]),
-                        'similarity_score': score
-                    })
+            if method == 'cosine':
+                top_indices, top_scores = self._search_exact(query_vector, top_k, mask)
+            else:
+                top_indices, top_scores = self._search_ann(method, query_vector, top_k, mask=mask,
+                                                           **search_params)
             
-            return results
+            return self._format_results(top_indices, top_scores, min_similarity)
             
         except Exception as e:
             logger.error(f"Erreur lors de la recherche: {e}")
             return []
-
+    
+    def search_similar_batch(self, queries: np.ndarray, top_k: int = 10,
+                             min_similarity: float = 0.0, method: str = 'cosine',
+                             block_size: Optional[int] = None, mask: Optional[np.ndarray] = None,
+                             **search_params) -> List[List[Dict]]:
+        """
+        Recherche les produits similaires pour un bloc de requêtes
+        
+        En mode 'cosine', chaque bloc de requêtes est scoré avec un seul produit
+        matriciel (GEMM) contre tout le catalogue, puis top-k par ligne. Les index
+        ANN sont interrogés requête par requête.
+        
+        Args:
+            queries: Matrice de features (n_queries, 2048)
+            top_k: Nombre de résultats par requête
+            min_similarity: Score de similarité minimum (0.0 à 1.0)
+            method: 'cosine' ou un index ANN (voir search_similar)
+            block_size: Requêtes par GEMM (None = borné par BATCH_SCORES_BUDGET)
+            mask: Masque booléen des lignes autorisées, commun à toutes les requêtes
+            **search_params: Paramètres de recherche ANN
+        
+        Returns:
+            Une liste de résultats (comme search_similar) par requête, dans l'ordre
+        """
+        if not self.is_index_ready():
+            logger.warning("Index non construit, impossible de rechercher")
+            return []
+        
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Méthode invalide: {method}. Utilisez {', '.join(SEARCH_METHODS)}")
+        
+        queries = normalize_rows(np.atleast_2d(queries))
+        
+        if method != 'cosine':
+            return [
+                self._format_results(
+                    *self._search_ann(method, query, top_k, mask=mask, **search_params),
+                    min_similarity,
+                )
+                for query in queries
+            ]
+        
+        # Avec un filtre, le GEMM ne porte que sur les lignes retenues
+        rows, database = None, self.feature_database
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            database = self.feature_database[rows]
+        n_queries, n_products = queries.shape[0], database.shape[0]
+        
+        if block_size is None:
+            block_size = max(1, BATCH_SCORES_BUDGET // max(n_products, 1))
+        
+        results = []
+        for start in range(0, n_queries, block_size):
+            scores = queries[start:start + block_size] @ database.T
+            top_indices = batch_top_k_indices(scores, top_k)
+            top_scores = np.take_along_axis(scores, top_indices, axis=1)
+            if rows is not None:
+                top_indices = rows[top_indices]
+            for row_indices, row_scores in zip(top_indices, top_scores):
+                results.append(self._format_results(row_indices, row_scores, min_similarity))
+        return results
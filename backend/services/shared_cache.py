@@ -0,0 +1,368 @@
+"""
+Cache partagé entre les workers d'une même machine (fichier SQLite en WAL)
+Les valeurs sont désérialisées avec pickle: le fichier et son dossier doivent
+appartenir à l'utilisateur du serveur et n'être accessibles qu'à lui (0600/0700),
+sinon n'importe quel processus local pourrait exécuter du code dans les workers.
+Chaque worker gunicorn garde son MemoryCache (L1); ce fichier sert de L2 commun:
+un résultat calculé par un worker est réutilisé par les autres, et les vidages /
+invalidations sont journalisés pour que chaque worker purge son L1 (voir
+TieredCache dans services/cache.py).
+"""
+import os
+import json
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    stale_until REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prefix TEXT NOT NULL,
+    exact INTEGER NOT NULL DEFAULT 0,
+    origin TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    origin TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    stats TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Un worker qui n'a rien publié depuis ce délai n'apparaît plus dans les stats
+WORKER_TIMEOUT = 300
+# Durée de conservation du journal des invalidations
+INVALIDATION_RETENTION = 3600
+# Fréquence (en écritures) du contrôle de la taille du fichier
+SIZE_CHECK_EVERY = 64
+
+
+class SharedCache:
+    """
+    Stockage clé -> valeur (pickle) avec expiration, commun à tous les processus
+    qui ouvrent le même fichier
+
+    Les erreurs SQLite (verrou, disque plein...) ne remontent pas: le cache se
+    comporte comme un miss et l'erreur est comptée dans 'errors'.
+    """
+
+    def __init__(self, path, max_bytes: int = 512 * 1024 * 1024, timeout: float = 5.0):
+        """
+        Args:
+            path: Fichier SQLite (créé au besoin)
+            max_bytes: Taille maximale des valeurs stockées (octets)
+            timeout: Attente maximale d'un verrou d'écriture (secondes)
+        """
+        self.path = Path(path)
+        self.max_bytes = max(1, max_bytes)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0}
+        self._writes = 0
+        self.errors = 0
+        self._instance = uuid.uuid4().hex[:8]
+        self._secure_path()
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        columns = [row[1] for row in connection.execute('PRAGMA table_info(invalidations)')]
+        if 'exact' not in columns:
+            connection.execute(
+                'ALTER TABLE invalidations ADD COLUMN exact INTEGER NOT NULL DEFAULT 0'
+            )
+
+    def _secure_path(self) -> None:
+        """
+        Crée le dossier (0700) et le fichier (0600), et refuse un emplacement
+        modifiable par un autre utilisateur
+
+        Raises:
+            PermissionError: Dossier ou fichier d'un autre utilisateur, ou dossier
+                accessible en écriture au groupe / aux autres (ex: /tmp)
+        """
+        directory = self.path.parent
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        uid = os.getuid()
+        for target in (directory, self.path):
+            if target.exists() and target.stat().st_uid != uid:
+                raise PermissionError(f"{target} n'appartient pas à l'utilisateur du serveur")
+        if directory.stat().st_mode & 0o022:
+            raise PermissionError(
+                f"{directory} est accessible en écriture à d'autres utilisateurs"
+            )
+        os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(self.path, 0o600)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connexion du thread courant (rouverte après un fork de worker)"""
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(str(self.path), timeout=self.timeout,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    @property
+    def origin(self) -> str:
+        """Identifiant du worker (pid + instance: distinct après un fork)"""
+        return f"{os.getpid()}-{self._instance}"
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"Cache partagé ({operation}) indisponible: {error}")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._pending[name] += 1
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Returns:
+            (valeur, expires_at, stale_until) si l'entrée est valide, sinon None
+        """
+        try:
+            row = self._connection().execute(
+                'SELECT value, expires_at, stale_until FROM entries '
+                'WHERE key = ? AND expires_at >= ?',
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+            value = pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            self._failed('get', e)
+            return None
+        self._count('hits')
+        return value, row[1], row[2]
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0) -> None:
+        """Stocke une valeur (remplace l'entrée existante)"""
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(blob) > self.max_bytes:
+                return
+            now = time.time()
+            self._connection().execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, expires_at, stale_until) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, blob, len(blob), now + ttl, now + ttl + stale_ttl)
+            )
+        except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError) as e:
+            self._failed('set', e)
+            return
+        with self._lock:
+            self._writes += 1
+            check_size = self._writes % SIZE_CHECK_EVERY == 0
+        if check_size:
+            self.enforce_size()
+
+    def delete(self, key: str) -> bool:
+        """
+        Supprime une seule entrée (clé exacte) et journalise la suppression pour
+        les L1 des autres workers
+
+        Returns:
+            True si l'entrée était dans le fichier
+        """
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                removed = connection.execute('DELETE FROM entries WHERE key = ?', (key,)).rowcount
+                connection.execute(
+                    'INSERT INTO invalidations (prefix, exact, origin, created_at) '
+                    'VALUES (?, 1, ?, ?)',
+                    (key, self.origin, time.time())
+                )
+        except sqlite3.Error as e:
+            self._failed('delete', e)
+            return False
+        return removed > 0
+
+    def invalidate(self, prefix: str) -> int:
+        """
+        Supprime les entrées dont la clé commence par prefix ('' = toutes) et
+        journalise l'invalidation pour les L1 des autres workers
+
+        Returns:
+            Nombre d'entrées supprimées du fichier
+        """
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                if prefix:
+                    removed = connection.execute(
+                        'DELETE FROM entries WHERE substr(key, 1, ?) = ?', (len(prefix), prefix)
+                    ).rowcount
+                else:
+                    removed = connection.execute('DELETE FROM entries').rowcount
+                    connection.execute('DELETE FROM counters')
+                connection.execute(
+                    'INSERT INTO invalidations (prefix, origin, created_at) VALUES (?, ?, ?)',
+                    (prefix, self.origin, time.time())
+                )
+        except sqlite3.Error as e:
+            self._failed('invalidate', e)
+            return 0
+        if not prefix:
+            with self._lock:
+                self._pending = {'hits': 0, 'misses': 0}
+        return removed
+
+    def last_invalidation_id(self) -> int:
+        try:
+            row = self._connection().execute('SELECT MAX(id) FROM invalidations').fetchone()
+        except sqlite3.Error as e:
+            self._failed('invalidations', e)
+            return 0
+        return row[0] or 0
+
+    def invalidations_since(self, last_id: int) -> List[Tuple[int, str, bool, str]]:
+        """
+        Returns:
+            Liste (id, préfixe ou clé, exact, origin) des invalidations postérieures à last_id
+        """
+        try:
+            rows = self._connection().execute(
+                'SELECT id, prefix, exact, origin FROM invalidations WHERE id > ? ORDER BY id',
+                (last_id,)
+            ).fetchall()
+            return [(row_id, prefix, bool(exact), origin) for row_id, prefix, exact, origin in rows]
+        except sqlite3.Error as e:
+            self._failed('invalidations', e)
+            return []
+
+    def publish(self, worker_stats: Dict) -> None:
+        """Publie les compteurs accumulés et les statistiques L1 du worker"""
+        with self._lock:
+            pending, self._pending = self._pending, {'hits': 0, 'misses': 0}
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.executemany(
+                    'INSERT INTO counters (name, value) VALUES (?, ?) '
+                    'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+                    [(name, value) for name, value in pending.items() if value]
+                )
+                connection.execute(
+                    'INSERT OR REPLACE INTO workers (origin, pid, stats, updated_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    (self.origin, os.getpid(), json.dumps(worker_stats), time.time())
+                )
+        except sqlite3.Error as e:
+            self._failed('publish', e)
+
+    def cleanup_expired(self) -> int:
+        """
+        Supprime les entrées périmées, les invalidations anciennes et les workers
+        disparus
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        now = time.time()
+        try:
+            connection = self._connection()
+            with connection:
+                removed = connection.execute(
+                    'DELETE FROM entries WHERE stale_until < ?', (now,)
+                ).rowcount
+                connection.execute('DELETE FROM invalidations WHERE created_at < ?',
+                                   (now - INVALIDATION_RETENTION,))
+                connection.execute(
+                    'DELETE FROM workers WHERE updated_at < ?', (now - WORKER_TIMEOUT,)
+                )
+        except sqlite3.Error as e:
+            self._failed('cleanup', e)
+            return 0
+        return removed
+
+    def enforce_size(self) -> None:
+        """Supprime les entrées qui expirent le plus tôt jusqu'à respecter max_bytes"""
+        try:
+            connection = self._connection()
+            total, count = connection.execute(
+                'SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries'
+            ).fetchone()
+            while total > self.max_bytes and count:
+                batch = max(1, count // 10)
+                with connection:
+                    connection.execute(
+                        'DELETE FROM entries WHERE key IN '
+                        '(SELECT key FROM entries ORDER BY expires_at LIMIT ?)',
+                        (batch,)
+                    )
+                total, count = connection.execute(
+                    'SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries'
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._failed('enforce_size', e)
+
+    def get_stats(self) -> Dict:
+        """Statistiques du fichier partagé (tous workers confondus)"""
+        try:
+            connection = self._connection()
+            size, bytes_used = connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+            counters = dict(connection.execute('SELECT name, value FROM counters').fetchall())
+        except sqlite3.Error as e:
+            self._failed('stats', e)
+            return {'path': str(self.path), 'errors': self.errors}
+        with self._lock:
+            hits = counters.get('hits', 0) + self._pending['hits']
+            misses = counters.get('misses', 0) + self._pending['misses']
+        total = hits + misses
+        return {
+            'path': str(self.path),
+            'size': size,
+            'bytes_used': bytes_used,
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 2) if total else 0,
+            'errors': self.errors
+        }
+
+    def worker_stats(self) -> List[Dict]:
+        """Dernières statistiques L1 publiées par chaque worker actif"""
+        try:
+            rows = self._connection().execute(
+                'SELECT pid, stats, updated_at FROM workers '
+                'WHERE updated_at >= ? ORDER BY pid, origin',
+                (time.time() - WORKER_TIMEOUT,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            self._failed('workers', e)
+            return []
+        return [
+            {'pid': pid, 'updated_at': updated_at, **json.loads(stats)}
+            for pid, stats, updated_at in rows
+        ]
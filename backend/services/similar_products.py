@@ -0,0 +1,152 @@
+"""
+Table précalculée des "produits similaires" de chaque produit du catalogue
+Calculée hors ligne (scripts/build_similar_products.py) par blocs de GEMM sur
+product_features_resnet50.npy, puis servie en O(1) par /api/products/<id>/similar
+sans extraction de features ni scan du catalogue
+"""
+import numpy as np
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from services.ann_index import batch_top_k_indices
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_PATH = Path(__file__).parent.parent.parent / 'data' / 'similar_products.npz'
+
+# Taille max (en float32) de la matrice de scores d'un bloc (256 Mo)
+BLOCK_SCORES_BUDGET = 64 * 1024 * 1024
+
+
+def compute_neighbor_table(features: np.ndarray, k: int,
+                           block_size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcule les k plus proches voisins de chaque ligne (hors elle-même)
+
+    Args:
+        features: Matrice (N, d) normalisée L2
+        k: Nombre de voisins par produit
+        block_size: Lignes par GEMM (None = borné par BLOCK_SCORES_BUDGET)
+
+    Returns:
+        Tuple (indices de lignes (N, k) int32, scores (N, k) float32)
+    """
+    n = features.shape[0]
+    k = min(k, n - 1)
+    if block_size is None:
+        block_size = max(1, BLOCK_SCORES_BUDGET // max(n, 1))
+
+    neighbors = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, block_size):
+        block = np.asarray(features[start:start + block_size], dtype=np.float32)
+        block_scores = block @ features.T
+        # Exclure le produit lui-même
+        rows = np.arange(block.shape[0])
+        block_scores[rows, start + rows] = -np.inf
+
+        top = batch_top_k_indices(block_scores, k)
+        neighbors[start:start + block.shape[0]] = top
+        scores[start:start + block.shape[0]] = np.take_along_axis(block_scores, top, axis=1)
+    return neighbors, scores
+
+
+def save_neighbor_table(
+    path, product_ids: np.ndarray, neighbors: np.ndarray, scores: np.ndarray
+) -> Path:
+    """
+    Sauvegarde la table au format compact: ids des voisins en int32 et scores en
+    float16, soit 6 octets par voisin
+    """
+    path = Path(path)
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    np.savez(
+        path,
+        product_ids=product_ids,
+        neighbor_ids=product_ids[neighbors].astype(np.int32),
+        scores=scores.astype(np.float16)
+    )
+    return path
+
+
+class NeighborTable:
+    """
+    Version immuable de la table des voisins: tableaux chargés et index par product_id
+
+    Construite entièrement avant d'être publiée par SimilarProductsTable.load() en une
+    seule affectation (comme CatalogSnapshot): un lecteur concurrent ne voit jamais
+    une table chargée avec un index encore vide.
+    """
+
+    def __init__(self, product_ids: np.ndarray, neighbor_ids: np.ndarray, scores: np.ndarray):
+        self.product_ids = product_ids
+        self.neighbor_ids = neighbor_ids
+        self.scores = scores
+        self.row_by_product_id: Dict[int, int] = {
+            int(pid): row for row, pid in enumerate(product_ids)
+        }
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+
+class SimilarProductsTable:
+    """
+    Table des voisins précalculés, indexée par product_id
+    """
+
+    def __init__(self):
+        self._table: Optional[NeighborTable] = None
+
+    def load(self, path=None) -> bool:
+        """
+        Charge la table depuis un fichier .npz
+
+        Returns:
+            bool: True si le chargement a réussi
+        """
+        path = Path(path) if path else DEFAULT_TABLE_PATH
+        if not path.exists():
+            logger.warning(f"Table des produits similaires non trouvée: {path}")
+            return False
+        try:
+            with np.load(path) as data:
+                table = NeighborTable(data['product_ids'], data['neighbor_ids'], data['scores'])
+            self._table = table
+            logger.info(f"Table des produits similaires chargée: {len(table)} produits, "
+                        f"{table.neighbor_ids.shape[1]} voisins")
+            return True
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de la table des produits similaires: {e}")
+            return False
+
+    def is_loaded(self) -> bool:
+        """Vérifie si la table est chargée"""
+        return self._table is not None
+
+    def __contains__(self, product_id: int) -> bool:
+        table = self._table
+        return table is not None and product_id in table.row_by_product_id
+
+    def get(
+        self, product_id: int, top_k: int = 10, min_similarity: float = 0.0
+    ) -> Optional[List[Dict]]:
+        """
+        Retourne les voisins précalculés d'un produit
+
+        Returns:
+            Liste de dictionnaires avec 'product_id' et 'similarity_score',
+            ou None si le produit n'est pas dans la table
+        """
+        table = self._table
+        row = table.row_by_product_id.get(product_id) if table is not None else None
+        if row is None:
+            return None
+        results = []
+        for neighbor_id, score in zip(table.neighbor_ids[row, :top_k], table.scores[row, :top_k]):
+            score = float(score)
+            if score < min_similarity:
+                break
+            results.append({'product_id': int(neighbor_id), 'similarity_score': score})
+        return results
@@ -0,0 +1,32 @@
+"""
+Génère tf_preprocess_reference.npz: sorties de tf.image.resize + preprocess_input
+(ResNet50, caffe) sur de petites images, pour tester la parité du preprocessing
+sans TensorFlow (tests/test_preprocessing_simple.py)
+
+Usage (environnement avec TensorFlow): python tests/fixtures/generate_tf_preprocess_reference.py
+"""
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.applications.resnet50 import preprocess_input
+
+FIXTURE_PATH = Path(__file__).parent / 'tf_preprocess_reference.npz'
+# Réduction, agrandissement et changement de ratio (le noyau ne dépend pas de la taille cible)
+INPUT_SHAPES = ((60, 80, 3), (37, 50, 3), (13, 9, 3), (24, 32, 3))
+TARGET_SIZE = (32, 24)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    arrays = {'target_size': np.array(TARGET_SIZE), 'tensorflow_version': np.array(tf.__version__)}
+    for i, shape in enumerate(INPUT_SHAPES):
+        image = rng.integers(0, 256, size=shape, dtype=np.uint8)
+        arrays[f'input_{i}'] = image
+        arrays[f'expected_{i}'] = preprocess_input(tf.image.resize(image, TARGET_SIZE).numpy())
+    np.savez_compressed(FIXTURE_PATH, **arrays)
+    print(f"Fixture écrite: {FIXTURE_PATH} (TensorFlow {tf.__version__})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Tests pour les index ANN (IVF, HNSW, PQ, quantification scalaire)
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from services.ann_index import HNSWIndex, IVFIndex, batch_top_k_indices, kmeans, top_k_indices
+from services.quantization import FP16Index, PQIndex, ProductQuantizer, SQ8Index
+from services.search_engine_npy import SearchEngineNPY, normalize_rows
+
+
+def recall_at_k(approx_ids, exact_ids):
+    return len(set(approx_ids) & set(exact_ids)) / len(exact_ids)
+
+
+class TestANNIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # Données groupées en clusters, comme des embeddings de catégories
+        centers = rng.normal(size=(10, 32))
+        labels = rng.integers(0, 10, size=600)
+        self.vectors = normalize_rows(centers[labels] + 0.3 * rng.normal(size=(600, 32)))
+        self.queries = normalize_rows(centers[:5] + 0.3 * rng.normal(size=(5, 32)))
+
+    def _exact_top_k(self, query, k):
+        return np.argsort(-(self.vectors @ query))[:k]
+
+    def test_batch_top_k_matches_rows(self):
+        scores = self.queries @ self.vectors.T
+        batch = batch_top_k_indices(scores, 7)
+        self.assertEqual(batch.shape, (5, 7))
+        for row_scores, row_top in zip(scores, batch):
+            np.testing.assert_array_equal(row_top, top_k_indices(row_scores, 7))
+        self.assertEqual(batch_top_k_indices(scores[:, :3], 7).shape, (5, 3))
+
+    def test_kmeans_shape_and_norm(self):
+        centroids = kmeans(self.vectors, 10, n_iter=5)
+        self.assertEqual(centroids.shape, (10, 32))
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+
+    def test_ivf_full_probe_is_exact(self):
+        index = IVFIndex(nlist=16).build(self.vectors)
+        for query in self.queries:
+            ids, scores = index.search(query, 10, nprobe=16)
+            np.testing.assert_array_equal(ids, self._exact_top_k(query, 10))
+            np.testing.assert_allclose(scores, self.vectors[ids] @ query, rtol=1e-5)
+
+    def test_ivf_partial_probe_recall(self):
+        index = IVFIndex(nlist=16, nprobe=4).build(self.vectors)
+        recalls = [
+            recall_at_k(index.search(q, 10)[0], self._exact_top_k(q, 10)) for q in self.queries
+        ]
+        self.assertGreaterEqual(np.mean(recalls), 0.8)
+
+    def test_hnsw_recall(self):
+        index = HNSWIndex(M=8, ef_construction=64, ef_search=64).build(self.vectors)
+        recalls = [
+            recall_at_k(index.search(q, 10)[0], self._exact_top_k(q, 10)) for q in self.queries
+        ]
+        self.assertGreaterEqual(np.mean(recalls), 0.9)
+
+    def test_hnsw_scores_sorted(self):
+        index = HNSWIndex(M=8).build(self.vectors)
+        _, scores = index.search(self.queries[0], 10, ef=32)
+        self.assertEqual(len(scores), 10)
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_pq_codes_and_reconstruction(self):
+        pq = ProductQuantizer(m=8, nbits=6).train(self.vectors)
+        codes = pq.encode(self.vectors)
+        self.assertEqual(codes.shape, (600, 8))
+        self.assertEqual(codes.dtype, np.uint8)
+
+        error = np.linalg.norm(pq.decode(codes) - self.vectors, axis=1).mean()
+        self.assertLess(error, 0.5)
+
+    def test_pq_adc_matches_decoded_inner_product(self):
+        index = PQIndex(m=8, nbits=6).build(self.vectors)
+        decoded = index.quantizer.decode(np.ascontiguousarray(index.codes.T))
+        np.testing.assert_allclose(
+            index.adc_scores(self.queries[0]), decoded @ self.queries[0], atol=1e-5
+        )
+        self.assertEqual(index.code_size(), 8)
+
+    def test_engine_pq_rerank_returns_exact_scores(self):
+        engine = SearchEngineNPY(ann_params={'pq': {'m': 8, 'nbits': 6}}, rerank=50)
+        engine.feature_database = self.vectors
+        engine.product_ids = np.arange(len(self.vectors))
+        engine._index_built = True
+        engine.build_ann_index('pq')
+
+        query = self.queries[1]
+        results = engine.search_similar(query, top_k=10, method='pq')
+        exact = self._exact_top_k(query, 10)
+
+        self.assertGreaterEqual(recall_at_k([r['product_id'] for r in results], exact), 0.9)
+        for r in results:
+            self.assertAlmostEqual(
+                r['similarity_score'], float(self.vectors[r['product_id']] @ query), places=5
+            )
+
+    def test_scalar_quantized_scores(self):
+        for index_type, tolerance in ((FP16Index, 1e-3), (SQ8Index, 2e-2)):
+            index = index_type(block_size=64).build(self.vectors)
+            self.assertEqual(index.code_size(), 32 * np.dtype(index_type.dtype).itemsize)
+            np.testing.assert_allclose(
+                index.scores(self.queries[2]), self.vectors @ self.queries[2], atol=tolerance
+            )
+
+    def test_scalar_quantized_save_and_load(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            features_path = os.path.join(tmp_dir, 'features.npy')
+            np.save(features_path, self.vectors)
+            for index_type in (FP16Index, SQ8Index):
+                built = index_type().build(self.vectors)
+                paths = built.save(features_path)
+                self.assertTrue(all(p.exists() for p in paths))
+
+                loaded = index_type()
+                self.assertTrue(loaded.load_from(features_path))
+                np.testing.assert_array_equal(loaded.codes, built.codes)
+                np.testing.assert_allclose(
+                    loaded.scores(self.queries[0]), built.scores(self.queries[0])
+                )
+
+            self.assertFalse(PQIndex().load_from(features_path))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def test_built_indexes_save_and_load(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            features_path = os.path.join(tmp_dir, 'features.npy')
+            np.save(features_path, self.vectors)
+            for make_index in (lambda: IVFIndex(nlist=16, nprobe=4),
+                               lambda: HNSWIndex(M=8, ef_construction=64),
+                               lambda: PQIndex(m=8, nbits=6)):
+                built = make_index().build(self.vectors)
+                paths = built.save(features_path)
+                self.assertTrue(all(p.exists() for p in paths))
+
+                loaded = make_index()
+                self.assertTrue(loaded.load_from(features_path, self.vectors))
+                for query in self.queries:
+                    for expected, actual in zip(built.search(query, 10), loaded.search(query, 10)):
+                        np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+            # Paramètres de construction ou catalogue différents: index ignoré
+            self.assertFalse(IVFIndex(nlist=8).load_from(features_path, self.vectors))
+            self.assertFalse(HNSWIndex(M=16).load_from(features_path, self.vectors))
+            self.assertFalse(HNSWIndex(M=8, ef_construction=64).load_from(
+                features_path, self.vectors[:100]
+            ))
+            self.assertFalse(IVFIndex(nlist=16).load_from(features_path))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def test_engine_never_builds_on_request(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            features_path = os.path.join(tmp_dir, 'features.npy')
+            ids_path = os.path.join(tmp_dir, 'ids.npy')
+            np.save(features_path, self.vectors)
+            np.save(ids_path, np.arange(len(self.vectors)))
+
+            engine = SearchEngineNPY(ann_params={'hnsw': {'M': 8}})
+            self.assertTrue(engine.load_features_from_npy(features_path, ids_path, mmap=False))
+            self.assertFalse(engine.is_method_available('hnsw'))
+            self.assertEqual(engine.search_similar(self.queries[0], method='hnsw'), [])
+            with self.assertRaises(ValueError):
+                engine.get_ann_index('hnsw')
+
+            # Index construit hors ligne puis rechargé par un autre worker
+            engine.build_ann_index('hnsw', save=True)
+            worker = SearchEngineNPY(ann_params={'hnsw': {'M': 8}})
+            self.assertTrue(worker.load_features_from_npy(features_path, ids_path, mmap=False))
+            self.assertEqual(worker.load_ann_indexes(), ['hnsw'])
+            self.assertTrue(worker.is_method_available('hnsw'))
+            self.assertEqual(
+                worker.search_similar(self.queries[0], top_k=5, method='hnsw'),
+                engine.search_similar(self.queries[0], top_k=5, method='hnsw'),
+            )
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def test_engine_ann_methods(self):
+        engine = SearchEngineNPY(ann_params={'ivf': {'nlist': 16}})
+        engine.feature_database = self.vectors
+        engine.product_ids = np.arange(len(self.vectors)) + 1000
+        engine._index_built = True
+        for method in ('ivf', 'hnsw', 'sq8'):
+            engine.build_ann_index(method)
+
+        exact = engine.search_similar(self.queries[0], top_k=5, method='cosine')
+        ivf = engine.search_similar(self.queries[0], top_k=5, method='ivf', nprobe=16)
+        hnsw = engine.search_similar(self.queries[0], top_k=5, method='hnsw', ef=64)
+        sq8 = engine.search_similar(self.queries[0], top_k=5, method='sq8')
+
+        self.assertEqual([r['product_id'] for r in ivf], [r['product_id'] for r in exact])
+        self.assertEqual(len(hnsw), 5)
+        self.assertEqual([r['product_id'] for r in sq8], [r['product_id'] for r in exact])
+        self.assertEqual(engine.get_ann_index('ivf').nlist, 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+"""
+Tests pour le cache mémoire borné (LRU/TinyLFU, taille estimée, expiration)
+"""
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from services.cache import MemoryCache, cached, canonicalize, estimate_size, get_cache
+
+
+def make_result(n_products):
+    """Résultat de recherche typique: liste de dictionnaires produits"""
+    return {
+        'results': [{'id': i, 'name': f'Produit {i}', 'similarity': 0.9} for i in range(n_products)]
+    }
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_estimate_size(self):
+        self.assertGreater(estimate_size(make_result(50)), estimate_size(make_result(5)) * 5)
+        self.assertGreaterEqual(estimate_size(np.zeros(1000, dtype=np.float32)), 4000)
+
+    def test_lru_eviction_by_entries(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_bytes_bound(self):
+        entry_size = estimate_size(make_result(50))
+        cache = MemoryCache(max_entries=1000, max_bytes=int(entry_size * 3.5))
+        for i in range(10):
+            cache.set(f'k{i}', make_result(50))
+        stats = cache.get_stats()
+        self.assertEqual(stats['size'], 3)
+        self.assertLessEqual(stats['bytes_used'], stats['max_bytes'])
+        self.assertEqual(stats['evictions'], 7)
+
+        cache.set('huge', make_result(500))
+        self.assertIsNone(cache.get('huge'))
+        self.assertEqual(cache.get_stats()['rejections'], 1)
+
+        # Une valeur trop grande remplace (supprime) l'entrée existante de la clé
+        cache.set('replaced', 'small')
+        cache.set('replaced', make_result(500))
+        self.assertIsNone(cache.get('replaced'))
+
+        cache.clear()
+        self.assertEqual(cache.get_stats()['bytes_used'], 0)
+
+    def test_tinylfu_keeps_popular_entries(self):
+        cache = MemoryCache(max_entries=2, admission='tinylfu')
+        cache.set('hot1', 1)
+        cache.set('hot2', 2)
+        for _ in range(5):
+            cache.get('hot1')
+            cache.get('hot2')
+        # Clés vues une seule fois: non admises
+        for i in range(10):
+            cache.set(f'once{i}', i)
+        self.assertEqual(cache.get('hot1'), 1)
+        self.assertEqual(cache.get('hot2'), 2)
+        self.assertEqual(cache.get_stats()['rejections'], 10)
+
+        # Une clé devenue plus fréquente que la victime LRU est admise
+        for _ in range(10):
+            cache.get('rising')
+        cache.set('rising', 3)
+        self.assertEqual(cache.get('rising'), 3)
+
+    def test_expiration_sweep(self):
+        cache = MemoryCache()
+        cache.set('short', 1, ttl=0.05)
+        cache.set('long', 2, ttl=60)
+        cache.start_sweeper(interval=0.02)
+        time.sleep(0.2)
+        self.assertEqual(cache.get_stats()['size'], 1)
+        self.assertEqual(cache.get_stats()['expirations'], 1)
+        self.assertEqual(cache.get('long'), 2)
+
+    def test_get_or_compute_single_flight(self):
+        cache = MemoryCache()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(1)
+            return {'results': [1, 2, 3]}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(r == {'results': [1, 2, 3]} for r in results))
+        self.assertEqual(cache.get_stats()['coalesced'], 7)
+        self.assertEqual(cache.get_stats()['in_flight'], 0)
+
+    def test_get_or_compute_error_reaches_waiters(self):
+        cache = MemoryCache()
+        release = threading.Event()
+
+        def compute():
+            release.wait(1)
+            raise ValueError('boom')
+
+        errors = []
+
+        def worker():
+            try:
+                cache.get_or_compute('k', compute)
+            except ValueError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, ['boom'] * 4)
+        # L'échec n'est pas mis en cache: l'appel suivant recalcule
+        self.assertEqual(cache.get_or_compute('k', lambda: 'ok'), 'ok')
+
+    def test_stale_while_revalidate(self):
+        cache = MemoryCache()
+        cache.get_or_compute('k', lambda: 'v1', ttl=0.05, stale_ttl=60)
+        time.sleep(0.1)
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.set()
+            return 'v2'
+
+        # Valeur périmée servie immédiatement, recalculée en arrière-plan
+        self.assertEqual(cache.get_or_compute('k', compute, ttl=60, stale_ttl=60), 'v1')
+        self.assertTrue(refreshed.wait(1))
+        for _ in range(50):
+            if cache.get_stats()['in_flight'] == 0:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get('k'), 'v2')
+        self.assertEqual(cache.get_stats()['stale_hits'], 1)
+
+    def test_cached_decorator(self):
+        calls = []
+
+        @cached(prefix='test_decorator', ttl=60)
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        self.assertEqual(square(4), 16)
+        self.assertEqual(square(4), 16)
+        self.assertEqual(calls, [4])
+        get_cache().delete(get_cache()._generate_key('test_decorator', 4))
+
+    def test_generate_key_canonical_floats(self):
+        cache = MemoryCache()
+        key = cache._generate_key(
+            'search_image', image_hash='abc', min_similarity=0.1 + 0.2, top_k=10
+        )
+        self.assertTrue(key.startswith('search_image:'))
+        self.assertEqual(len(key.split(':')[1]), 16)
+        self.assertEqual(key, cache._generate_key('search_image', top_k=10.0, image_hash='abc',
+                                                  min_similarity=np.float32(0.3)))
+        self.assertNotEqual(
+            key,
+            cache._generate_key('search_image', image_hash='abc', min_similarity=0.31, top_k=10),
+        )
+        self.assertNotEqual(
+            key,
+            cache._generate_key('search_product', image_hash='abc', min_similarity=0.3, top_k=10),
+        )
+        # Un filtre à None équivaut à un filtre absent
+        self.assertEqual(
+            canonicalize({'category': None, 'brand': 'x'}), canonicalize({'brand': 'x'})
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
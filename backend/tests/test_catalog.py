@@ -0,0 +1,168 @@
+"""
+Tests pour le catalogue produits en mémoire
+"""
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from services import catalog as catalog_module
+from services.catalog import ProductCatalog
+
+
+class FakeProductsDB:
+    """Table products minimale: répond aux requêtes du catalogue"""
+
+    def __init__(self, rows):
+        self.rows = {row['id']: row for row in rows}
+        self.queries = []
+
+    def execute_query(self, query, params=None):
+        self.queries.append(query)
+        if 'COUNT(*)' in query:
+            return [{'count': len(self.rows)}]
+        if 'updated_at >= %s' in query:
+            return [dict(r) for r in self.rows.values() if r['updated_at'] >= params[0]]
+        if 'id = ANY(%s)' in query:
+            return [dict(self.rows[i]) for i in params[0] if i in self.rows]
+        return [dict(r) for r in self.rows.values()]
+
+
+def make_product(
+    product_id, name, category='electronique', price='10.00', brand=None, updated_at=None
+):
+    return {
+        'id': product_id,
+        'name': name,
+        'category': category,
+        'price': Decimal(price),
+        'description': f'Product {name}',
+        'brand': brand,
+        'color': 'Noir',
+        'image_path': f'{product_id}.jpg',
+        'image_hash': f'{product_id:032d}',
+        'created_at': datetime(2025, 1, 1), 'updated_at': updated_at or datetime(2025, 1, 1)
+    }
+
+
+class TestProductCatalog(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeProductsDB([
+            make_product(1, 'Casque Audio', brand='Sony', price='59.90'),
+            make_product(2, 'Sac Cuir', category='mode/sacs', price='120.00'),
+            make_product(3, 'casque', category='test_screenshots'),
+            make_product(4, 'Enceinte', brand='Casque', price='35.00'),
+        ])
+        patcher = mock.patch.object(catalog_module, 'get_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.catalog = ProductCatalog(refresh_interval=3600)
+        self.assertTrue(self.catalog.load())
+
+    def test_get_and_fallback(self):
+        product = self.catalog.get(1)
+        self.assertEqual(product['name'], 'Casque Audio')
+        self.assertEqual(product['price'], 59.9)
+        self.assertIsNone(self.catalog.get(99))
+
+        self.db.rows[5] = make_product(5, 'Nouveau')
+        n_queries = len(self.db.queries)
+        products = self.catalog.fetch([2, 5, 42])
+        self.assertEqual(set(products), {2, 5})
+        self.assertEqual(len(self.db.queries), n_queries + 1)
+
+    def test_image_hashes_are_internal(self):
+        self.assertEqual(self.catalog.image_hashes()[f'{2:032d}'], 2)
+        self.assertNotIn('image_hash', self.catalog.get(2))
+        self.assertEqual(self.catalog.refresh(), 0)
+
+    def test_incremental_refresh(self):
+        later = datetime(2025, 1, 2)
+        self.db.rows[2] = make_product(
+            2, 'Sac Cuir', category='mode/sacs', price='99.00', updated_at=later
+        )
+        self.db.rows[6] = make_product(6, 'Montre', updated_at=later)
+        version = self.catalog.version
+
+        self.assertEqual(self.catalog.refresh(), 2)
+        self.assertEqual(self.catalog.get(2)['price'], 99.0)
+        self.assertEqual(self.catalog.get(6)['name'], 'Montre')
+        self.assertEqual(self.catalog.version, version + 1)
+
+        # Rien de nouveau: pas de nouveau snapshot
+        self.assertEqual(self.catalog.refresh(), 0)
+        self.assertEqual(self.catalog.version, version + 1)
+
+    def test_refresh_detects_deletions(self):
+        del self.db.rows[4]
+        self.catalog.refresh()
+        self.assertIsNone(self.catalog.get(4))
+
+    def test_search_text_matches_sql_ordering(self):
+        results = self.catalog.search_text('casque', exclude_categories=('test_screenshots',))
+        # Marque égale à la requête (rang 3) avant une simple sous-chaîne (rang 4)
+        self.assertEqual([p['id'] for p in results], [4, 1])
+
+        results = self.catalog.search_text(
+            'casque', max_price=50, exclude_categories=('test_screenshots',)
+        )
+        self.assertEqual([p['id'] for p in results], [4])
+        self.assertEqual(self.catalog.search_text('sac', brand='sony'), [])
+
+
+class TestCatalogBackgroundRefresh(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeProductsDB([make_product(1, 'Casque Audio')])
+        self.db_ready = threading.Event()
+        execute_query = self.db.execute_query
+
+        def slow_execute_query(query, params=None):
+            self.db_ready.wait(timeout=5)
+            return execute_query(query, params)
+
+        self.db.execute_query = slow_execute_query
+        patcher = mock.patch.object(catalog_module, 'get_db', return_value=self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.db_ready.set)
+
+    def _wait_loaded(self, catalog):
+        deadline = time.time() + 5
+        while not catalog.is_loaded() and time.time() < deadline:
+            time.sleep(0.01)
+        return catalog.is_loaded()
+
+    def _catalog(self, refresh_interval):
+        catalog = ProductCatalog(refresh_interval=refresh_interval)
+        self.addCleanup(catalog.stop_refresher)
+        return catalog
+
+    def test_requests_never_load(self):
+        catalog = self._catalog(3600)
+        start = time.time()
+        self.assertFalse(catalog.ensure_fresh())
+        self.assertLess(time.time() - start, 1.0)
+
+        # Le thread de fond charge le catalogue dès que la DB répond
+        self.db_ready.set()
+        self.assertTrue(self._wait_loaded(catalog))
+        self.assertEqual(catalog.get(1)['name'], 'Casque Audio')
+
+    def test_refresh_runs_in_background(self):
+        self.db_ready.set()
+        catalog = self._catalog(0.05)
+        self.assertTrue(catalog.start())
+        version = catalog.version
+
+        self.db.rows[2] = make_product(2, 'Montre', updated_at=datetime(2025, 1, 2))
+        deadline = time.time() + 5
+        while catalog.version == version and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(catalog.get(2)['name'], 'Montre')
+
+
+if __name__ == '__main__':
+    unittest.main()
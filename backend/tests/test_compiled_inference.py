@@ -0,0 +1,60 @@
+"""
+Tests pour l'inférence compilée (tailles de batch tracées et padding)
+"""
+import unittest
+
+import numpy as np
+
+from services.compiled_inference import (
+    TENSORFLOW_AVAILABLE,
+    CompiledModelRunner,
+    batch_buckets,
+    bucket_for,
+    pad_batch,
+)
+
+
+class TestBatchBuckets(unittest.TestCase):
+    def test_buckets(self):
+        self.assertEqual(batch_buckets(1), [1])
+        self.assertEqual(batch_buckets(16), [1, 2, 4, 8, 16])
+        self.assertEqual(batch_buckets(12), [1, 2, 4, 8, 12])
+        self.assertEqual(bucket_for(3, batch_buckets(16)), 4)
+        self.assertEqual(bucket_for(9, batch_buckets(12)), 12)
+        with self.assertRaises(ValueError):
+            bucket_for(13, batch_buckets(12))
+
+    def test_pad_batch(self):
+        batch = np.ones((3, 2, 2), dtype=np.float32)
+        padded = pad_batch(batch, 4)
+        self.assertEqual(padded.shape, (4, 2, 2))
+        np.testing.assert_array_equal(padded[:3], batch)
+        self.assertFalse(padded[3].any())
+        self.assertIs(pad_batch(batch, 3), batch)
+
+
+@unittest.skipUnless(TENSORFLOW_AVAILABLE, "TensorFlow not available")
+class TestCompiledModelRunner(unittest.TestCase):
+    def test_matches_predict(self):
+        import tensorflow as tf
+
+        model = tf.keras.Sequential([
+            tf.keras.Input(shape=(8, 8, 3)),
+            tf.keras.layers.Conv2D(4, 3),
+            tf.keras.layers.GlobalAveragePooling2D()
+        ])
+        runner = CompiledModelRunner(model, input_shape=(8, 8, 3), max_batch_size=4)
+        runner.warmup()
+
+        images = np.random.default_rng(0).normal(size=(7, 8, 8, 3)).astype(np.float32)
+        np.testing.assert_allclose(
+            runner(images), model.predict(images, verbose=0), rtol=1e-4, atol=1e-5
+        )
+        np.testing.assert_allclose(
+            runner(images[:1]), model.predict(images[:1], verbose=0), rtol=1e-4, atol=1e-5
+        )
+        self.assertEqual(runner.get_stats()['padded_rows'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
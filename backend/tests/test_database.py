@@ -0,0 +1,162 @@
+"""
+Tests pour les helpers de models.database
+"""
+import threading
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+import psycopg2
+
+from models import database
+from models.database import DatabasePool, PoolTimeoutError, fetch_products_by_ids
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execute_query(self, query, params=None):
+        self.queries.append((query, params))
+        ids = set(params[0])
+        return [row for row in self.rows if row['id'] in ids]
+
+
+class TestFetchProductsByIds(unittest.TestCase):
+    def test_single_round_trip(self):
+        db = FakeDB([
+            {'id': 1, 'name': 'a', 'price': Decimal('9.90')},
+            {'id': 2, 'name': 'b', 'price': None},
+            {'id': 3, 'name': 'c', 'price': Decimal('1')},
+        ])
+
+        products = fetch_products_by_ids(db, [3, 1, 3, 42])
+
+        self.assertEqual(len(db.queries), 1)
+        self.assertIn('id = ANY(%s)', db.queries[0][0])
+        self.assertEqual(db.queries[0][1], ([3, 1, 42],))
+        self.assertEqual(set(products), {1, 3})
+        self.assertEqual(products[1]['price'], 9.9)
+
+    def test_empty_ids(self):
+        db = FakeDB([])
+        self.assertEqual(fetch_products_by_ids(db, []), {})
+        self.assertEqual(db.queries, [])
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.executed.append(query)
+        self.description = [('value',)]
+
+    def fetchall(self):
+        return [{'value': 1}]
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = False
+        self.readonly = False
+        self.broken = False
+        self.executed = []
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def set_session(self, readonly=None, autocommit=None):
+        self.readonly = readonly
+        self.autocommit = autocommit
+
+
+class FakeThreadedPool:
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.idle = []
+        self.opened = 0
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        self.opened += 1
+        return FakeConnection()
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.closed = 1
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        pass
+
+
+@mock.patch.object(database.pg_pool, 'ThreadedConnectionPool', FakeThreadedPool)
+class TestDatabasePool(unittest.TestCase):
+    def test_connections_are_readonly_autocommit_and_reused(self):
+        pool = DatabasePool(maxconn=2)
+        self.assertEqual(pool.execute_query("SELECT 1"), [{'value': 1}])
+        self.assertEqual(pool.execute_query("SELECT 1"), [{'value': 1}])
+
+        self.assertEqual(pool._pool.opened, 1)
+        conn = pool._pool.idle[0]
+        self.assertTrue(conn.readonly and conn.autocommit)
+        self.assertEqual(pool.get_stats()['checkouts'], 2)
+        self.assertEqual(pool.get_stats()['in_use'], 0)
+
+    def test_broken_connection_is_replaced(self):
+        pool = DatabasePool(maxconn=2)
+        pool.execute_query("SELECT 1")
+        pool._pool.idle[0].broken = True
+
+        self.assertEqual(pool.execute_query("SELECT 1"), [{'value': 1}])
+        self.assertEqual(pool._pool.opened, 2)
+        self.assertGreaterEqual(pool.get_stats()['reconnects'], 1)
+
+    def test_idle_connection_health_check(self):
+        pool = DatabasePool(maxconn=2, healthcheck_interval=0)
+        pool.execute_query("SELECT 1")
+        conn = pool._pool.idle[0]
+        conn.broken = True
+        pool.execute_query("SELECT 1")
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.get_stats()['errors'], 0)
+
+    def test_bounded_wait(self):
+        pool = DatabasePool(maxconn=1, timeout=0.05)
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with pool.connection():
+                held.set()
+                release.wait(1)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait(1)
+        with self.assertRaises(PoolTimeoutError):
+            with pool.connection():
+                pass
+        self.assertIsNone(pool.execute_query("SELECT 1"))
+        release.set()
+        thread.join()
+
+        self.assertEqual(pool.get_stats()['timeouts'], 2)
+        self.assertEqual(pool.execute_query("SELECT 1"), [{'value': 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+Tests pour le cache d'embeddings indexé par hash d'image
+"""
+import unittest
+
+import numpy as np
+
+from services.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = EmbeddingCache(max_entries=2)
+        for i, image_hash in enumerate(('a', 'b')):
+            cache.put(image_hash, np.full((1, 4), i))
+        self.assertEqual(cache.get('a').shape, (4,))
+        cache.put('c', np.ones(4))
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 1, 2))
+        self.assertEqual(stats['bytes'], 2 * 4 * 4)
+
+    def test_catalog_images_resolve_to_index_vectors(self):
+        vectors = {7: np.arange(4, dtype=np.float32)}
+        cache = EmbeddingCache(max_entries=0)
+        cache.preload_catalog({'hash7': 7, 'hash8': 8}, vectors.get)
+
+        np.testing.assert_array_equal(cache.get('hash7'), vectors[7])
+        self.assertIsNone(cache.get('hash8'))  # produit absent de l'index
+        cache.put('other', np.ones(4))  # cache LRU désactivé
+        self.assertIsNone(cache.get('other'))
+        self.assertEqual(cache.get_stats()['catalog_hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Tests pour l'extracteur de features ONNX Runtime / TFLite
+"""
+import unittest
+
+import numpy as np
+
+from services.feature_extractor_runtime import (
+    DEFAULT_MODEL_PATHS,
+    INT8_MODEL_PATHS,
+    ONNXRUNTIME_AVAILABLE,
+    TFLITE_AVAILABLE,
+    RuntimeFeatureExtractor,
+    embedding_parity,
+)
+
+try:
+    from services.feature_extractor_resnet50 import TENSORFLOW_AVAILABLE, ResNet50FeatureExtractor
+except ImportError:
+    TENSORFLOW_AVAILABLE = False
+
+
+class TestRuntimeFeatureExtractor(unittest.TestCase):
+    def test_embedding_parity(self):
+        reference = np.random.default_rng(0).normal(size=(3, 16))
+        parity = embedding_parity(reference, reference * 2)
+        self.assertAlmostEqual(parity['min_cosine'], 1.0)
+        self.assertLess(embedding_parity(reference, -reference)['min_cosine'], 0)
+
+    def test_missing_model_and_unknown_backend(self):
+        extractor = RuntimeFeatureExtractor(backend='onnx', model_path='/nonexistent/resnet50.onnx')
+        self.assertFalse(extractor.is_model_loaded())
+        with self.assertRaises(ValueError):
+            extractor.extract_features(np.zeros((224, 224, 3), dtype=np.float32))
+        with self.assertRaises(ValueError):
+            RuntimeFeatureExtractor(backend='openvino')
+
+    def test_quantized_default_path(self):
+        extractor = RuntimeFeatureExtractor(backend='tflite', quantized=True)
+        self.assertEqual(extractor.model_path, INT8_MODEL_PATHS['tflite'])
+        self.assertTrue(extractor.get_model_info()['quantized'])
+
+    def test_extract_features_with_runner(self):
+        extractor = RuntimeFeatureExtractor(backend='onnx', model_path='/nonexistent/resnet50.onnx')
+        extractor._runner = lambda batch: np.ones((batch.shape[0], 2048), dtype=np.float32)
+        features = extractor.extract_features(
+            np.zeros((224, 224, 3), dtype=np.float32), normalize=True
+        )
+        self.assertEqual(features.shape, (1, 2048))
+        self.assertAlmostEqual(float(np.linalg.norm(features)), 1.0, places=5)
+        with self.assertRaises(ValueError):
+            extractor.extract_features(np.zeros((1, 100, 100, 3), dtype=np.float32))
+
+
+class TestExportedModelParity(unittest.TestCase):
+    """Les embeddings exportés doivent correspondre au modèle keras (index .npy inchangé)"""
+
+    def _check(self, backend):
+        if not TENSORFLOW_AVAILABLE or not DEFAULT_MODEL_PATHS[backend].exists():
+            self.skipTest(f"TensorFlow or exported {backend} model not available")
+        keras_extractor = ResNet50FeatureExtractor()
+        runtime_extractor = RuntimeFeatureExtractor(backend=backend)
+        pixels = np.random.default_rng(0).uniform(0, 255, size=(4, 224, 224, 3))
+        images = (pixels - 120.0).astype(np.float32)
+        parity = embedding_parity(keras_extractor.extract_features(images),
+                                  runtime_extractor.extract_features(images))
+        self.assertGreaterEqual(parity['min_cosine'], 0.9999)
+
+    @unittest.skipUnless(ONNXRUNTIME_AVAILABLE, "onnxruntime not available")
+    def test_onnx_parity(self):
+        self._check('onnx')
+
+    @unittest.skipUnless(TFLITE_AVAILABLE, "TFLite interpreter not available")
+    def test_tflite_parity(self):
+        self._check('tflite')
+
+
+if __name__ == '__main__':
+    unittest.main()
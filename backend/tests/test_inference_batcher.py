@@ -0,0 +1,60 @@
+"""
+Tests pour le micro-batching des inférences
+"""
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from services.inference_batcher import InferenceBatcher
+
+
+class TestInferenceBatcher(unittest.TestCase):
+    def setUp(self):
+        self.batch_sizes = []
+
+    def _model(self, batch):
+        # Modèle factice: la sortie dépend de l'entrée, ligne par ligne
+        self.batch_sizes.append(batch.shape[0])
+        time.sleep(0.01)
+        return batch.reshape(batch.shape[0], -1).sum(axis=1, keepdims=True) * np.ones((1, 4))
+
+    def test_concurrent_requests_are_batched(self):
+        batcher = InferenceBatcher(self._model, max_batch_size=8, max_wait_ms=20)
+        inputs = [np.full((1, 2, 2), i, dtype=np.float32) for i in range(16)]
+        outputs = [None] * len(inputs)
+
+        def call(i):
+            outputs[i] = batcher.infer(inputs[i], timeout=5)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(inputs))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i, output in enumerate(outputs):
+            np.testing.assert_allclose(output, np.full((1, 4), 4 * i))
+        self.assertLess(len(self.batch_sizes), len(inputs))
+        self.assertLessEqual(max(self.batch_sizes), 8)
+        self.assertEqual(batcher.get_stats()['images'], 16)
+
+    def test_multi_image_request_and_oversized_batch(self):
+        batcher = InferenceBatcher(self._model, max_batch_size=4, max_wait_ms=1)
+        output = batcher.infer(np.ones((6, 2, 2)), timeout=5)
+        self.assertEqual(output.shape, (6, 4))
+        self.assertEqual(self.batch_sizes, [6])
+
+    def test_errors_are_propagated(self):
+        def failing(batch):
+            raise RuntimeError("boom")
+
+        batcher = InferenceBatcher(failing, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.infer(np.ones((1, 2, 2)), timeout=5)
+        self.assertEqual(batcher.get_stats()['errors'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests pour les hashs perceptuels et le cache de requêtes quasi identiques
+"""
+import io
+import unittest
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from services.perceptual_hash import (
+    MultiIndexHashTable,
+    NearDuplicateCache,
+    dhash,
+    hamming,
+    phash,
+)
+
+
+def make_photo(seed):
+    """Photo produit synthétique: formes colorées sur fond clair"""
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGB', (400, 300), (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    for _ in range(6):
+        x, y = rng.integers(0, 300), rng.integers(0, 200)
+        draw.ellipse((x, y, x + rng.integers(40, 120), y + rng.integers(40, 120)),
+                     fill=tuple(int(c) for c in rng.integers(0, 255, 3)))
+    return image
+
+
+def resave(image, quality=60, scale=0.7):
+    """Photo redimensionnée puis recompressée en JPEG"""
+    image = image.resize((int(image.width * scale), int(image.height * scale)))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue())).convert('RGB')
+
+
+class TestPerceptualHash(unittest.TestCase):
+    def test_multi_index_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        table = MultiIndexHashTable(radius=4)
+        hashes = {}
+        base = int(rng.integers(0, 2 ** 63))
+        for i in range(300):
+            value = base
+            for bit in rng.choice(64, size=rng.integers(0, 10), replace=False):
+                value ^= 1 << int(bit)
+            hashes[f'k{i}'] = value
+            table.add(f'k{i}', value)
+        table.remove('k0')
+        del hashes['k0']
+
+        found = {key for key, _ in table.search(base)}
+        expected = {key for key, value in hashes.items() if hamming(base, value) <= 4}
+        self.assertEqual(found, expected)
+        self.assertEqual(len(table), 299)
+
+    def test_resaved_photo_is_near_duplicate(self):
+        photo = make_photo(1)
+        copy = resave(photo)
+        self.assertLessEqual(hamming(phash(photo), phash(copy)), 4)
+        self.assertGreater(hamming(phash(photo), phash(make_photo(2))), 4)
+
+        cache = NearDuplicateCache(max_entries=10, radius=4)
+        cache.add('md5-1', phash(photo), dhash(photo), np.ones((1, 8)))
+        match = cache.find(phash(copy), dhash(copy))
+        self.assertEqual(match['image_hash'], 'md5-1')
+        self.assertEqual(match['embedding'].shape, (8,))
+        other = make_photo(2)
+        self.assertIsNone(cache.find(phash(other), dhash(other)))
+        self.assertEqual(cache.get_stats()['hit_rate'], 50.0)
+
+    def test_eviction_removes_hashes(self):
+        cache = NearDuplicateCache(max_entries=1, radius=2)
+        cache.add('a', 0b1111, 0, np.zeros(4))
+        cache.add('b', 1 << 40, 0, np.zeros(4))
+        self.assertIsNone(cache.find(0b1111, 0))
+        self.assertEqual(cache.find(1 << 40, 0)['image_hash'], 'b')
+
+
+if __name__ == '__main__':
+    unittest.main()
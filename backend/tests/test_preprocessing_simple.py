@@ -0,0 +1,127 @@
+"""
+Tests de parité du preprocessing sans TensorFlow (resize bilinéaire + preprocess_input caffe)
+"""
+import io
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from services.preprocessing_simple import (
+    IMAGENET_MEAN_BGR,
+    open_image,
+    preprocess_from_bytes_simple,
+    preprocess_input,
+    resize_bilinear,
+)
+
+try:
+    import tensorflow as tf
+    from tensorflow.keras.applications.resnet50 import preprocess_input as keras_preprocess_input
+    TENSORFLOW_AVAILABLE = True
+except ImportError:
+    TENSORFLOW_AVAILABLE = False
+
+# Sorties de tf.image.resize + preprocess_input enregistrées avec TensorFlow
+# (tests/fixtures/generate_tf_preprocess_reference.py)
+TF_REFERENCE_PATH = Path(__file__).parent / 'fixtures' / 'tf_preprocess_reference.npz'
+# TensorFlow calcule les poids d'interpolation en float32: jusqu'à ~0.014 d'écart (sur 0-255)
+# avec le calcul exact, dont resize_bilinear reste à 1e-4 (test_resize_matches_tf_kernel)
+TF_ATOL = 2e-2
+
+
+def reference_resize_bilinear(image, target_size):
+    """Noyau de tf.image.resize (ResizeBilinear, half_pixel_centers=True) en NumPy"""
+    image = np.asarray(image, dtype=np.float64)
+    out_h, out_w = target_size
+
+    def axis(out_size, in_size):
+        src = (np.arange(out_size) + 0.5) * (in_size / out_size) - 0.5
+        lower = np.clip(np.floor(src), 0, in_size - 1).astype(int)
+        upper = np.clip(np.ceil(src), 0, in_size - 1).astype(int)
+        return lower, upper, src - np.floor(src)
+
+    y0, y1, dy = axis(out_h, image.shape[0])
+    x0, x1, dx = axis(out_w, image.shape[1])
+    dy, dx = dy[:, None, None], dx[None, :, None]
+    top = image[y0][:, x0] * (1 - dx) + image[y0][:, x1] * dx
+    bottom = image[y1][:, x0] * (1 - dx) + image[y1][:, x1] * dx
+    return top * (1 - dy) + bottom * dy
+
+
+class TestPreprocessingSimple(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.images = [rng.integers(0, 256, size=shape, dtype=np.uint8)
+                       for shape in ((480, 640, 3), (100, 37, 3), (224, 224, 3), (50, 120, 3))]
+
+    def test_resize_matches_tf_kernel(self):
+        for image in self.images:
+            resized = resize_bilinear(image, (224, 224))
+            self.assertEqual(resized.shape, (224, 224, 3))
+            self.assertEqual(resized.dtype, np.float32)
+            np.testing.assert_allclose(
+                resized, reference_resize_bilinear(image, (224, 224)), atol=1e-3
+            )
+
+    def test_preprocess_input_caffe(self):
+        image = np.array([[[10.0, 20.0, 30.0]]], dtype=np.float32)
+        np.testing.assert_allclose(
+            preprocess_input(image)[0, 0], np.array([30.0, 20.0, 10.0]) - IMAGENET_MEAN_BGR
+        )
+
+    def test_preprocess_from_bytes(self):
+        buffer = io.BytesIO()
+        Image.fromarray(self.images[0]).save(buffer, format='PNG')
+        result = preprocess_from_bytes_simple(buffer.getvalue())
+        self.assertEqual(result.shape, (1, 224, 224, 3))
+        expected = (
+            reference_resize_bilinear(self.images[0], (224, 224))[..., ::-1] - IMAGENET_MEAN_BGR
+        )
+        np.testing.assert_allclose(result[0], expected, atol=1e-3)
+
+    def test_jpeg_reduced_decoding(self):
+        # Photo 4000x3000 lisse (dégradé) : le décodage réduit à 1/4 est quasi identique
+        y, x = np.mgrid[0:3000, 0:4000]
+        channels = [x * 255 // 4000, y * 255 // 3000, (x + y) * 255 // 7000]
+        photo = np.stack(channels, axis=-1).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(photo).save(buffer, format='JPEG', quality=95)
+        data = buffer.getvalue()
+
+        self.assertEqual(open_image(io.BytesIO(data)).size, (1000, 750))
+        full = preprocess_input(
+            resize_bilinear(np.array(Image.open(io.BytesIO(data)).convert('RGB')), (224, 224))
+        )
+        reduced = preprocess_from_bytes_simple(data)[0]
+        self.assertLess(float(np.mean(np.abs(reduced - full))), 2.0)
+
+        # Petites images et formats sans DCT: décodage complet
+        small = io.BytesIO()
+        Image.fromarray(photo[:300, :400]).save(small, format='JPEG')
+        self.assertEqual(open_image(io.BytesIO(small.getvalue())).size, (400, 300))
+        png = io.BytesIO()
+        Image.fromarray(photo[:1000, :1000]).save(png, format='PNG')
+        self.assertEqual(open_image(io.BytesIO(png.getvalue())).size, (1000, 1000))
+
+    def test_parity_with_tensorflow_fixture(self):
+        reference = np.load(TF_REFERENCE_PATH)
+        target_size = tuple(int(v) for v in reference['target_size'])
+        inputs = sorted(name for name in reference.files if name.startswith('input_'))
+        self.assertTrue(inputs)
+        for name in inputs:
+            expected = reference[name.replace('input_', 'expected_')]
+            result = preprocess_input(resize_bilinear(reference[name], target_size))
+            np.testing.assert_allclose(result, expected, atol=TF_ATOL)
+
+    @unittest.skipUnless(TENSORFLOW_AVAILABLE, "TensorFlow not available")
+    def test_parity_with_tensorflow(self):
+        for image in self.images:
+            expected = keras_preprocess_input(tf.image.resize(image, (224, 224)).numpy())
+            result = preprocess_input(resize_bilinear(image, (224, 224)))
+            np.testing.assert_allclose(result, expected, atol=TF_ATOL)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Tests pour les filtres par bitmaps d'attributs et la recherche filtrée
+"""
+import unittest
+
+import numpy as np
+
+from services.ann_index import HNSWIndex, IVFIndex
+from services.product_filters import ProductAttributes
+from services.search_engine_npy import SearchEngineNPY, normalize_rows
+
+
+class TestProductFilters(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.n = 300
+        self.product_ids = np.arange(2000, 2000 + self.n)
+        self.records = [
+            {
+                'id': int(pid),
+                'category': ['electronique', 'jouets', 'test_screenshots'][i % 3],
+                'brand': ['Apple', 'apple ', 'Lego', None][i % 4],
+                'color': ['Noir', 'Blanc'][i % 2],
+                'price': None if i % 10 == 0 else float(i)
+            }
+            for i, pid in enumerate(self.product_ids)
+            if i != 7  # produit supprimé de la base
+        ]
+        self.attributes = ProductAttributes.from_records(self.product_ids, self.records)
+        self.vectors = normalize_rows(rng.normal(size=(self.n, 32)))
+
+        self.engine = SearchEngineNPY(ann_params={'ivf': {'nlist': 8}})
+        self.engine.feature_database = self.vectors
+        self.engine.product_ids = self.product_ids
+        self.engine._index_built = True
+        self.engine.load_attributes(self.records)
+
+    def _expected_mask(self, predicate):
+        by_id = {r['id']: r for r in self.records}
+        return np.array([pid in by_id and predicate(by_id[pid]) for pid in self.product_ids])
+
+    def test_build_mask_matches_sql_semantics(self):
+        mask = self.attributes.build_mask(
+            category='electronique', brand='APPLE', min_price=20, max_price=200
+        )
+        expected = self._expected_mask(
+            lambda r: r['category'] == 'electronique'
+            and (r['brand'] or '').strip().lower() == 'apple'
+            and r['price'] is not None and 20 <= r['price'] <= 200
+        )
+        np.testing.assert_array_equal(mask, expected)
+
+    def test_build_mask_exclusions_and_unknown_values(self):
+        mask = self.attributes.build_mask(exclude_categories=('test_screenshots',))
+        np.testing.assert_array_equal(
+            mask, self._expected_mask(lambda r: r['category'] != 'test_screenshots')
+        )
+        self.assertFalse(mask[7])
+        self.assertFalse(self.attributes.build_mask(color='violet').any())
+        self.assertEqual(self.attributes.category_of(1), 'jouets')
+
+    def test_filtered_search_is_exact(self):
+        mask = self.engine.build_filter_mask(color='noir', exclude_product_ids=(2004,))
+        query = self.vectors[4]
+        results = self.engine.search_similar(query, top_k=10, mask=mask)
+
+        rows = np.flatnonzero(mask)
+        expected = rows[np.argsort(-(self.vectors[rows] @ query))[:10]]
+        self.assertEqual([r['product_id'] for r in results], self.product_ids[expected].tolist())
+        self.assertNotIn(2004, [r['product_id'] for r in results])
+
+        batch = self.engine.search_similar_batch(self.vectors[:3], top_k=10, mask=mask)
+        single = self.engine.search_similar(self.vectors[0], top_k=10, mask=mask)
+        self.assertEqual([r['product_id'] for r in batch[0]], [r['product_id'] for r in single])
+
+    def test_ann_indexes_respect_mask(self):
+        mask = self.attributes.build_mask(category='jouets')
+        for index in (IVFIndex(nlist=8).build(self.vectors), HNSWIndex(M=8).build(self.vectors)):
+            ids, scores = index.search(self.vectors[1], 10, mask=mask, nprobe=8, ef=64)
+            self.assertEqual(len(ids), 10)
+            self.assertTrue(mask[ids].all())
+            self.assertTrue(np.all(np.diff(scores) <= 0))
+
+        self.engine.build_ann_index('sq8')
+        results = self.engine.search_similar(self.vectors[1], top_k=10, method='sq8', mask=mask)
+        self.assertTrue(
+            all(self.engine.get_product_category(r['product_id']) == 'jouets' for r in results)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,14 @@ except Exception as e:
     print(f"Warning: Could not import app: {e}", file=sys.stderr)
 
 
+def database_available():
+    """Vrai si PostgreSQL répond (les routes qui lisent directement la base en dépendent)"""
+    if not APP_AVAILABLE:
+        return False
+    from models.database import get_db
+    return get_db().execute_query('SELECT 1') is not None
+
+
 class TestRoutes(unittest.TestCase):
     """Tests pour les routes API"""
     
@@ -56,6 +64,8 @@ class TestRoutes(unittest.TestCase):
     
     def test_get_random_products(self):
         """Test la route GET /api/products/random"""
+        if not database_available():
+            self.skipTest("Database not available")
         # Test avec count par défaut
         response = self.client.get('/api/products/random')
         self.assertEqual(response.status_code, 200)
@@ -86,24 +96,22 @@ class TestRoutes(unittest.TestCase):
         data = response.get_json()
         self.assertIn('error', data)
     
-    def test_search_text_post(self):
-        """Test la route POST /api/search/text"""
-        # Test avec JSON valide
-        response = self.client.post(
-            '/api/search/text',
-            json={'query': 'casque', 'limit': 10}
-        )
+    def test_search_text_limit(self):
+        """Test la route GET /api/search/text avec limit (la route n'accepte que GET)"""
+        response = self.client.get('/api/search/text?q=casque&limit=10')
         self.assertEqual(response.status_code, 200)
         data = response.get_json()
         self.assertIn('results', data)
         self.assertIn('count', data)
+        self.assertLessEqual(len(data['results']), 10)
         
-        # Test avec requête vide
-        response = self.client.post(
-            '/api/search/text',
-            json={'query': ''}
-        )
+        # Requête vide (espaces seulement)
+        response = self.client.get('/api/search/text?q=%20&limit=10')
         self.assertEqual(response.status_code, 400)
+        
+        # POST non supporté
+        response = self.client.post('/api/search/text', json={'query': 'casque', 'limit': 10})
+        self.assertEqual(response.status_code, 405)
     
     def test_search_text_with_filters(self):
         """Test la route /api/search/text avec filtres"""
@@ -131,6 +139,11 @@ class TestRoutes(unittest.TestCase):
         # Devrait retourner 400 ou 500 selon l'implémentation
         self.assertIn(response.status_code, [400, 500])
     
+    def test_search_by_product_unknown(self):
+        """Test la route GET /api/search/product/<id> avec un produit non indexé"""
+        response = self.client.get('/api/search/product/999999999')
+        self.assertIn(response.status_code, [404, 500])
+    
     def test_search_image_with_file(self):
         """Test la route POST /api/search/image avec fichier"""
         # Créer un fichier image temporaire
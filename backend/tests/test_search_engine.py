@@ -0,0 +1,153 @@
+"""
+Tests pour le moteur de recherche SearchEngineNPY
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from services.search_engine_npy import (
+    SearchEngineNPY,
+    normalize_rows,
+    normalized_features_path,
+    top_k_indices,
+)
+
+
+class TestSearchEngineNPY(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.features = rng.random((200, 64)).astype(np.float32)
+        self.product_ids = np.arange(1000, 1200, dtype=np.int32)
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.features_path = os.path.join(self.tmp_dir, 'product_features_resnet50.npy')
+        self.ids_path = os.path.join(self.tmp_dir, 'product_ids.npy')
+        np.save(self.features_path, self.features)
+        np.save(self.ids_path, self.product_ids)
+
+        self.engine = SearchEngineNPY()
+        self.assertTrue(self.engine.load_features_from_npy(
+            features_path=self.features_path,
+            product_ids_path=self.ids_path,
+            products_json_path=os.path.join(self.tmp_dir, 'missing.json')
+        ))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _exact_ranking(self, query):
+        normalized = self.features / np.linalg.norm(self.features, axis=1, keepdims=True)
+        scores = normalized @ (query / np.linalg.norm(query))
+        order = np.argsort(-scores)
+        return order, scores
+
+    def test_feature_database_is_normalized_contiguous_float32(self):
+        db = self.engine.feature_database
+        self.assertEqual(db.dtype, np.float32)
+        self.assertTrue(db.flags['C_CONTIGUOUS'])
+        np.testing.assert_allclose(np.linalg.norm(db, axis=1), 1.0, atol=1e-5)
+
+    def test_mmap_loading_matches_in_memory(self):
+        self.assertIsInstance(self.engine.feature_database, np.memmap)
+        self.assertTrue(normalized_features_path(self.features_path).exists())
+
+        in_memory = SearchEngineNPY()
+        in_memory.load_features_from_npy(
+            features_path=self.features_path,
+            product_ids_path=self.ids_path,
+            products_json_path=os.path.join(self.tmp_dir, 'missing.json'),
+            mmap=False
+        )
+        self.assertNotIsInstance(in_memory.feature_database, np.memmap)
+        np.testing.assert_allclose(
+            in_memory.feature_database, self.engine.feature_database, rtol=1e-6
+        )
+
+    def test_mmap_regenerates_stale_file(self):
+        new_features = self.features[::-1].copy()
+        np.save(self.features_path, new_features)
+        normalized_path = normalized_features_path(self.features_path)
+        os.utime(normalized_path, (0, 0))
+
+        engine = SearchEngineNPY()
+        engine.load_features_from_npy(
+            features_path=self.features_path,
+            product_ids_path=self.ids_path,
+            products_json_path=os.path.join(self.tmp_dir, 'missing.json')
+        )
+        np.testing.assert_allclose(engine.feature_database, normalize_rows(new_features), rtol=1e-6)
+
+    def test_normalize_rows_zero_vector(self):
+        matrix = np.array([[0.0, 0.0], [3.0, 4.0]])
+        normalized = normalize_rows(matrix)
+        np.testing.assert_array_equal(normalized[0], [0.0, 0.0])
+        np.testing.assert_allclose(normalized[1], [0.6, 0.8])
+
+    def test_top_k_indices_sorted(self):
+        scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+        np.testing.assert_array_equal(top_k_indices(scores, 3), [1, 3, 2])
+        np.testing.assert_array_equal(top_k_indices(scores, 10), [1, 3, 2, 4, 0])
+        self.assertEqual(len(top_k_indices(scores, 0)), 0)
+
+    def test_search_matches_exact_cosine(self):
+        query = self.features[17] + 0.05
+        order, scores = self._exact_ranking(query)
+
+        results = self.engine.search_similar(query.reshape(1, -1), top_k=10)
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(
+            [r['product_id'] for r in results], [int(self.product_ids[i]) for i in order[:10]]
+        )
+        np.testing.assert_allclose(
+            [r['similarity_score'] for r in results], scores[order[:10]], rtol=1e-5
+        )
+
+    def test_search_min_similarity(self):
+        query = self.features[3]
+        _, scores = self._exact_ranking(query)
+        threshold = float(np.sort(scores)[-4])
+
+        results = self.engine.search_similar(query, top_k=50, min_similarity=threshold)
+
+        self.assertTrue(all(r['similarity_score'] >= threshold for r in results))
+        self.assertEqual(results[0]['product_id'], int(self.product_ids[3]))
+
+    def test_search_batch_matches_single_queries(self):
+        queries = self.features[:7] + 0.05
+        batch = self.engine.search_similar_batch(queries, top_k=5, min_similarity=0.1, block_size=3)
+
+        self.assertEqual(len(batch), 7)
+        for query, results in zip(queries, batch):
+            single = self.engine.search_similar(query, top_k=5, min_similarity=0.1)
+            self.assertEqual([r['product_id'] for r in results], [r['product_id'] for r in single])
+            np.testing.assert_allclose(
+                [r['similarity_score'] for r in results],
+                [r['similarity_score'] for r in single],
+                rtol=1e-5,
+            )
+
+    def test_search_batch_ann_method(self):
+        self.engine.build_ann_index('sq8')
+        batch = self.engine.search_similar_batch(self.features[:3], top_k=4, method='sq8')
+        self.assertEqual([results[0]['product_id'] for results in batch], [1000, 1001, 1002])
+
+    def test_get_feature_vector_by_product_id(self):
+        vector = self.engine.get_feature_vector(1042)
+        np.testing.assert_allclose(vector, normalize_rows(self.features[42:43])[0], rtol=1e-6)
+        self.assertIsNone(self.engine.get_feature_vector(42))
+
+        results = self.engine.search_similar(vector, top_k=3)
+        self.assertEqual(results[0]['product_id'], 1042)
+        self.assertAlmostEqual(results[0]['similarity_score'], 1.0, places=5)
+
+    def test_search_invalid_method(self):
+        with self.assertRaises(ValueError):
+            self.engine.search_similar(self.features[0], top_k=5, method='unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
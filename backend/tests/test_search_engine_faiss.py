@@ -0,0 +1,102 @@
+"""
+Tests pour SearchEngineFAISS (lecteur NumPy de l'index plat, index IVF si faiss est installé)
+"""
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from services.search_engine_faiss import (
+    DEFAULT_INDEX_PATH,
+    FAISS_AVAILABLE,
+    SearchEngineFAISS,
+    ids_path_for,
+    read_flat_index_numpy,
+)
+
+
+@unittest.skipUnless(DEFAULT_INDEX_PATH.exists(), "faiss_index_flat.bin not available")
+class TestSearchEngineFAISS(unittest.TestCase):
+    def setUp(self):
+        self.engine = SearchEngineFAISS(use_faiss=False)
+        self.assertTrue(self.engine.load_index())
+        self.vectors, _ = read_flat_index_numpy(DEFAULT_INDEX_PATH)
+        self.product_ids = np.load(ids_path_for(DEFAULT_INDEX_PATH))
+
+    def test_read_flat_index(self):
+        self.assertEqual(self.vectors.shape, (len(self.product_ids), 2048))
+        self.assertEqual(self.vectors.dtype, np.float32)
+
+    def test_search_returns_self_first(self):
+        results = self.engine.search_similar(self.vectors[5], top_k=5)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0]['product_id'], int(self.product_ids[5]))
+        self.assertAlmostEqual(results[0]['similarity_score'], 1.0, places=4)
+        scores = [r['similarity_score'] for r in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_get_feature_vector(self):
+        np.testing.assert_allclose(self.engine.get_feature_vector(int(self.product_ids[3])),
+                                   self.vectors[3], atol=1e-6)
+        self.assertIsNone(self.engine.get_feature_vector(-1))
+
+    def test_search_invalid_method(self):
+        with self.assertRaises(ValueError):
+            self.engine.search_similar(self.vectors[0], method='hnsw')
+
+
+@unittest.skipUnless(FAISS_AVAILABLE, "faiss not installed")
+class TestSearchEngineFAISSIVF(unittest.TestCase):
+    def setUp(self):
+        import faiss
+
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((2000, 32)).astype(np.float32)
+        self.vectors /= np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        self.product_ids = np.arange(100, 2100)
+        self.nlist = 16
+
+        quantizer = faiss.IndexFlatIP(32)
+        index = faiss.IndexIVFFlat(quantizer, 32, self.nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(self.vectors)
+        index.add(self.vectors)
+        self.index_nprobe = index.nprobe
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        index_path = Path(self.tmpdir.name) / 'faiss_index_ivf.bin'
+        faiss.write_index(index, str(index_path))
+        np.save(ids_path_for(index_path), self.product_ids)
+
+        self.engine = SearchEngineFAISS()
+        self.assertTrue(self.engine.load_index(index_path))
+        self.query = rng.standard_normal(32).astype(np.float32)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _ids(self, nprobe):
+        results = self.engine.search_similar(self.query, top_k=50, nprobe=nprobe)
+        return [r['product_id'] for r in results]
+
+    def test_nprobe_is_per_call(self):
+        narrow, full = self._ids(1), self._ids(self.nlist)
+        exact = self.product_ids[np.argsort(-(self.vectors @ self.query))[:50]].tolist()
+        self.assertEqual(full, exact)
+        self.assertNotEqual(narrow, full)
+
+        # L'index partagé n'est jamais modifié
+        self.assertEqual(self.engine.index.nprobe, self.index_nprobe)
+        self.assertEqual(self._ids(1), narrow)
+
+        # Requêtes concurrentes avec des nprobe différents
+        nprobes = [1, self.nlist] * 50
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(self._ids, nprobes))
+        for nprobe, ids in zip(nprobes, results):
+            self.assertEqual(ids, narrow if nprobe == 1 else full)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests du cache partagé entre workers (L2 SQLite) et du TieredCache
+Deux TieredCache sur le même fichier jouent le rôle de deux workers.
+"""
+import os
+import tempfile
+import unittest
+
+from services.cache import TieredCache
+from services.shared_cache import SharedCache
+
+
+class TestTieredCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'shared_cache.sqlite')
+        self.worker_a = TieredCache(SharedCache(self.path), sync_interval=0)
+        self.worker_b = TieredCache(SharedCache(self.path), sync_interval=0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_value_shared_between_workers(self):
+        key = self.worker_a._generate_key('search_image', image_hash='abc', top_k=10)
+        self.assertTrue(key.startswith('search_image:'))
+        self.worker_a.set(key, {'results': [1, 2]}, ttl=60)
+        self.assertEqual(self.worker_b.get(key), {'results': [1, 2]})
+        # Copié dans le L1 du worker B
+        self.assertEqual(self.worker_b.get_stats()['size'], 1)
+
+    def test_get_or_compute_reuses_other_worker_result(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'results': [3]}
+
+        self.assertEqual(
+            self.worker_a.get_or_compute('search_product:1', compute, ttl=60), {'results': [3]}
+        )
+        self.assertEqual(
+            self.worker_b.get_or_compute('search_product:1', compute, ttl=60), {'results': [3]}
+        )
+        self.assertEqual(len(calls), 1)
+
+    def test_clear_and_invalidate_across_workers(self):
+        self.worker_a.set('search_image:1', 'a', ttl=60)
+        self.worker_a.set('search_product:1', 'b', ttl=60)
+        self.worker_b.get('search_image:1')
+        self.worker_b.get('search_product:1')
+
+        cleared = []
+        self.worker_b.add_clear_listener(lambda: cleared.append(1))
+        self.assertEqual(self.worker_a.invalidate('search_image:'), 1)
+        self.assertIsNone(self.worker_b.get('search_image:1'))
+        self.assertEqual(self.worker_b.get('search_product:1'), 'b')
+
+        self.worker_a.clear()
+        self.assertIsNone(self.worker_b.get('search_product:1'))
+        self.assertEqual(cleared, [1])
+        self.assertEqual(self.worker_b.get_stats()['size'], 0)
+
+    def test_stats_cover_all_workers(self):
+        self.worker_a.set('k', 'v', ttl=60)
+        self.worker_a.get('k')
+        self.worker_b.get('k')
+        self.worker_a.get_stats()
+        stats = self.worker_b.get_stats()
+        self.assertEqual(stats['shared']['size'], 1)
+        self.assertEqual(stats['cluster']['workers'], 2)
+        self.assertEqual(stats['cluster']['hits'], 2)
+
+    def test_delete_is_exact_across_workers(self):
+        self.worker_a.set('search_image:ab', 1, ttl=60)
+        self.worker_a.set('search_image:abc', 2, ttl=60)
+        self.worker_b.get('search_image:ab')
+        self.worker_b.get('search_image:abc')
+
+        self.assertTrue(self.worker_a.delete('search_image:ab'))
+        self.assertIsNone(self.worker_b.get('search_image:ab'))
+        self.assertEqual(self.worker_b.get('search_image:abc'), 2)
+        self.assertFalse(self.worker_a.delete('search_image:ab'))
+
+    def test_file_is_private(self):
+        mode = os.stat(self.path).st_mode & 0o777
+        self.assertEqual(mode, 0o600)
+        shared_dir = os.path.join(self.tmpdir.name, 'shared')
+        os.mkdir(shared_dir)
+        os.chmod(shared_dir, 0o777)
+        with self.assertRaises(PermissionError):
+            SharedCache(os.path.join(shared_dir, 'cache.sqlite'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests pour la table des produits similaires précalculés
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from services.search_engine_npy import normalize_rows
+from services import similar_products
+from services.similar_products import (
+    NeighborTable,
+    SimilarProductsTable,
+    compute_neighbor_table,
+    save_neighbor_table,
+)
+
+
+class TestSimilarProducts(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.features = normalize_rows(rng.normal(size=(150, 32)))
+        self.product_ids = np.arange(500, 650)
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_blocked_table_matches_exact_neighbors(self):
+        neighbors, scores = compute_neighbor_table(self.features, 10, block_size=16)
+        self.assertEqual(neighbors.shape, (150, 10))
+
+        for row in (0, 17, 149):
+            exact_scores = self.features @ self.features[row]
+            exact_scores[row] = -np.inf
+            np.testing.assert_array_equal(neighbors[row], np.argsort(-exact_scores)[:10])
+            np.testing.assert_allclose(scores[row], exact_scores[neighbors[row]], rtol=1e-5)
+        self.assertFalse(np.any(neighbors == np.arange(150)[:, None]))
+
+    def test_save_and_get(self):
+        neighbors, scores = compute_neighbor_table(self.features, 10)
+        path = os.path.join(self.tmp_dir, 'similar_products.npz')
+        save_neighbor_table(path, self.product_ids, neighbors, scores)
+
+        table = SimilarProductsTable()
+        self.assertTrue(table.load(path))
+        self.assertIn(510, table)
+        self.assertIsNone(table.get(42))
+
+        results = table.get(510, top_k=5)
+        self.assertEqual(
+            [r['product_id'] for r in results], (self.product_ids[neighbors[10, :5]]).tolist()
+        )
+        self.assertAlmostEqual(results[0]['similarity_score'], float(scores[10, 0]), places=2)
+
+        threshold = float(scores[10, 2])
+        filtered = table.get(510, top_k=10, min_similarity=threshold)
+        self.assertTrue(all(r['similarity_score'] >= threshold for r in filtered))
+        self.assertLess(len(filtered), 10)
+
+    def test_missing_table(self):
+        table = SimilarProductsTable()
+        self.assertFalse(table.load(os.path.join(self.tmp_dir, 'missing.npz')))
+        self.assertFalse(table.is_loaded())
+
+    def test_table_published_once_complete(self):
+        neighbors, scores = compute_neighbor_table(self.features, 10)
+        path = os.path.join(self.tmp_dir, 'similar_products.npz')
+        save_neighbor_table(path, self.product_ids, neighbors, scores)
+        table = SimilarProductsTable()
+
+        seen_during_build = []
+
+        class ObservedNeighborTable(NeighborTable):
+            def __init__(self, *args):
+                super().__init__(*args)
+                # Index construit mais pas encore publié: un lecteur ne voit rien
+                seen_during_build.append((table.is_loaded(), 510 in table, table.get(510)))
+
+        with mock.patch.object(similar_products, 'NeighborTable', ObservedNeighborTable):
+            self.assertTrue(table.load(path))
+        self.assertEqual(seen_during_build, [(False, False, None)])
+        self.assertTrue(table.is_loaded())
+        self.assertEqual(len(table.get(510, top_k=5)), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -123,6 +123,31 @@ export async function searchByImage(
   }
 }
 
+/**
+ * Produits similaires à un produit du catalogue (sans renvoyer son image)
+ */
+export async function searchSimilarToProduct(
+  productId: number,
+  topK: number = 10,
+  minSimilarity: number = 0.5
+): Promise<SearchResult> {
+  try {
+    const response = await fetchWithTimeout(
+      `${API_BASE_URL}/api/search/product/${productId}?top_k=${topK}&min_similarity=${minSimilarity}`,
+      { method: 'GET' }
+    )
+
+    const data = await handleResponse<SearchResult>(response)
+    return {
+      results: data.results || [],
+      count: data.count || data.results?.length || 0,
+    }
+  } catch (error) {
+    console.error(`Error searching products similar to ${productId}:`, error)
+    throw error
+  }
+}
+
 /**
  * Recherche par texte
  */
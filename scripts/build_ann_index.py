@@ -0,0 +1,72 @@
+"""
+Construit les index ANN de SearchEngineNPY hors ligne
+Lit data/product_features_resnet50.npy, construit les index demandés avec les
+paramètres de la configuration (IVF_*, HNSW_*, PQ_*) et les écrit à côté du
+fichier de features (<nom>_<index>_<partie>.npy). Le backend les recharge au
+démarrage au lieu de les construire pendant une requête.
+"""
+import sys
+import time
+from pathlib import Path
+
+backend_path = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+from dotenv import load_dotenv
+load_dotenv(dotenv_path=backend_path / '.env')
+
+from config import Config
+from services.search_engine_npy import ANN_INDEX_TYPES, SearchEngineNPY
+
+DEFAULT_METHODS = ('ivf', 'hnsw', 'pq')
+
+
+def build_ann_indexes(methods):
+    """Construit et sauvegarde les index ANN demandés"""
+    print("=" * 80)
+    print("CONSTRUCTION DES INDEX ANN")
+    print("=" * 80)
+    print()
+
+    engine = SearchEngineNPY(ann_params={
+        'ivf': {'nlist': Config.IVF_NLIST, 'nprobe': Config.IVF_NPROBE},
+        'hnsw': {
+            'M': Config.HNSW_M,
+            'ef_construction': Config.HNSW_EF_CONSTRUCTION,
+            'ef_search': Config.HNSW_EF_SEARCH
+        },
+        'pq': {'m': Config.PQ_M, 'nbits': Config.PQ_NBITS}
+    })
+    if not engine.load_features_from_npy(mmap=Config.FEATURES_MMAP):
+        print("[ERREUR] Impossible de charger les features")
+        print("   Executez d'abord: python scripts/save_features_to_npy.py")
+        return False
+
+    n, d = engine.feature_database.shape
+    print(f"[OK] {n} vecteurs de dimension {d} charges")
+
+    for method in methods:
+        start = time.time()
+        index = engine.build_ann_index(method, save=True)
+        print(f"[OK] Index {method} pret en {time.time() - start:.2f}s "
+              f"({index.memory_usage() / 1024 ** 2:.1f} Mo)")
+        for path in index.file_paths(engine.features_path):
+            print(f"  - {path}")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Construit et sauvegarde les index ANN')
+    parser.add_argument('--methods', type=str, default=','.join(DEFAULT_METHODS),
+                        help=f'Index a construire parmi {", ".join(ANN_INDEX_TYPES)}')
+    args = parser.parse_args()
+
+    methods = [m.strip() for m in args.methods.split(',') if m.strip()]
+    unknown = [m for m in methods if m not in ANN_INDEX_TYPES]
+    if unknown:
+        parser.error(f"Index inconnu(s): {', '.join(unknown)}")
+
+    success = build_ann_indexes(methods)
+    sys.exit(0 if success else 1)
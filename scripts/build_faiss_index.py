@@ -0,0 +1,122 @@
+"""
+Construit des variantes IVF / PQ de l'index FAISS
+Lit backend/data/faiss_index_flat.bin (+ _ids.npy) et écrit à côté:
+- faiss_index_ivf<nlist>_flat.bin : IVF sans compression (scan SIMD des cellules sondées)
+- faiss_index_ivf<nlist>_pq<m>.bin: IVF + product quantization (m octets par vecteur)
+- faiss_index_pq<m>.bin           : PQ seul (scan exhaustif des codes compressés)
+Les vecteurs sont normalisés L2 et indexés en produit scalaire (score = cosinus)
+"""
+import sys
+import shutil
+import math
+from pathlib import Path
+import numpy as np
+
+backend_path = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+from services.search_engine_faiss import DEFAULT_INDEX_PATH, ids_path_for, read_flat_index_numpy
+from services.search_engine_npy import normalize_rows
+
+VARIANTS = ('ivf_flat', 'ivf_pq', 'pq')
+
+
+def load_flat_vectors(index_path):
+    """Charge les vecteurs de l'index plat (via faiss si disponible)"""
+    try:
+        import faiss
+        index = faiss.read_index(str(index_path))
+        return index.reconstruct_n(0, index.ntotal)
+    except ImportError:
+        vectors, _ = read_flat_index_numpy(index_path)
+        return np.array(vectors)
+
+
+def build_variant(faiss, variant, vectors, nlist, m, nbits):
+    """Construit et entraîne une variante d'index"""
+    d = vectors.shape[1]
+    metric = faiss.METRIC_INNER_PRODUCT
+    if variant == 'ivf_flat':
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFFlat(quantizer, d, nlist, metric)
+        name = f"faiss_index_ivf{nlist}_flat.bin"
+    elif variant == 'ivf_pq':
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFPQ(quantizer, d, nlist, m, nbits, metric)
+        name = f"faiss_index_ivf{nlist}_pq{m}.bin"
+    else:
+        index = faiss.IndexPQ(d, m, nbits, metric)
+        name = f"faiss_index_pq{m}.bin"
+
+    index.train(vectors)
+    index.add(vectors)
+    return index, name
+
+
+def build_faiss_indexes(index_path, variants, nlist=None, m=64, nbits=8):
+    """Construit les variantes demandées à côté de l'index plat"""
+    try:
+        import faiss
+    except ImportError:
+        print("[ERREUR] faiss n'est pas installe (pip install faiss-cpu)")
+        return False
+
+    index_path = Path(index_path)
+    ids_path = ids_path_for(index_path)
+    if not index_path.exists() or not ids_path.exists():
+        print(f"[ERREUR] Index ou ids non trouves: {index_path}, {ids_path}")
+        return False
+
+    vectors = normalize_rows(load_flat_vectors(index_path))
+    n, d = vectors.shape
+    print(f"[OK] {n} vecteurs de dimension {d} charges depuis {index_path}")
+
+    if d % m != 0:
+        print(f"[ERREUR] La dimension {d} doit etre divisible par m={m}")
+        return False
+
+    # k-means: au moins un point d'entraînement par centroïde
+    nlist = min(nlist or int(4 * math.sqrt(n)), n)
+    while nbits > 1 and 2 ** nbits > n:
+        nbits -= 1
+    print(f"     nlist={nlist}, m={m}, nbits={nbits}")
+
+    for variant in variants:
+        index, name = build_variant(faiss, variant, vectors, nlist, m, nbits)
+        output_path = index_path.with_name(name)
+        faiss.write_index(index, str(output_path))
+        shutil.copyfile(ids_path, ids_path_for(output_path))
+
+        code_size = index.sa_code_size() if hasattr(index, 'sa_code_size') else d * 4
+        print(f"[OK] {variant}: {output_path} ({code_size} octets/vecteur au lieu de {d * 4})")
+
+    print()
+    print("Utilisation: SEARCH_BACKEND=faiss FAISS_INDEX_PATH=<fichier> python app.py")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Construit des variantes IVF/PQ de l index FAISS')
+    parser.add_argument('--index', type=str, default=str(DEFAULT_INDEX_PATH),
+                        help='Index FAISS plat source (defaut: backend/data/faiss_index_flat.bin)')
+    parser.add_argument('--variants', type=str, default=','.join(VARIANTS),
+                        help=f'Variantes a construire parmi {", ".join(VARIANTS)}')
+    parser.add_argument(
+        '--nlist', type=int, default=None, help='Nombre de cellules IVF (defaut: 4*sqrt(N))'
+    )
+    parser.add_argument('--m', type=int, default=64, help='Nombre de sous-quantificateurs PQ')
+    parser.add_argument('--nbits', type=int, default=8, help='Bits par code PQ')
+    args = parser.parse_args()
+
+    variants = [v.strip() for v in args.variants.split(',') if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown:
+        print(f"[ERREUR] Variantes inconnues: {', '.join(unknown)}")
+        sys.exit(1)
+
+    success = build_faiss_indexes(
+        args.index, variants, nlist=args.nlist, m=args.m, nbits=args.nbits
+    )
+    sys.exit(0 if success else 1)
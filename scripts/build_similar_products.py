@@ -0,0 +1,64 @@
+"""
+Précalcule les produits similaires de chaque produit du catalogue
+Lit data/product_features_resnet50.npy (via SearchEngineNPY, pour les vrais ids),
+calcule les K plus proches voisins de chaque ligne par blocs de GEMM et écrit
+data/similar_products.npz, servi par /api/products/<id>/similar
+"""
+import sys
+import time
+from pathlib import Path
+
+backend_path = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+from dotenv import load_dotenv
+load_dotenv(dotenv_path=backend_path / '.env')
+
+from services.search_engine_npy import SearchEngineNPY
+from services.similar_products import (
+    DEFAULT_TABLE_PATH,
+    compute_neighbor_table,
+    save_neighbor_table,
+)
+
+
+def build_similar_products(output_path, k=50, block_size=None):
+    """Calcule et sauvegarde la table des voisins"""
+    print("=" * 80)
+    print("PRECALCUL DES PRODUITS SIMILAIRES")
+    print("=" * 80)
+    print()
+
+    engine = SearchEngineNPY()
+    if not engine.load_features_from_npy():
+        print("[ERREUR] Impossible de charger les features")
+        print("   Executez d'abord: python scripts/save_features_to_npy.py")
+        return False
+
+    n = engine.feature_database.shape[0]
+    print(f"[OK] {n} produits charges")
+
+    start = time.time()
+    neighbors, scores = compute_neighbor_table(engine.feature_database, k, block_size=block_size)
+    print(f"[OK] {neighbors.shape[1]} voisins par produit calcules en {time.time() - start:.2f}s")
+
+    output_path = save_neighbor_table(output_path, engine.product_ids, neighbors, scores)
+    size_kb = output_path.stat().st_size / 1024
+    print(f"[OK] Table sauvegardee: {output_path} ({size_kb:.0f} Ko)")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Precalcule les produits similaires de chaque produit'
+    )
+    parser.add_argument('--output', type=str, default=str(DEFAULT_TABLE_PATH),
+                        help='Fichier de sortie (defaut: data/similar_products.npz)')
+    parser.add_argument('--k', type=int, default=50, help='Nombre de voisins par produit')
+    parser.add_argument('--block-size', type=int, default=None, help='Produits par bloc de GEMM')
+    args = parser.parse_args()
+
+    success = build_similar_products(args.output, k=args.k, block_size=args.block_size)
+    sys.exit(0 if success else 1)
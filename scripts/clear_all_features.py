@@ -11,7 +11,7 @@ sys.path.insert(0, str(backend_path))
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=backend_path / '.env')
 
-from models.database import get_db
+from models.database import DatabaseConnection
 
 def clear_all_features():
     """Efface toutes les features de la base de données"""
@@ -20,7 +20,9 @@ def clear_all_features():
     print("=" * 80)
     print()
     
-    db = get_db()
+    # Connexion dédiée en écriture (le pool de l'application est en lecture seule)
+    db = DatabaseConnection()
+    db.connect()
     
     # Compter les features existantes
     count_query = "SELECT COUNT(*) as count FROM product_features"
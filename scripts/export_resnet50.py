@@ -0,0 +1,109 @@
+"""
+Exporte le ResNet50 de ResNet50FeatureExtractor (include_top=False, pooling='avg')
+vers ONNX (tf2onnx) et TFLite, pour les backends d'inférence CPU sans TensorFlow
+(INFERENCE_BACKEND=onnx ou tflite), puis vérifie que les embeddings exportés
+correspondent à ceux du modèle keras
+"""
+import sys
+import time
+from pathlib import Path
+
+backend_path = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.applications import ResNet50
+
+from services.feature_extractor_runtime import (
+    DEFAULT_MODEL_PATHS, INPUT_SHAPE, RUNNERS, embedding_parity
+)
+
+# Seuil de parité: l'index .npy reste valide si les embeddings sont quasi identiques
+MIN_COSINE = 0.9999
+
+
+def export_onnx(model, output_path, opset=13):
+    """Exporte vers ONNX avec une dimension de batch dynamique"""
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(
+        model, input_signature=spec, opset=opset, output_path=str(output_path)
+    )
+    return output_path
+
+
+def export_tflite(model, output_path):
+    """Exporte vers TFLite en float32 (sans quantification)"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    output_path.write_bytes(converter.convert())
+    return output_path
+
+
+EXPORTERS = {
+    'onnx': export_onnx,
+    'tflite': export_tflite
+}
+
+
+def check_parity(model, backend, model_path, n_images=4):
+    """Compare les embeddings exportés à ceux de keras sur des images aléatoires préprocessées"""
+    rng = np.random.default_rng(0)
+    # Même plage que preprocess_input (mode caffe): pixels [0, 255] moins la moyenne ImageNet
+    images = (rng.uniform(0, 255, size=(n_images,) + INPUT_SHAPE) - 120.0).astype(np.float32)
+    reference = model.predict(images, verbose=0)
+    candidate = RUNNERS[backend](model_path)(images)
+    return embedding_parity(reference, candidate)
+
+
+def export_resnet50(formats, output_dir=None):
+    """Exporte le modèle dans les formats demandés et vérifie la parité"""
+    print("=" * 80)
+    print("EXPORT RESNET50 (ONNX / TFLITE)")
+    print("=" * 80)
+    print()
+
+    model = ResNet50(weights='imagenet', include_top=False, pooling='avg', input_shape=INPUT_SHAPE)
+    print(f"[OK] Modele keras charge: sortie {model.output_shape}")
+
+    success = True
+    for backend in formats:
+        output_path = Path(output_dir) / DEFAULT_MODEL_PATHS[backend].name if output_dir \
+            else DEFAULT_MODEL_PATHS[backend]
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        start = time.time()
+        try:
+            EXPORTERS[backend](model, output_path)
+        except Exception as e:
+            print(f"[ERREUR] Export {backend} impossible: {e}")
+            success = False
+            continue
+        size_mb = output_path.stat().st_size / (1024 * 1024)
+        print(f"[OK] {backend}: {output_path} ({size_mb:.1f} Mo) en {time.time() - start:.1f}s")
+
+        try:
+            parity = check_parity(model, backend, output_path)
+        except Exception as e:
+            print(f"   [AVERTISSEMENT] Parite non verifiee (runtime {backend} indisponible): {e}")
+            continue
+        status = "OK" if parity['min_cosine'] >= MIN_COSINE else "ERREUR"
+        print(f"   [{status}] Parite: cosinus min {parity['min_cosine']:.6f}, "
+              f"ecart max {parity['max_abs_diff']:.2e}")
+        success = success and status == "OK"
+    return success
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Exporte ResNet50 vers ONNX et TFLite')
+    parser.add_argument('--format', choices=['onnx', 'tflite', 'all'], default='all',
+                        help='Format d\'export (defaut: all)')
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help='Dossier de sortie (defaut: data/models)')
+    args = parser.parse_args()
+
+    formats = list(EXPORTERS) if args.format == 'all' else [args.format]
+    sys.exit(0 if export_resnet50(formats, args.output_dir) else 1)
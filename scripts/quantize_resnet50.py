@@ -0,0 +1,214 @@
+"""
+Quantification INT8 post-entraînement du ResNet50 exporté (ONNX ou TFLite)
+- Calibration sur un échantillon de data/product_images/ (même preprocessing que l'API)
+- Rapport: recall@k des recherches faites avec les embeddings INT8 par rapport aux
+  mêmes requêtes avec les embeddings float32, sur l'index .npy existant, plus
+  cosinus entre embeddings et latence par image
+"""
+import sys
+import json
+import time
+from pathlib import Path
+
+backend_path = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+import numpy as np
+
+from services.feature_extractor_runtime import (
+    DEFAULT_MODEL_PATHS, INT8_MODEL_PATHS, RUNNERS, embedding_parity
+)
+from services.preprocessing_simple import load_and_preprocess_image_simple
+from services.search_engine_npy import SearchEngineNPY, normalize_rows
+from services.ann_index import top_k_indices
+
+IMAGE_DIR = Path(__file__).parent.parent / 'data' / 'product_images'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def split_images(calibration_size, eval_size, seed=0):
+    """Échantillons disjoints d'images pour la calibration et l'évaluation"""
+    paths = sorted(p for p in IMAGE_DIR.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    rng = np.random.default_rng(seed)
+    rng.shuffle(paths)
+    calibration = paths[:calibration_size]
+    evaluation = paths[calibration_size:calibration_size + eval_size] or calibration[:eval_size]
+    return calibration, evaluation
+
+
+def load_images(paths):
+    """Images préprocessées (n, 224, 224, 3) float32"""
+    images = [load_and_preprocess_image_simple(str(p)) for p in paths]
+    return np.concatenate(images).astype(np.float32)
+
+
+def quantize_onnx(float_path, output_path, calibration_images):
+    """Quantification statique QDQ (poids int8 par canal, activations uint8)"""
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    )
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self, input_name, images):
+            self._batches = iter([{input_name: image[np.newaxis]} for image in images])
+
+        def get_next(self):
+            return next(self._batches, None)
+
+    input_name = RUNNERS['onnx'](float_path).input_name
+    quantize_static(
+        str(float_path), str(output_path), ImageReader(input_name, calibration_images),
+        quant_format=QuantFormat.QDQ, per_channel=True,
+        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8
+    )
+    return output_path
+
+
+def quantize_tflite(output_path, calibration_images):
+    """Quantification entière (entrée/sortie float32) depuis le modèle keras"""
+    import tensorflow as tf
+    from tensorflow.keras.applications import ResNet50
+
+    model = ResNet50(
+        weights='imagenet', include_top=False, pooling='avg', input_shape=(224, 224, 3)
+    )
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = lambda: ([image[np.newaxis]] for image in calibration_images)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    output_path.write_bytes(converter.convert())
+    return output_path
+
+
+def measure_latency(runner, images):
+    """Latence moyenne (ms) d'une image seule, après un appel de préchauffage"""
+    runner(images[:1])
+    start = time.perf_counter()
+    for image in images:
+        runner(image[np.newaxis])
+    return (time.perf_counter() - start) / len(images) * 1000
+
+
+def evaluate(backend, float_path, int8_path, eval_images, k_values, num_threads=0):
+    """
+    Compare les modèles float32 et INT8 sur les mêmes requêtes
+
+    Returns:
+        Dictionnaire du rapport (recall@k, cosinus, latences)
+    """
+    engine = SearchEngineNPY()
+    if not engine.load_features_from_npy():
+        raise RuntimeError("Impossible de charger les features (.npy)")
+
+    float_runner = RUNNERS[backend](float_path, num_threads=num_threads)
+    int8_runner = RUNNERS[backend](int8_path, num_threads=num_threads)
+    float_features = np.concatenate([float_runner(image[np.newaxis]) for image in eval_images])
+    int8_features = np.concatenate([int8_runner(image[np.newaxis]) for image in eval_images])
+
+    float_scores = normalize_rows(float_features) @ np.asarray(engine.feature_database).T
+    int8_scores = normalize_rows(int8_features) @ np.asarray(engine.feature_database).T
+    recall = {}
+    for k in k_values:
+        overlaps = [
+            len(set(top_k_indices(f, k).tolist()) & set(top_k_indices(q, k).tolist())) / k
+            for f, q in zip(float_scores, int8_scores)
+        ]
+        recall[f"recall@{k}"] = float(np.mean(overlaps))
+
+    parity = embedding_parity(float_features, int8_features)
+    float_latency = measure_latency(float_runner, eval_images)
+    int8_latency = measure_latency(int8_runner, eval_images)
+    return {
+        'backend': backend,
+        'num_queries': len(eval_images),
+        **recall,
+        'min_cosine': parity['min_cosine'],
+        'float_latency_ms': float_latency,
+        'int8_latency_ms': int8_latency,
+        'speedup': float_latency / int8_latency if int8_latency > 0 else None,
+        'float_size_mb': float_path.stat().st_size / (1024 * 1024),
+        'int8_size_mb': int8_path.stat().st_size / (1024 * 1024)
+    }
+
+
+def quantize_resnet50(backend, calibration_size=100, eval_size=50, k_values=(1, 5, 10),
+                      num_threads=0, report_path=None):
+    """Calibre, quantifie et évalue le modèle INT8"""
+    print("=" * 80)
+    print(f"QUANTIFICATION INT8 RESNET50 ({backend.upper()})")
+    print("=" * 80)
+    print()
+
+    float_path = DEFAULT_MODEL_PATHS[backend]
+    int8_path = INT8_MODEL_PATHS[backend]
+    if not float_path.exists():
+        print(f"[ERREUR] Modele float32 non trouve: {float_path}")
+        print("   Executez d'abord: python scripts/export_resnet50.py")
+        return False
+
+    calibration_paths, eval_paths = split_images(calibration_size, eval_size)
+    if not calibration_paths:
+        print(f"[ERREUR] Aucune image dans {IMAGE_DIR}")
+        return False
+    calibration_images = load_images(calibration_paths)
+    eval_images = load_images(eval_paths)
+    print(f"[OK] {len(calibration_images)} images de calibration, "
+          f"{len(eval_images)} requetes d'evaluation")
+
+    start = time.time()
+    if backend == 'onnx':
+        quantize_onnx(float_path, int8_path, calibration_images)
+    else:
+        quantize_tflite(int8_path, calibration_images)
+    print(f"[OK] Modele INT8: {int8_path} en {time.time() - start:.1f}s")
+
+    report = evaluate(
+        backend, float_path, int8_path, eval_images, k_values, num_threads=num_threads
+    )
+    print()
+    print(f"{'metrique':<20}{'valeur':>12}")
+    print("-" * 32)
+    for key, value in report.items():
+        if isinstance(value, float):
+            print(f"{key:<20}{value:>12.3f}")
+    print()
+    print("Recall@k: proportion des k resultats de la requete float32 retrouves avec INT8")
+
+    report_path = (
+        Path(report_path) if report_path else int8_path.with_name(f"{int8_path.stem}_report.json")
+    )
+    report_path.write_text(json.dumps(report, indent=2))
+    print(f"[OK] Rapport sauvegarde: {report_path}")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Quantification INT8 du ResNet50 exporte et rapport de recall'
+    )
+    parser.add_argument(
+        '--backend', choices=['onnx', 'tflite'], default='onnx', help='Format du modele'
+    )
+    parser.add_argument('--calibration-size', type=int, default=100, help='Images de calibration')
+    parser.add_argument('--eval-size', type=int, default=50, help='Requetes d\'evaluation')
+    parser.add_argument(
+        '--k', type=int, nargs='+', default=[1, 5, 10], help='Valeurs de k du recall@k'
+    )
+    parser.add_argument(
+        '--threads', type=int, default=0, help='Threads intra-op (0 = defaut du runtime)'
+    )
+    parser.add_argument('--report', type=str, default=None,
+                        help='Rapport JSON (defaut: data/models/resnet50_int8_report.json)')
+    args = parser.parse_args()
+
+    success = quantize_resnet50(
+        args.backend,
+        calibration_size=args.calibration_size,
+        eval_size=args.eval_size,
+        k_values=args.k,
+        num_threads=args.threads,
+        report_path=args.report,
+    )
+    sys.exit(0 if success else 1)
@@ -14,6 +14,8 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=backend_path / '.env')
 
 from models.database import get_db
+from services.search_engine_npy import write_normalized_features
+from services.quantization import FP16Index, SQ8Index
 
 def save_features_to_npy():
     """Sauvegarde les features depuis la base de données vers un fichier .npy"""
@@ -87,6 +89,18 @@ def save_features_to_npy():
     np.save(features_path, features)
     print(f"[OK] Features sauvegardees: {features_path}")
     
+    # Version normalisée L2 chargée en memory-map par le search_engine
+    normalized_path = write_normalized_features(features_path)
+    print(f"[OK] Features normalisees (mmap) sauvegardees: {normalized_path}")
+    
+    # Versions compactes (float16, int8 + scale/offset) pour les methodes 'fp16' et 'sq8'
+    normalized = np.load(normalized_path, mmap_mode='r')
+    quantized_paths = []
+    for index_type in (FP16Index, SQ8Index):
+        paths = index_type().build(normalized).save(features_path)
+        quantized_paths.extend(paths)
+        print(f"[OK] Features {index_type.name} sauvegardees: {', '.join(str(p) for p in paths)}")
+    
     # Sauvegarder les product_ids
     product_ids_path = data_dir / 'product_ids.npy'
     np.save(product_ids_path, product_ids_array)
@@ -107,6 +121,9 @@ def save_features_to_npy():
     print(f"Dimension: {features.shape[1]}")
     print(f"Fichiers crees:")
     print(f"  - {features_path}")
+    print(f"  - {normalized_path}")
+    for path in quantized_paths:
+        print(f"  - {path}")
     print(f"  - {product_ids_path}")
     print(f"  - {products_json_path}")
     print()